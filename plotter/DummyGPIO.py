@@ -24,6 +24,6 @@ class DummyGPIO:
         pass
 
     def output(pin, value):
-        """Simulates setting the value to pin
+        """Simulates setting the value to pin. Pin and value can be lists for setting multiple pins at once
         """
         pass
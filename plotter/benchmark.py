@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+import executor
+import kinematics
+import optimizer
+import planner
+import plotter
+import stepper
+import argparse
+import json
+import math
+import platform
+import random
+import time
+import tracemalloc
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def spiral(count, center=(26.0, 40.0), radius=20.0, turns=50):
+    """Generator of synthetic drawing, spiral around center
+
+    :param count: Number of points
+    :param center: XY coordinates of the center in centimeters
+    :param radius: Outer radius in centimeters
+    :param turns: Number of turns of the spiral
+    :return: Generator of (x, y) tuples in centimeters
+    """
+    for i in range(count):
+        t = i / count
+        angle = 2 * math.pi * turns * t
+        yield (center[0] + radius * t * math.cos(angle), center[1] + radius * t * math.sin(angle))
+
+
+def _timed(function, *args):
+    """Run function and return its result with elapsed seconds"""
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def bench_kinematics(count, l=52.0, steps_per_cm=450):
+    """Throughput of scalar and batch inverse and forward kinematics
+
+    :param count: Number of points
+    :return: Dictionary with points per second
+    """
+    points = list(spiral(count))
+    steps, batch = _timed(kinematics.xy_to_steps, points, l, steps_per_cm)
+    _, batch_forward = _timed(kinematics.steps_to_xy, steps, l, steps_per_cm)
+    _, scalar = _timed(lambda: [kinematics.inverse(x, y, l, steps_per_cm) for x, y in points])
+    return {
+        'points': count,
+        'numpy': kinematics.numpy is not None,
+        'inverse_points_per_s': count / scalar,
+        'batch_inverse_points_per_s': count / batch,
+        'batch_forward_points_per_s': count / batch_forward,
+    }
+
+
+def bench_planner(count, l=52.0, steps_per_cm=450):
+    """Throughput of motion planning
+
+    :param count: Number of points
+    :return: Dictionary with moves per second
+    """
+    targets = [(int(a), int(b)) for a, b in kinematics.xy_to_steps(list(spiral(count)), l, steps_per_cm)]
+    motion_planner = planner.Planner(targets[0][0], targets[0][1])
+
+    def plan():
+        moves = 0
+        for a, b in targets:
+            moves += len(motion_planner.add(a, b))
+        return moves + len(motion_planner.flush())
+
+    moves, elapsed = _timed(plan)
+    return {'moves': moves, 'moves_per_s': moves / elapsed}
+
+
+def strokes(count, clusters=0, seed=1):
+    """Synthetic short strokes for ordering, uniformly spread or gathered in distant clusters
+
+    :param count: Number of strokes
+    :param clusters: Number of clusters, 0 for uniform strokes
+    :param seed: Seed of random generator
+    :return: List of strokes, each stroke is list of two (x, y) tuples in centimeters
+    """
+    generator = random.Random(seed)
+    centers = [(generator.uniform(5.0, 45.0), generator.uniform(5.0, 65.0)) for _ in range(clusters)]
+    result = []
+    for i in range(count):
+        if centers:
+            cx, cy = centers[i % len(centers)]
+            x, y = generator.gauss(cx, 0.5), generator.gauss(cy, 0.5)
+        else:
+            x, y = generator.uniform(0.0, 50.0), generator.uniform(0.0, 70.0)
+        result.append([(x, y), (x + generator.uniform(-0.5, 0.5), y + generator.uniform(-0.5, 0.5))])
+    return result
+
+
+def bench_optimizer(count):
+    """Throughput of nearest neighbour ordering of uniform and clustered strokes
+
+    :param count: Number of strokes
+    :return: Dictionary with strokes per second
+    """
+    _, uniform = _timed(optimizer.nearest_neighbour, strokes(count))
+    _, clustered = _timed(optimizer.nearest_neighbour, strokes(count, clusters=2))
+    return {
+        'strokes': count,
+        'uniform_strokes_per_s': count / uniform,
+        'clustered_strokes_per_s': count / clustered,
+    }
+
+
+def bench_executor(steps):
+    """Throughput of step generation without delays between steps
+
+    :param steps: Number of steps of the longer axis
+    :return: Dictionary with steps per second and overhead of one step
+    """
+    stepper1 = stepper.Stepper(False, debug=True)
+    stepper2 = stepper.Stepper(False, debug=True)
+    stepper1.connect(start=False)
+    stepper2.connect(start=False)
+    step_executor = executor.Executor(stepper1, stepper2, debug=True)
+    move = planner.Move(steps, steps // 3, steps, steps // 3, 1000.0, 4000.0)
+    _, elapsed = _timed(step_executor.execute, move)
+    return {
+        'steps': steps,
+        'steps_per_s': steps / elapsed,
+        'step_overhead_us': elapsed / steps * 1e6,
+    }
+
+
+def bench_memory(count):
+    """Peak memory of plotting large synthetic drawing through the whole pipeline
+
+    :param count: Number of points
+    :return: Dictionary with peak memory and points per second
+    """
+    drawing_plotter = plotter.Plotter(x=26.0, y=40.0, debug=True)
+    try:
+        tracemalloc.start()
+        _, elapsed = _timed(drawing_plotter.plot_path, spiral(count, turns=5))
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        drawing_plotter.stop()
+    return {'points': count, 'points_per_s': count / elapsed, 'peak_memory_kb': peak / 1024}
+
+
+def run(points=100000, steps=200000, pipeline_points=20000, stroke_count=20000):
+    """Run all benchmarks
+
+    :param points: Number of points for kinematics and planning
+    :param steps: Number of steps for executor
+    :param pipeline_points: Number of points plotted through the whole pipeline
+    :param stroke_count: Number of strokes ordered by optimizer
+    :return: Dictionary with results and description of environment
+    """
+    return {
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'kinematics': bench_kinematics(points),
+        'planner': bench_planner(points),
+        'executor': bench_executor(steps),
+        'pipeline': bench_memory(pipeline_points),
+        'optimizer': bench_optimizer(stroke_count),
+    }
+
+
+def compare(results, previous):
+    """Relative change of every numeric result against previous run
+
+    :param results: Dictionary returned by run
+    :param previous: Dictionary of previous run
+    :return: Dictionary with ratios of new and previous values
+    """
+    ratios = {}
+    for section, values in results.items():
+        if not isinstance(values, dict) or not isinstance(previous.get(section), dict):
+            continue
+        for key, value in values.items():
+            old = previous[section].get(key)
+            if isinstance(value, float) and isinstance(old, float) and old:
+                ratios['{}.{}'.format(section, key)] = value / old
+    return ratios
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark of droopy plotter without hardware')
+    parser.add_argument('--points', type=int, default=100000, help='Points for kinematics and planning')
+    parser.add_argument('--steps', type=int, default=200000, help='Steps for executor')
+    parser.add_argument('--pipeline-points', type=int, default=20000, help='Points plotted through whole pipeline')
+    parser.add_argument('--strokes', type=int, default=20000, help='Strokes ordered by optimizer')
+    parser.add_argument('--output', help='Save results to JSON file')
+    parser.add_argument('--compare', help='Compare results with previous JSON file')
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+    results = run(args.points, args.steps, args.pipeline_points, args.strokes)
+    print(json.dumps(results, indent=4))
+    if args.compare:
+        with open(args.compare) as previous_file:
+            for key, ratio in sorted(compare(results, json.load(previous_file)).items()):
+                print('{:45} {:6.2f}x'.format(key, ratio))
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(results, output, indent=4)
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import planner
+import logging
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'DRPC'
+VERSION = 3
+#Magic, version, number of moves, acceleration, final X, final Y
+HEADER = struct.Struct('<4sIQddd')
+#Destination a, b, relative move d_a, d_b, entry, cruise and exit speed, number of path points done or -1,
+#index of step mode
+RECORD = struct.Struct('<qqqqdddqB')
+
+
+def drawing_key(points, settings):
+    """Function computes cache key of compiled drawing
+
+    :param points: Sequence of (x, y) tuples in centimeters
+    :param settings: Dictionary of machine geometry, motion settings and start position
+    :return: Hexadecimal SHA-256 digest
+    """
+    digest = hashlib.sha256()
+    digest.update(repr(sorted(settings.items())).encode('utf-8'))
+    pack = struct.Struct('<dd').pack
+    for x, y in points:
+        digest.update(pack(x, y))
+    return digest.hexdigest()
+
+
+class Program:
+    """Compiled step program read from memory mapped cache file"""
+
+    def __init__(self, path):
+        """Open program file
+
+        :param path: Path of the program file"""
+        with open(path, 'rb') as program_file:
+            self._map = mmap.mmap(program_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.count, self.acceleration, x, y = HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError('Unsupported program file {}'.format(path))
+        if len(self._map) != HEADER.size + self.count * RECORD.size:
+            self.close()
+            raise ValueError('Truncated program file {}'.format(path))
+        #Position of the pen after the program
+        self.end = (x, y)
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        acceleration = self.acceleration
+        with memoryview(self._map) as view, view[HEADER.size:] as records:
+            for a, b, d_a, d_b, entry, cruise, exit_velocity, point, mode in RECORD.iter_unpack(records):
+                move = planner.Move(a, b, d_a, d_b, cruise, acceleration, planner.STEP_MODES[mode])
+                move.entry = entry
+                move.exit = exit_velocity
+                if point >= 0:
+                    move.point = point
+                yield move
+
+    def close(self):
+        """Unmap the file"""
+        self._map.close()
+
+
+class ProgramCache:
+    """Directory of compiled step programs with size bounded LRU eviction.
+    Programs are stored in binary files named by key, last use is kept in modification time."""
+
+    SUFFIX = '.program'
+
+    def __init__(self, directory, max_bytes=64 * 1024 * 1024):
+        """Setup of cache
+
+        :param directory: Directory of program files, it is created when missing
+        :param max_bytes: Maximal size of all program files"""
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + self.SUFFIX)
+
+    def get(self, key):
+        """Open cached program
+
+        :param key: Key from drawing_key
+        :return: Program or None when it is not cached
+        """
+        path = self._path(key)
+        try:
+            program = Program(path)
+        except (IOError, ValueError):
+            return None
+        #Mark as recently used
+        os.utime(path)
+        logger.info("Program %s loaded from cache", key)
+        return program
+
+    def put(self, key, moves, end, acceleration):
+        """Store program, moves are written to file as they are generated
+
+        :param key: Key from drawing_key
+        :param moves: Iterable of planner.Move
+        :param end: Position (x, y) of the pen after the program
+        :param acceleration: Acceleration of all moves
+        :return: Generator of stored moves, program is saved when it is exhausted
+        """
+        handle, temporary = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        count = 0
+        try:
+            with os.fdopen(handle, 'wb') as program_file:
+                program_file.write(HEADER.pack(MAGIC, VERSION, 0, acceleration, end[0], end[1]))
+                for move in moves:
+                    program_file.write(RECORD.pack(move.a, move.b, move.d_a, move.d_b,
+                            move.entry, move.cruise, move.exit, -1 if move.point is None else move.point,
+                            planner.STEP_MODES.index(move.mode)))
+                    count += 1
+                    yield move
+                program_file.seek(0)
+                program_file.write(HEADER.pack(MAGIC, VERSION, count, acceleration, end[0], end[1]))
+            os.replace(temporary, self._path(key))
+        finally:
+            if os.path.exists(temporary):
+                os.unlink(temporary)
+        logger.info("Program %s with %s moves stored to cache", key, count)
+        self.evict()
+
+    def evict(self):
+        """Delete least recently used programs until the cache fits into max_bytes"""
+        files = []
+        total = 0
+        for name in os.listdir(self.directory):
+            if name.endswith(self.SUFFIX):
+                status = os.stat(os.path.join(self.directory, name))
+                files.append((status.st_mtime, status.st_size, name))
+                total += status.st_size
+        for mtime, size, name in sorted(files):
+            if total <= self.max_bytes:
+                break
+            os.unlink(os.path.join(self.directory, name))
+            total -= size
+            logger.info("Program %s evicted from cache", name)
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+import os
+import struct
+import threading
+import time
+import zlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'DRPK'
+VERSION = 1
+#Magic, version, width of plotter, steps per centimeter
+HEADER = struct.Struct('<4sIdd')
+#Number of path points done, step position of first and second stepper, CRC-32 of the previous fields
+RECORD = struct.Struct('<qqqI')
+
+
+class Checkpoint:
+    """Append-only file with progress of plotted path.
+    Executor updates the progress after moves ending at path points, records are appended at most once
+    per interval, so the file stays small and the SD card is not worn out. Record torn by crash is ignored.
+    Records are written and synced by own thread, so slow storage does not delay the steps."""
+
+    def __init__(self, path, l, steps_per_cm, interval=5.0):
+        """Setup of checkpoint, the file is created when a path is started
+
+        :param path: Path of the checkpoint file
+        :param l: Width of plotter in centimeters
+        :param steps_per_cm: Number of steps per centimeter of string
+        :param interval: Minimal number of seconds between records written while plotting"""
+        self.path = path
+        self.l = l
+        self.steps_per_cm = steps_per_cm
+        self.interval = interval
+        #Number of path points done, None when no path is plotted
+        self.index = None
+        self._file = None
+        self._written = 0.0
+        #Guards the file, writer thread and final write append records
+        self._lock = threading.Lock()
+        #Latest record waiting for the writer thread
+        self._condition = threading.Condition()
+        self._pending = None
+        self._closing = False
+        self._thread = None
+
+    def start(self, index, a, b):
+        """Start new path, previous records are dropped
+
+        :param index: Number of points of the path already done, 0 for new path
+        :param a: Step position of first stepper
+        :param b: Step position of second stepper"""
+        self.close()
+        with self._lock:
+            self._file = open(self.path, 'wb')
+            self._file.write(HEADER.pack(MAGIC, VERSION, self.l, self.steps_per_cm))
+        self.index = index
+        self._append(index, a, b)
+        self._written = time.monotonic()
+        self._closing = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def update(self, index, a, b):
+        """Progress reported by the executor after move ending at path point, called from executor thread.
+        Only the latest record is handed to the writer thread, the file is not touched here.
+
+        :param index: Number of points of the path done
+        :param a: Step position of first stepper
+        :param b: Step position of second stepper"""
+        self.index = index
+        now = time.monotonic()
+        if now - self._written >= self.interval:
+            self._written = now
+            with self._condition:
+                self._pending = (index, a, b)
+                self._condition.notify()
+
+    def _run(self):
+        """Writer thread appending records handed over by update"""
+        while True:
+            with self._condition:
+                while self._pending is None and not self._closing:
+                    self._condition.wait()
+                record = self._pending
+                self._pending = None
+                closing = self._closing
+            if record is not None:
+                self._append(*record)
+            if closing:
+                break
+
+    def _append(self, index, a, b):
+        """Append record and sync it to storage"""
+        with self._lock:
+            if self._file is None:
+                return
+            crc = zlib.crc32(struct.pack('<qqq', index, a, b))
+            self._file.write(RECORD.pack(index, a, b, crc))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def _stop_writer(self):
+        """Let the writer thread append the waiting record and finish"""
+        if self._thread is None:
+            return
+        with self._condition:
+            self._closing = True
+            self._condition.notify()
+        self._thread.join()
+        self._thread = None
+
+    def write(self, a, b):
+        """Append the last record with the last progress and actual position of the steppers, e.g. when stopping.
+        The writer thread is stopped first, so no older record is appended after this one.
+
+        :param a: Step position of first stepper
+        :param b: Step position of second stepper"""
+        self._stop_writer()
+        if self.index is not None:
+            self._append(self.index, a, b)
+
+    def load(self):
+        """The last valid record of the checkpoint file
+
+        :return: Tuple (index, a, b) or None when there is no checkpoint
+        :raise ValueError: Checkpoint was written for other plotter geometry
+        """
+        try:
+            with open(self.path, 'rb') as checkpoint_file:
+                data = checkpoint_file.read()
+        except FileNotFoundError:
+            return None
+        if len(data) < HEADER.size:
+            return None
+        magic, version, l, steps_per_cm = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError('Unsupported checkpoint file {}'.format(self.path))
+        if (l, steps_per_cm) != (self.l, self.steps_per_cm):
+            raise ValueError('Checkpoint {} is for plotter of width {} with {} steps per cm'.format(
+                    self.path, l, steps_per_cm))
+        #Incomplete record at the end is dropped, records are checked from the last one
+        count = (len(data) - HEADER.size) // RECORD.size
+        for position in range(HEADER.size + (count - 1) * RECORD.size, HEADER.size - 1, -RECORD.size):
+            index, a, b, crc = RECORD.unpack_from(data, position)
+            if zlib.crc32(data[position:position + RECORD.size - 4]) == crc:
+                return index, a, b
+        return None
+
+    def finish(self):
+        """Path is done, the checkpoint file is deleted"""
+        self.close()
+        self.index = None
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def close(self):
+        """Close the file, records are kept"""
+        self._stop_writer()
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+import ingest
+import argparse
+import itertools
+import mmap
+import os
+import struct
+import logging
+
+logger = logging.getLogger(__name__)
+
+"""Optional load of NumPy for decoding whole strokes at once"""
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+MAGIC = b'DRPD'
+VERSION = 1
+#Magic, version, width of plotter, steps per centimeter, number of strokes and points, offset of stroke table
+HEADER = struct.Struct('<4sIddQQQ')
+#Offset of stroke data, number of points
+STROKE = struct.Struct('<QQ')
+
+#Points of stroke decoded in pure Python at once, longer strokes are decoded by NumPy when available
+_SHORT_STROKE = 64
+
+
+def _zigzag(value):
+    """Signed integer mapped to unsigned one, small magnitudes stay small"""
+    return value << 1 if value >= 0 else (-value << 1) - 1
+
+
+def encode_stroke(points, steps_per_cm):
+    """Function encodes stroke as deltas of coordinates rounded to steps, zigzag mapped and stored as varints.
+    The first point is relative to origin, so strokes are decoded independently.
+
+    :param points: Iterable of (x, y) tuples in centimeters
+    :param steps_per_cm: Resolution of coordinates
+    :return: Tuple with bytes of the stroke and number of points
+    """
+    data = bytearray()
+    append = data.append
+    previous_x = previous_y = 0
+    count = 0
+    for x, y in points:
+        x = int(round(x * steps_per_cm))
+        y = int(round(y * steps_per_cm))
+        for delta in (x - previous_x, y - previous_y):
+            value = _zigzag(delta)
+            while value >= 0x80:
+                append(value & 0x7f | 0x80)
+                value >>= 7
+            append(value)
+        previous_x = x
+        previous_y = y
+        count += 1
+    return bytes(data), count
+
+
+def decode_stroke(data, count, steps_per_cm):
+    """Function decodes stroke encoded by encode_stroke
+
+    :param data: Bytes-like object starting with the stroke
+    :param count: Number of points
+    :param steps_per_cm: Resolution of coordinates
+    :return: List of (x, y) tuples in centimeters
+    """
+    if numpy is not None and count > _SHORT_STROKE:
+        return _decode_numpy(data, count, steps_per_cm)
+    values = []
+    value = shift = 0
+    position = 0
+    needed = 2 * count
+    while len(values) < needed:
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7f) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        values.append((value >> 1) ^ -(value & 1))
+        value = shift = 0
+    scale = 1.0 / steps_per_cm
+    xs = itertools.accumulate(values[0::2])
+    ys = itertools.accumulate(values[1::2])
+    return [(x * scale, y * scale) for x, y in zip(xs, ys)]
+
+
+def _decode_numpy(data, count, steps_per_cm):
+    """Vectorized decode_stroke, varints are split at bytes without continuation bit and summed by groups"""
+    #Each varint has at most 10 bytes
+    raw = numpy.frombuffer(data, numpy.uint8, min(len(data), 20 * count))
+    ends = numpy.nonzero(raw < 0x80)[0][:2 * count]
+    raw = raw[:ends[-1] + 1]
+    starts = numpy.empty(len(ends), dtype=numpy.int64)
+    starts[0] = 0
+    starts[1:] = ends[:-1] + 1
+    #Position of each byte within its varint
+    group = numpy.repeat(numpy.arange(len(ends)), ends - starts + 1)
+    shifts = (numpy.arange(len(raw)) - starts[group]) * 7
+    values = numpy.add.reduceat((raw & 0x7f).astype(numpy.int64) << shifts, starts)
+    values = (values >> 1) ^ -(values & 1)
+    points = numpy.cumsum(values.reshape(-1, 2), axis=0) / float(steps_per_cm)
+    return [tuple(point) for point in points.tolist()]
+
+
+class Drawing:
+    """Binary drawing read from memory mapped file.
+    Strokes are decoded one by one while they are iterated, whole drawing is never in memory."""
+
+    def __init__(self, source):
+        """Open drawing file
+
+        :param source: Path of the drawing file or binary file object with file descriptor"""
+        if isinstance(source, str):
+            with open(source, 'rb') as drawing_file:
+                self._map = mmap.mmap(drawing_file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self._map = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) < HEADER.size:
+            self.close()
+            raise ValueError('Truncated drawing file {}'.format(source))
+        magic, version, self.l, self.steps_per_cm, self.count, self.points, self._table = \
+                HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError('Unsupported drawing file {}'.format(source))
+        if len(self._map) != self._table + self.count * STROKE.size:
+            self.close()
+            raise ValueError('Truncated drawing file {}'.format(source))
+
+    def __len__(self):
+        return self.count
+
+    def stroke(self, index):
+        """Decode one stroke
+
+        :param index: Number of the stroke
+        :return: List of (x, y) tuples in centimeters
+        """
+        if not 0 <= index < self.count:
+            raise IndexError('Stroke {} out of range'.format(index))
+        offset, count = STROKE.unpack_from(self._map, self._table + index * STROKE.size)
+        with memoryview(self._map) as view, view[offset:self._table] as data:
+            return decode_stroke(data, count, self.steps_per_cm)
+
+    def __iter__(self):
+        for index in range(self.count):
+            yield self.stroke(index)
+
+    def iter_points(self):
+        """Generator of points of all strokes joined to one path
+
+        :return: Generator of (x, y) tuples in centimeters
+        """
+        return itertools.chain.from_iterable(self)
+
+    def close(self):
+        """Unmap the file"""
+        self._map.close()
+
+
+def iter_strokes(source):
+    """Generator of strokes of binary drawing, the file is closed when the generator is exhausted
+
+    :param source: Path of the drawing file or binary file object with file descriptor
+    :return: Generator of lists of (x, y) tuples in centimeters
+    """
+    binary = Drawing(source)
+    try:
+        for stroke in binary:
+            yield stroke
+    finally:
+        binary.close()
+
+
+def iter_points(source):
+    """Generator of points of binary drawing joined to one path, see iter_strokes
+
+    :return: Generator of (x, y) tuples in centimeters
+    """
+    return itertools.chain.from_iterable(iter_strokes(source))
+
+
+def write(strokes, output, l, steps_per_cm):
+    """Write strokes to binary drawing one by one, only the stroke table is kept in memory
+
+    :param strokes: Iterable of strokes, each stroke is iterable of (x, y) tuples in centimeters
+    :param output: Binary file-like object with seek, the drawing starts at its beginning
+    :param l: Width of plotter in centimeters
+    :param steps_per_cm: Resolution of coordinates
+    :return: Tuple with number of strokes and points
+    """
+    output.write(HEADER.pack(MAGIC, VERSION, l, steps_per_cm, 0, 0, 0))
+    offset = HEADER.size
+    table = bytearray()
+    points = 0
+    for stroke in strokes:
+        data, count = encode_stroke(stroke, steps_per_cm)
+        if not count:
+            continue
+        output.write(data)
+        table += STROKE.pack(offset, count)
+        offset += len(data)
+        points += count
+    output.write(table)
+    end = output.tell()
+    count = len(table) // STROKE.size
+    output.seek(0)
+    output.write(HEADER.pack(MAGIC, VERSION, l, steps_per_cm, count, points, offset))
+    output.seek(end)
+    return count, points
+
+
+def convert(stream, path, l, steps_per_cm, key='analog_data'):
+    """Convert JSON drawing to binary drawing, JSON is parsed incrementally
+
+    :param stream: Binary file-like object with JSON drawing, e.g. from ingest.open_source
+    :param path: Path of the binary drawing, it is replaced only when the conversion succeeds
+    :param l: Width of plotter in centimeters
+    :param steps_per_cm: Resolution of coordinates
+    :param key: Name of the array with points or strokes
+    :return: Tuple with number of strokes and points
+    """
+    temporary = path + '.tmp'
+    try:
+        with open(temporary, 'wb') as output:
+            count, points = write(ingest.iter_strokes(stream, key), output, l, steps_per_cm)
+        os.replace(temporary, path)
+    finally:
+        if os.path.exists(temporary):
+            os.unlink(temporary)
+    logger.info("Drawing with %s strokes and %s points written to %s", count, points, path)
+    return count, points
+
+
+if __name__ == "__main__":
+    import plotter
+    parser = argparse.ArgumentParser(description='Convert JSON drawing to binary drawing')
+    parser.add_argument('source', help='URL, JSON file or - for standard input')
+    parser.add_argument('output', help='Binary drawing file')
+    parser.add_argument('--key', default='analog_data', help='Name of the array with points or strokes')
+    parser.add_argument('--config', help='Configuration file, defaults to config.json beside plotter module')
+    args = parser.parse_args()
+    config = plotter.load_config(args.config)
+    plotter.setup_logger(config)
+    settings = config['plotter']
+    stream = ingest.open_source(args.source)
+    try:
+        convert(stream, args.output, settings['width'], settings['steps_per_cm'], args.key)
+    finally:
+        stream.close()
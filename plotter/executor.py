@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+import threading
+from math import ceil, sqrt
+import queue
+import time
+import logging
+import planner
+import stepper
+import timing
+
+logger = logging.getLogger(__name__)
+
+
+def schedule(d_a, d_b):
+    """Generator of interleaved steps for coordinated move of two steppers.
+    Bresenham's algorithm is used so both steppers start and finish together
+    and the shorter move is spread evenly using integer arithmetic only.
+
+    :param d_a: Relative move of first stepper in steps, negative for backward rotation
+    :param d_b: Relative move of second stepper in steps, negative for backward rotation
+    :return: Generator of tuples (step_a, step_b), each of them -1, 0 or 1
+    """
+    dir_a = 1 if d_a > 0 else -1
+    dir_b = 1 if d_b > 0 else -1
+    n_a = abs(d_a)
+    n_b = abs(d_b)
+    if n_a >= n_b:
+        error = n_a // 2
+        for _ in range(n_a):
+            error -= n_b
+            if error < 0:
+                error += n_a
+                yield (dir_a, dir_b)
+            else:
+                yield (dir_a, 0)
+    else:
+        error = n_b // 2
+        for _ in range(n_b):
+            error -= n_a
+            if error < 0:
+                error += n_b
+                yield (dir_a, dir_b)
+            else:
+                yield (0, dir_b)
+
+
+def full_schedule(d_a, d_b, a, b, parity):
+    """Generator of interleaved steps for coordinated move in full step mode.
+    Steppers at phase of wrong parity are first realigned by a half step towards the destination,
+    then they move by two positions per step. Odd remainder is finished by a half step.
+
+    :param d_a: Relative move of first stepper in positions, negative for backward rotation
+    :param d_b: Relative move of second stepper in positions, negative for backward rotation
+    :param a: Position of first stepper before the move
+    :param b: Position of second stepper before the move
+    :param parity: 1 for single coil full step (odd phases), 0 for dual coil full step (even phases)
+    :return: Generator of tuples (step_a, step_b), each of them -2, -1, 0, 1 or 2
+    """
+    dir_a = 1 if d_a > 0 else -1
+    dir_b = 1 if d_b > 0 else -1
+    align_a = dir_a if d_a and (a - parity) % 2 else 0
+    align_b = dir_b if d_b and (b - parity) % 2 else 0
+    if align_a or align_b:
+        yield (align_a, align_b)
+    n_a = abs(d_a - align_a)
+    n_b = abs(d_b - align_b)
+    for step_a, step_b in schedule(n_a // 2 * dir_a, n_b // 2 * dir_b):
+        yield (2 * step_a, 2 * step_b)
+    rest_a = dir_a if n_a % 2 else 0
+    rest_b = dir_b if n_b % 2 else 0
+    if rest_a or rest_b:
+        yield (rest_a, rest_b)
+
+
+#Parity of phases used by full step modes
+_PARITY = {planner.FULL_STEP: 1, planner.DUAL_STEP: 0}
+
+
+def _tick_delays(ticks, delays):
+    """Generator joining steps with delays, steps by two positions wait for delays of both positions
+
+    :param ticks: Iterable of (step_a, step_b) tuples
+    :param delays: Iterator of delays of single positions
+    :return: Generator of ((step_a, step_b), delay) tuples
+    """
+    delay = 0.0
+    for step_a, step_b in ticks:
+        total = 0.0
+        for _ in range(max(abs(step_a), abs(step_b))):
+            #Realignment of the shorter axis may need one delay more than the move has
+            delay = next(delays, delay)
+            total += delay
+        yield (step_a, step_b), total
+
+
+def _ignore(done):
+    """Callback of cancel without any action"""
+
+
+class _CancelEnd:
+    """Item of in_queue ending the cancel, moves before it are dropped"""
+
+    __slots__ = ('callback',)
+
+    def __init__(self, callback):
+        self.callback = callback
+
+
+class Executor(threading.Thread):
+    """Thread driving both steppers of the plotter from one timing loop.
+    Moves planned by planner.Planner are put to in_queue. Callables put to in_queue
+    are called with True when all moves before them are done, with False when they were cancelled."""
+
+    def __init__(self, stepper1, stepper2, step_delay=0.002, buffer_size=0, spin_us=200,
+            timer=None, trace=None, metrics=None, telemetry=None, checkpoint=None, min_velocity=500.0, debug=False):
+        """Setup of the executor
+
+        :param stepper1: Left stepper, must be connected without its own thread
+        :param stepper2: Right stepper, must be connected without its own thread
+        :param step_delay: Delay between steps of moves without speed profile
+        :param buffer_size: Maximal number of moves waiting in in_queue, 0 for unbounded queue
+        :param spin_us: Microseconds before each step spent in busy loop for precise timing
+        :param timer: Timer of steps, e.g. simulator.VirtualTimer, defaults to timing.Timer
+        :param trace: simulator.Trace recording every step, None disables recording
+        :param metrics: metrics.Metrics counting executed moves, None disables counting
+        :param telemetry: telemetry.Telemetry receiving positions of the steppers, None disables publishing
+        :param checkpoint: checkpoint.Checkpoint receiving progress of plotted path, None disables checkpoints
+        :param min_velocity: Speed the steppers stop from without skipping steps, cancelled moves decelerate to it
+        :param debug: Debug set to True disables delays between steps, used for testing and debugging"""
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.in_queue = queue.Queue(buffer_size)
+        self.stepper1 = stepper1
+        self.stepper2 = stepper2
+        self.debug = debug
+        self.running = False
+        #Set by cancel, moves are aborted and dropped until the item ending the cancel is taken from in_queue
+        self.cancelling = False
+        #Number of cancels whose ending item is not processed yet
+        self._cancels = 0
+        self._cancel_lock = threading.Lock()
+        #Start of the executed move for metrics
+        self._move_started = None
+        self._step_delay = step_delay
+        #Outputs of both steppers for every pair of phases, written at once when both steppers step
+        if stepper1.pins and stepper2.pins:
+            self._pins = stepper1.pins + stepper2.pins
+        else:
+            self._pins = None
+        self._outputs = tuple(tuple(phase1 + phase2 for phase2 in stepper2.STEPS) for phase1 in stepper1.STEPS)
+        #Lateness of steps can be queried in timer.histogram
+        self.timer = timer if timer is not None else timing.Timer(spin_us)
+        self.trace = trace
+        self.metrics = metrics
+        if metrics is not None:
+            metrics.timer = self.timer
+        self.telemetry = telemetry
+        self.checkpoint = checkpoint
+        self.min_velocity = min_velocity
+
+    def run(self):
+        """Function is started when thread is started. Getting moves
+        from queue and executing them"""
+        self.running = True
+        while self.running:
+            item = self.in_queue.get()
+            ticks = self.begin(item)
+            if ticks is not None:
+                if self.debug:
+                    for _ in ticks:
+                        pass
+                else:
+                    wait = self.timer.wait
+                    for step_delay in ticks:
+                        wait(step_delay)
+            self.end(item)
+
+    def begin(self, item):
+        """Process item taken from in_queue, the steps of moves are left to the caller
+
+        :param item: planner.Move, callable, item from cancel_item or 'stop'
+        :return: Generator of ticks of the move from ticks, None for other items
+        """
+        if isinstance(item, _CancelEnd):
+            item.callback(False)
+            with self._cancel_lock:
+                self._cancels -= 1
+                if not self._cancels:
+                    self.cancelling = False
+                    logger.info("Motion cancelled at %s,%s", self.stepper1.step, self.stepper2.step)
+        elif callable(item):
+            item(not self.cancelling)
+        elif item == 'stop':
+            self.running = False
+        elif self.cancelling:
+            logger.debug("Dropping cancelled %s", item)
+        else:
+            if self.metrics is not None:
+                self.metrics.queue_depth = self.in_queue.qsize()
+            self._move_started = time.perf_counter()
+            return self.ticks(item)
+        return None
+
+    def end(self, item):
+        """Finish item taken from in_queue after all ticks of its move were done
+
+        :param item: Item passed to begin"""
+        if self._move_started is not None:
+            if self.metrics is not None:
+                self.metrics.move_done(item, time.perf_counter() - self._move_started,
+                        self.stepper1.step, self.stepper2.step)
+            self._move_started = None
+            if self.telemetry is not None:
+                self.telemetry.publish(self.stepper1.step, self.stepper2.step, self.timer.deadline)
+            if self.checkpoint is not None and item.point is not None and not self.cancelling:
+                self.checkpoint.update(item.point, self.stepper1.step, self.stepper2.step)
+        self.in_queue.task_done()
+
+    def cancel_item(self, callback=None):
+        """Start cancel, the current move stops as soon as the steppers decelerate and waiting moves are dropped.
+        The returned item must be put to in_queue, cancelling ends when it is taken from the queue.
+        Caller may put it without blocking, the queue is drained by the cancel.
+
+        :param callback: Callable called from executor thread with False when the steppers are stopped
+        :return: Item ending the cancel
+        """
+        with self._cancel_lock:
+            self._cancels += 1
+            self.cancelling = True
+        return _CancelEnd(callback if callback is not None else _ignore)
+
+    def cancel(self, callback=None):
+        """Stop the current move as soon as the steppers decelerate and drop all waiting moves.
+        Function does not wait for the steppers, in_queue.join() returns when they are stopped.
+
+        :param callback: Callable called from executor thread with False when the steppers are stopped"""
+        self.in_queue.put(self.cancel_item(callback))
+
+    def move_to(self, a, b):
+        """Rotate both steppers with constant speed so they reach their destinations at the same time
+
+        :param a: Absolute destination of first stepper in steps
+        :param b: Absolute destination of second stepper in steps"""
+        d_a = int(a) - int(self.stepper1.step)
+        d_b = int(b) - int(self.stepper2.step)
+        self.execute(planner.Move(a, b, d_a, d_b, 1.0 / self._step_delay))
+
+    def execute(self, move):
+        """Rotate both steppers to destination of the move following its speed profile
+
+        :param move: planner.Move to execute"""
+        if self.debug:
+            for _ in self.ticks(move):
+                pass
+        else:
+            wait = self.timer.wait
+            for step_delay in self.ticks(move):
+                wait(step_delay)
+
+    def ticks(self, move):
+        """Generator doing steps of the move one tick after another.
+        The caller waits the yielded delay before the next tick, e.g. with timer.wait,
+        so several executors can be driven from one timing loop.
+
+        :param move: planner.Move to execute
+        :return: Generator of delays in seconds after each tick
+        """
+        stepper1 = self.stepper1
+        stepper2 = self.stepper2
+        #Integer positions are stepped directly, there is no division of steps
+        state1 = stepper1.state
+        state2 = stepper2.state
+        timer = self.timer
+        trace = self.trace
+        telemetry = self.telemetry
+        logger.debug("Moving from %s,%s to %s", stepper1.step, stepper2.step, move)
+        #Steps left to decelerate after cancel, None while the move is not cancelled
+        stopping = None
+        timer.start()
+        if move.mode == planner.HALF_STEP:
+            steps = zip(schedule(move.d_a, move.d_b), move.delays())
+        else:
+            steps = _tick_delays(full_schedule(move.d_a, move.d_b, state1.position, state2.position,
+                    _PARITY[move.mode]), iter(move.delays()))
+        for (step_a, step_b), step_delay in steps:
+            if self.cancelling:
+                #Positions moved by this step, speeds are in positions per second
+                units = max(abs(step_a), abs(step_b))
+                if stopping is None:
+                    velocity = units / step_delay
+                    floor = min(self.min_velocity, velocity)
+                    if move.acceleration > 0:
+                        stopping = int(ceil((velocity ** 2 - floor ** 2) / (2 * move.acceleration)))
+                    else:
+                        stopping = 0
+                if stopping <= 0:
+                    logger.debug("Move aborted at %s,%s", state1.position, state2.position)
+                    return
+                stopping -= units
+                velocity = sqrt(max(velocity ** 2 - 2 * move.acceleration * units, floor ** 2))
+                step_delay = units / velocity
+            if step_a and step_b:
+                state1.position += step_a
+                state2.position += step_b
+                self._set_both(state1.position & 7, state2.position & 7)
+            elif step_a:
+                state1.position += step_a
+                stepper1._set_step(state1.position & 7)
+            else:
+                state2.position += step_b
+                stepper2._set_step(state2.position & 7)
+            if trace is not None:
+                if step_a:
+                    trace.record(timer.deadline, 0, state1.position & 7)
+                if step_b:
+                    trace.record(timer.deadline, 1, state2.position & 7)
+            if telemetry is not None and timer.deadline >= telemetry.next_ns:
+                telemetry.publish(state1.position, state2.position, timer.deadline)
+            yield step_delay
+
+    def _set_both(self, phase1, phase2):
+        """Set outputs of all pins of both steppers with one GPIO call
+
+        :param phase1: Index of phase of first stepper
+        :param phase2: Index of phase of second stepper"""
+        stepper1 = self.stepper1
+        stepper2 = self.stepper2
+        stepper1._step_outputs = stepper1.STEPS[phase1]
+        stepper2._step_outputs = stepper2.STEPS[phase2]
+        if self._pins:
+            stepper.GPIO.output(self._pins, self._outputs[phase1][phase2])
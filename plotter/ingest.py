@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+import codecs
+import itertools
+import re
+import sys
+import urllib.request
+import logging
+
+logger = logging.getLogger(__name__)
+
+#Tokens of JSON array of numbers, number is complete only when followed by other character
+_TOKEN = re.compile(r'\s*(?:([\[\],])|(-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?)(?=[^\d.eE+-]))')
+
+
+def open_source(source):
+    """Function opens drawing from URL, local file or standard input
+
+    :param source: http:// or https:// URL, path to file or '-' for standard input
+    :return: Binary file-like object
+    """
+    if source == '-':
+        return sys.stdin.buffer
+    if source.startswith('http://') or source.startswith('https://'):
+        return urllib.request.urlopen(source)
+    return open(source, 'rb')
+
+
+def _parse(stream, key, chunk_size):
+    """Generator parsing points of JSON array under key incrementally
+
+    :param stream: Binary file-like object with JSON document
+    :param key: Name of the array with points
+    :param chunk_size: Number of bytes read at once
+    :return: Generator of (stroke number, (x, y)) tuples
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    buffer = ''
+    pattern = re.compile(r'"' + re.escape(key) + r'"\s*:\s*\[')
+    eof = False
+    #Searching for the beginning of the array
+    while True:
+        data = stream.read(chunk_size)
+        eof = not data
+        buffer += decoder.decode(data, final=eof)
+        match = pattern.search(buffer)
+        if match:
+            buffer = buffer[match.end():]
+            break
+        if eof:
+            raise ValueError('Key "{}" not found in drawing'.format(key))
+        #Key can be split between chunks
+        buffer = buffer[-len(key) - 64:]
+
+    depth = 1
+    stroke = 0
+    numbers = []
+    while True:
+        position = 0
+        for match in _TOKEN.finditer(buffer):
+            if match.start() != position:
+                break
+            position = match.end()
+            token, number = match.groups()
+            if number is not None:
+                numbers.append(float(number))
+            elif token == '[':
+                depth += 1
+                numbers = []
+            elif token == ']':
+                depth -= 1
+                if len(numbers) == 2:
+                    yield (stroke, (numbers[0], numbers[1]))
+                elif depth == 1:
+                    #End of list of points, the array contains strokes
+                    stroke += 1
+                numbers = []
+                if depth == 0:
+                    return
+        buffer = buffer[position:]
+        if eof:
+            raise ValueError('Unexpected end of drawing')
+        data = stream.read(chunk_size)
+        eof = not data
+        buffer += decoder.decode(data, final=eof)
+        if eof:
+            #Terminate last number so it can be matched
+            buffer += ' '
+
+
+def iter_points(stream, key='analog_data', chunk_size=4096):
+    """Generator of points parsed incrementally from JSON drawing.
+    Plotting can start after first points arrive and memory does not grow with drawing size.
+    Strokes of drawing are joined to one path.
+
+    :param stream: Binary file-like object, e.g. from open_source
+    :param key: Name of the array with points
+    :param chunk_size: Number of bytes read at once
+    :return: Generator of (x, y) tuples in centimeters
+    """
+    for stroke, point in _parse(stream, key, chunk_size):
+        yield point
+
+
+def iter_strokes(stream, key='analog_data', chunk_size=4096):
+    """Generator of strokes parsed incrementally from JSON drawing.
+    Array of points is returned as one stroke.
+
+    :param stream: Binary file-like object, e.g. from open_source
+    :param key: Name of the array with points or strokes
+    :param chunk_size: Number of bytes read at once
+    :return: Generator of lists of (x, y) tuples in centimeters
+    """
+    for stroke, points in itertools.groupby(_parse(stream, key, chunk_size), lambda item: item[0]):
+        yield [point for stroke, point in points]
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+from math import sqrt
+import logging
+
+logger = logging.getLogger(__name__)
+
+"""Optional load of NumPy, pure Python is used for batches without it"""
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def inverse(x, y, l, steps_per_cm):
+    """Function computes step positions of steppers for pen position X,Y
+
+    :param x: Horizontal coordinate of the pen in centimeters
+    :param y: Vertical coordinate of the pen in centimeters
+    :param l: Width of plotter in centimeters
+    :param steps_per_cm: Number of steps per centimeter of string
+    :return: Tuple with step positions of left and right stepper
+    """
+    a = int(sqrt(x ** 2 + y ** 2) * steps_per_cm)
+    #b must be negative so the right stepper is rotating in reverse
+    b = -int(sqrt((l - x) ** 2 + y ** 2) * steps_per_cm)
+    return (a, b)
+
+
+def forward(a, b, l, steps_per_cm):
+    """Function computes pen position X,Y for step positions of steppers
+
+    :param a: Step position of left stepper
+    :param b: Step position of right stepper
+    :param l: Width of plotter in centimeters
+    :param steps_per_cm: Number of steps per centimeter of string
+    :return: Tuple with XY coordinates of the pen in centimeters
+    """
+    a_cm = a / steps_per_cm
+    b_cm = b / steps_per_cm
+    x = (a_cm ** 2 - b_cm ** 2 + l ** 2) / (2 * l)
+    y = sqrt(max(a_cm ** 2 - x ** 2, 0.0))
+    return (x, y)
+
+
+def segment(start, end, l, steps_per_cm, tolerance):
+    """Function subdivides straight line so the pen does not draw a curve.
+    Steppers move linearly in string length space between targets, the line is split
+    until the middle of each part deviates from such move less than tolerance.
+
+    :param start: XY coordinates of the beginning of the line in centimeters
+    :param end: XY coordinates of the end of the line in centimeters
+    :param l: Width of plotter in centimeters
+    :param steps_per_cm: Number of steps per centimeter of string
+    :param tolerance: Maximal deviation in steps, line is not split when it is not positive
+    :return: List of XY points of the line without start and with end
+    """
+    if tolerance <= 0:
+        return [end]
+
+    def lengths(x, y):
+        return (sqrt(x ** 2 + y ** 2) * steps_per_cm, sqrt((l - x) ** 2 + y ** 2) * steps_per_cm)
+
+    points = []
+    #Stack of parts to check, the last part is processed first so points are in order
+    stack = [(start, lengths(*start), end, lengths(*end))]
+    while stack:
+        p0, ab0, p1, ab1 = stack.pop()
+        middle = ((p0[0] + p1[0]) / 2, (p0[1] + p1[1]) / 2)
+        ab = lengths(*middle)
+        error = sqrt((ab[0] - (ab0[0] + ab1[0]) / 2) ** 2 + (ab[1] - (ab0[1] + ab1[1]) / 2) ** 2)
+        if error > tolerance:
+            stack.append((middle, ab, p1, ab1))
+            stack.append((p0, ab0, middle, ab))
+        else:
+            points.append(p1)
+    return points
+
+
+def xy_to_steps(points, l, steps_per_cm):
+    """Function computes step positions of steppers for whole path at once
+
+    :param points: (N, 2) array or sequence of XY coordinates in centimeters
+    :param l: Width of plotter in centimeters
+    :param steps_per_cm: Number of steps per centimeter of string
+    :return: (N, 2) integer array with step positions, list of tuples without NumPy
+    """
+    if numpy is None:
+        return [inverse(x, y, l, steps_per_cm) for x, y in points]
+    points = numpy.asarray(points, dtype=numpy.float64).reshape(-1, 2)
+    x = points[:, 0]
+    y2 = points[:, 1] ** 2
+    steps = numpy.empty(points.shape, dtype=numpy.int64)
+    #Conversion to integer truncates toward zero same as int()
+    steps[:, 0] = numpy.sqrt(x ** 2 + y2) * steps_per_cm
+    steps[:, 1] = numpy.sqrt((l - x) ** 2 + y2) * steps_per_cm
+    numpy.negative(steps[:, 1], out=steps[:, 1])
+    return steps
+
+
+def steps_to_xy(steps, l, steps_per_cm):
+    """Function computes pen positions for whole sequence of step positions at once
+
+    :param steps: (N, 2) array or sequence of step positions of left and right stepper
+    :param l: Width of plotter in centimeters
+    :param steps_per_cm: Number of steps per centimeter of string
+    :return: (N, 2) array with XY coordinates in centimeters, list of tuples without NumPy
+    """
+    if numpy is None:
+        return [forward(a, b, l, steps_per_cm) for a, b in steps]
+    steps = numpy.asarray(steps, dtype=numpy.float64).reshape(-1, 2)
+    a2 = (steps[:, 0] / steps_per_cm) ** 2
+    b2 = (steps[:, 1] / steps_per_cm) ** 2
+    points = numpy.empty(steps.shape, dtype=numpy.float64)
+    x = points[:, 0]
+    x[:] = (a2 - b2 + l ** 2) / (2 * l)
+    points[:, 1] = numpy.sqrt(numpy.maximum(a2 - x ** 2, 0.0))
+    return points
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+import collections
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Metrics:
+    """Counters of the executor updated once per move, never per step.
+    Every sample_every-th move is recorded into bounded list of samples."""
+
+    __slots__ = ('steps', 'moves', 'queue_depth', 'busy_s', 'sample_every', 'samples', 'timer')
+
+    def __init__(self, sample_every=100, samples=1000):
+        """Setup of metrics
+
+        :param sample_every: Every n-th move is sampled, 0 disables sampling
+        :param samples: Maximal number of kept samples, the oldest samples are dropped"""
+        self.sample_every = sample_every
+        self.samples = collections.deque(maxlen=samples)
+        #Timer of the executor, source of lateness of steps
+        self.timer = None
+        self.reset()
+
+    def reset(self):
+        """Clear all counters and samples"""
+        self.steps = 0
+        self.moves = 0
+        self.queue_depth = 0
+        self.busy_s = 0.0
+        self.samples.clear()
+        if self.timer is not None:
+            self.timer.histogram.reset()
+
+    def move_done(self, move, duration, a, b):
+        """Count finished move
+
+        :param move: planner.Move which was executed
+        :param duration: Time of execution in seconds
+        :param a: Step position of first stepper after the move
+        :param b: Step position of second stepper after the move"""
+        self.steps += move.steps
+        self.moves += 1
+        self.busy_s += duration
+        if self.sample_every and self.moves % self.sample_every == 0:
+            self.samples.append((time.time(), a, b, move.steps, duration))
+
+    def late_steps(self, limit_us=1000):
+        """Number of steps late at least limit_us microseconds rounded down to power of two"""
+        if self.timer is None:
+            return 0
+        counts = self.timer.histogram.counts
+        return sum(counts[max(limit_us, 1).bit_length():])
+
+    def dump(self):
+        """Current values of all metrics
+
+        :return: Dictionary of metrics"""
+        values = {
+            'steps': self.steps,
+            'moves': self.moves,
+            'queue_depth': self.queue_depth,
+            'busy_s': self.busy_s,
+            'late_steps': self.late_steps(),
+            'samples': list(self.samples),
+        }
+        if self.timer is not None:
+            values['lateness'] = self.timer.histogram.as_dict()
+        return values
+
+    def text(self, prefix='droopy'):
+        """Metrics in plain text exposition format for scraping
+
+        :param prefix: Prefix of names of metrics
+        :return: String with one metric per line"""
+        lines = []
+        for name, value in sorted(self.dump().items()):
+            if isinstance(value, (int, float)):
+                lines.append('{}_{} {}'.format(prefix, name, value))
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+from math import sqrt, hypot
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def travel_distance(strokes, start=None):
+    """Function computes distance the pen travels between strokes
+
+    :param strokes: List of strokes, each stroke is list of (x, y) tuples
+    :param start: Initial (x, y) position of the pen, None to start at beginning of first stroke
+    :return: Sum of distances from end of each stroke to beginning of next one
+    """
+    distance = 0.0
+    position = start
+    for stroke in strokes:
+        if not stroke:
+            continue
+        if position is not None:
+            distance += hypot(stroke[0][0] - position[0], stroke[0][1] - position[1])
+        position = stroke[-1]
+    return distance
+
+
+class KDIndex:
+    """Spatial index of stroke endpoints in k-d tree for nearest neighbour search.
+    The tree splits the points by median, so clustered points stay as cheap to search as uniform ones.
+    Removed points are dropped from their leaves and subtrees without points are skipped by the search."""
+
+    #Maximal number of points in one leaf
+    LEAF_SIZE = 8
+
+    def __init__(self, points):
+        """Setup of index
+
+        :param points: Iterable of (x, y, key) tuples, key identifies the point on removal"""
+        points = list(points)
+        self._count = len(points)
+        #Bounding box, parent, children, points of leaf and number of points of each node
+        self._boxes = []
+        self._parents = []
+        self._children = []
+        self._leaves = []
+        self._alive = []
+        #Leaf node of each key
+        self._leaf_of = {}
+        if points:
+            self._build(points, -1)
+
+    def __len__(self):
+        return self._count
+
+    def _build(self, points, parent):
+        """Add node with given points and its subtree
+
+        :return: Number of the node"""
+        node = len(self._boxes)
+        xs = [point[0] for point in points]
+        ys = [point[1] for point in points]
+        box = (min(xs), min(ys), max(xs), max(ys))
+        self._boxes.append(box)
+        self._parents.append(parent)
+        self._alive.append(len(points))
+        self._children.append(None)
+        self._leaves.append(None)
+        width = box[2] - box[0]
+        height = box[3] - box[1]
+        if len(points) <= self.LEAF_SIZE or (width == 0 and height == 0):
+            self._leaves[node] = dict((key, (x, y)) for x, y, key in points)
+            for x, y, key in points:
+                self._leaf_of[key] = node
+            return node
+        #Split by median of the longer side
+        axis = 0 if width >= height else 1
+        points.sort(key=lambda point: point[axis])
+        middle = len(points) // 2
+        left = self._build(points[:middle], node)
+        right = self._build(points[middle:], node)
+        self._children[node] = (left, right)
+        return node
+
+    def remove(self, x, y, key):
+        """Remove point from index
+
+        :param x: Horizontal coordinate of the point
+        :param y: Vertical coordinate of the point
+        :param key: Key of the point"""
+        node = self._leaf_of.pop(key)
+        del self._leaves[node][key]
+        while node >= 0:
+            self._alive[node] -= 1
+            node = self._parents[node]
+        self._count -= 1
+
+    def _bound(self, node, x, y):
+        """Squared distance of X,Y from bounding box of the node, no point of the node is closer"""
+        min_x, min_y, max_x, max_y = self._boxes[node]
+        dx = max(min_x - x, 0.0, x - max_x)
+        dy = max(min_y - y, 0.0, y - max_y)
+        return dx * dx + dy * dy
+
+    def nearest(self, x, y):
+        """Find point nearest to X,Y by depth first search visiting the nearer child first
+
+        :param x: Horizontal coordinate
+        :param y: Vertical coordinate
+        :return: Tuple (key, distance) or None when the index is empty"""
+        if not self._count:
+            return None
+        alive = self._alive
+        children = self._children
+        best = None
+        best_distance = float('inf')
+        #Squared distances are compared, stack holds nodes with lower bound of their distance
+        stack = [(0, 0.0)]
+        while stack:
+            node, bound = stack.pop()
+            if bound >= best_distance or not alive[node]:
+                continue
+            if children[node] is None:
+                for key, (px, py) in self._leaves[node].items():
+                    distance = (px - x) ** 2 + (py - y) ** 2
+                    if distance < best_distance:
+                        best = key
+                        best_distance = distance
+                continue
+            left, right = children[node]
+            left_bound = self._bound(left, x, y)
+            right_bound = self._bound(right, x, y)
+            if left_bound <= right_bound:
+                stack.append((right, right_bound))
+                stack.append((left, left_bound))
+            else:
+                stack.append((left, left_bound))
+                stack.append((right, right_bound))
+        return (best, sqrt(best_distance))
+
+
+def nearest_neighbour(strokes, start=(0.0, 0.0), reverse=True):
+    """Function orders strokes so the pen always continues with the nearest unvisited stroke
+
+    :param strokes: List of strokes, each stroke is list of (x, y) tuples
+    :param start: Initial (x, y) position of the pen
+    :param reverse: Allow drawing strokes in reverse direction
+    :return: List of (stroke index, reversed) tuples
+    """
+    indexes = [i for i, stroke in enumerate(strokes) if stroke]
+    if not indexes:
+        return []
+
+    def endpoints(i):
+        stroke = strokes[i]
+        yield (stroke[0][0], stroke[0][1], (i, False))
+        if reverse:
+            yield (stroke[-1][0], stroke[-1][1], (i, True))
+
+    index = KDIndex(p for i in indexes for p in endpoints(i))
+    order = []
+    position = start
+    while len(index):
+        (i, reversed_), distance = index.nearest(*position)
+        for x, y, key in endpoints(i):
+            index.remove(x, y, key)
+        order.append((i, reversed_))
+        position = strokes[i][0] if reversed_ else strokes[i][-1]
+    return order
+
+
+def two_opt(strokes, order, start=(0.0, 0.0), window=50, passes=2):
+    """Function improves order of strokes by reversing parts of it when it shortens the travel.
+    Only parts up to window strokes long are tried, so it scales linearly with number of strokes.
+
+    :param strokes: List of strokes, each stroke is list of (x, y) tuples
+    :param order: List of (stroke index, reversed) tuples, it is modified in place
+    :param start: Initial (x, y) position of the pen
+    :param window: Maximal number of strokes in reversed part
+    :param passes: Maximal number of passes over the whole order
+    :return: Improved order
+    """
+    def first(item):
+        i, reversed_ = item
+        return strokes[i][-1] if reversed_ else strokes[i][0]
+
+    def last(item):
+        i, reversed_ = item
+        return strokes[i][0] if reversed_ else strokes[i][-1]
+
+    def distance(p, q):
+        return hypot(p[0] - q[0], p[1] - q[1])
+
+    count = len(order)
+    for _ in range(passes):
+        improved = False
+        for i in range(-1, count - 1):
+            end_i = start if i < 0 else last(order[i])
+            start_i = first(order[i + 1])
+            for j in range(i + 1, min(i + 1 + window, count)):
+                end_j = last(order[j])
+                if j + 1 < count:
+                    start_j = first(order[j + 1])
+                    delta = (distance(end_i, end_j) + distance(start_i, start_j)
+                            - distance(end_i, start_i) - distance(end_j, start_j))
+                else:
+                    delta = distance(end_i, end_j) - distance(end_i, start_i)
+                if delta < -1e-9:
+                    order[i + 1:j + 1] = [(k, not reversed_) for k, reversed_ in reversed(order[i + 1:j + 1])]
+                    start_i = first(order[i + 1])
+                    improved = True
+        if not improved:
+            break
+    return order
+
+
+def optimize(strokes, start=(0.0, 0.0), reverse=True, window=50, passes=2):
+    """Function reorders strokes to minimize travel of the pen between them.
+    Nearest neighbour order is improved by 2-opt when reversing of strokes is allowed.
+
+    :param strokes: List of strokes, each stroke is list of (x, y) tuples
+    :param start: Initial (x, y) position of the pen
+    :param reverse: Allow drawing strokes in reverse direction
+    :param window: Maximal number of strokes reversed at once by 2-opt
+    :param passes: Maximal number of 2-opt passes
+    :return: Tuple (ordered strokes, travel before, travel after)
+    """
+    before = travel_distance(strokes, start)
+    order = nearest_neighbour(strokes, start, reverse)
+    if reverse:
+        two_opt(strokes, order, start, window, passes)
+    ordered = [strokes[i][::-1] if reversed_ else strokes[i] for i, reversed_ in order]
+    after = travel_distance(ordered, start)
+    logger.info("Travel between strokes reduced from %.1f cm to %.1f cm", before, after)
+    return (ordered, before, after)
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+from math import sqrt
+import logging
+
+logger = logging.getLogger(__name__)
+
+#Step modes of moves. Half step uses all 8 phases of stepper.Stepper.STEPS, full step only single coil
+#phases (odd indices) and dual coil full step only phases with two coils (even indices).
+#Full step modes move by two positions per step, so the steppers travel twice as far per GPIO update.
+HALF_STEP = 'half'
+FULL_STEP = 'full'
+DUAL_STEP = 'dual'
+STEP_MODES = (HALF_STEP, FULL_STEP, DUAL_STEP)
+
+
+class Move:
+    """Move of both steppers to absolute step positions with trapezoidal speed profile.
+    Speeds are in steps per second of the stepper doing more steps."""
+
+    def __init__(self, a, b, d_a, d_b, velocity, acceleration=0.0, mode=HALF_STEP):
+        """Setup of move with constant speed
+
+        :param a: Absolute destination of first stepper in steps
+        :param b: Absolute destination of second stepper in steps
+        :param d_a: Relative move of first stepper in steps
+        :param d_b: Relative move of second stepper in steps
+        :param velocity: Cruise speed, also used as entry and exit speed
+        :param acceleration: Acceleration used between entry, cruise and exit speed
+        :param mode: Step mode, one of STEP_MODES"""
+        self.a = a
+        self.b = b
+        self.d_a = d_a
+        self.d_b = d_b
+        self.steps = max(abs(d_a), abs(d_b))
+        self.entry = velocity
+        self.cruise = velocity
+        self.exit = velocity
+        self.acceleration = acceleration
+        self.mode = mode
+        #Number of points of plotted path done when the move ends, None when it ends between points
+        self.point = None
+
+    def __repr__(self):
+        return 'Move({}, {}, entry={:.1f}, cruise={:.1f}, exit={:.1f}, mode={})'.format(
+                self.a, self.b, self.entry, self.cruise, self.exit, self.mode)
+
+    def delays(self):
+        """Generator of delays between steps of the move.
+        Delays are for single positions also in full step modes, the executor adds delays of both positions.
+
+        :return: Generator of delays in seconds, one for each position"""
+        entry2 = self.entry ** 2
+        exit2 = self.exit ** 2
+        cruise = self.cruise
+        accel2 = 2 * self.acceleration
+        last = self.steps - 1
+        for i in range(self.steps):
+            velocity = min(cruise,
+                    sqrt(entry2 + accel2 * i),
+                    sqrt(exit2 + accel2 * (last - i)))
+            yield 1.0 / velocity
+
+
+class Planner:
+    """Motion planner computing trapezoidal speed profiles of moves.
+    Speed is carried through shallow corners, lookahead over upcoming moves
+    makes sure the steppers can always decelerate to stop at the end of known path."""
+
+    def __init__(self, a, b, max_velocity=1000.0, acceleration=4000.0, min_velocity=500.0, lookahead=16,
+            travel_velocity=None, draw_mode=HALF_STEP, travel_mode=DUAL_STEP):
+        """Setup of planner
+
+        :param a: Initial position of first stepper in steps
+        :param b: Initial position of second stepper in steps
+        :param max_velocity: Cruise speed in steps per second
+        :param acceleration: Acceleration in steps per second squared
+        :param min_velocity: Speed the steppers can start and stop with without skipping steps
+        :param lookahead: Number of moves kept for planning before they are released
+        :param travel_velocity: Cruise speed of travel moves, defaults to max_velocity
+        :param draw_mode: Step mode of drawing moves, one of STEP_MODES
+        :param travel_mode: Step mode of travel moves, one of STEP_MODES"""
+        if travel_velocity is None:
+            travel_velocity = max_velocity
+        if not 0 < min_velocity <= min(max_velocity, travel_velocity):
+            raise ValueError('Velocities must satisfy 0 < min_velocity <= max_velocity, travel_velocity')
+        if draw_mode not in STEP_MODES or travel_mode not in STEP_MODES:
+            raise ValueError('Step modes must be one of {}'.format(', '.join(STEP_MODES)))
+        self.a = a
+        self.b = b
+        self.max_velocity = max_velocity
+        self.acceleration = acceleration
+        self.min_velocity = min_velocity
+        self.lookahead = lookahead
+        self.travel_velocity = travel_velocity
+        self.draw_mode = draw_mode
+        self.travel_mode = travel_mode
+        self._moves = []
+        self._junctions = []
+        self._entry = min_velocity
+
+    def reset(self, a, b):
+        """Drop buffered moves and start planning from stopped steppers at new position
+
+        :param a: Position of first stepper in steps
+        :param b: Position of second stepper in steps"""
+        self.a = a
+        self.b = b
+        self._moves = []
+        self._junctions = []
+        self._entry = self.min_velocity
+
+    def add(self, a, b, travel=False, point=None):
+        """Add destination to the planned path
+
+        :param a: Absolute destination of first stepper in steps
+        :param b: Absolute destination of second stepper in steps
+        :param travel: Move is not drawing, travel_velocity and travel_mode are used
+        :param point: Number of points of plotted path done at the destination, see Move.point
+        :return: List of moves with final speed profile ready for execution"""
+        d_a = a - self.a
+        d_b = b - self.b
+        if d_a == 0 and d_b == 0:
+            #Point at the same position is done with the previous move
+            if point is not None and self._moves:
+                self._moves[-1].point = point
+            return []
+        if travel:
+            move = Move(a, b, d_a, d_b, self.travel_velocity, self.acceleration, self.travel_mode)
+        else:
+            move = Move(a, b, d_a, d_b, self.max_velocity, self.acceleration, self.draw_mode)
+        move.point = point
+        if self._moves:
+            self._junctions.append(self._junction_velocity(self._moves[-1], move))
+        self._moves.append(move)
+        self.a = a
+        self.b = b
+        released = []
+        while len(self._moves) > self.lookahead:
+            released.append(self._release())
+        return released
+
+    def flush(self):
+        """Release all planned moves, the last one stops the steppers
+
+        :return: List of moves with final speed profile ready for execution"""
+        released = []
+        while self._moves:
+            released.append(self._release())
+        return released
+
+    def _junction_velocity(self, previous, move):
+        """Maximal speed in the corner between two moves
+
+        :param previous: Move ending in the corner
+        :param move: Move starting in the corner
+        :return: Speed in steps per second"""
+        dot = previous.d_a * move.d_a + previous.d_b * move.d_b
+        if dot <= 0 or previous.mode != move.mode:
+            #Phases are realigned when step mode changes, so the steppers slow down
+            return self.min_velocity
+        cos = dot / sqrt((previous.d_a ** 2 + previous.d_b ** 2) * (move.d_a ** 2 + move.d_b ** 2))
+        return self.min_velocity + (min(previous.cruise, move.cruise) - self.min_velocity) * cos
+
+    def _release(self):
+        """Plan speeds of all buffered moves and release the first one
+
+        :return: Move with final speed profile"""
+        moves = self._moves
+        junctions = self._junctions
+        accel2 = 2 * self.acceleration
+        #Backward pass, steppers must be able to stop at the end of the buffered path
+        exit_velocity = self.min_velocity
+        for index in range(len(moves) - 1, -1, -1):
+            move = moves[index]
+            move.exit = exit_velocity
+            entry = sqrt(exit_velocity ** 2 + accel2 * move.steps)
+            if index:
+                entry = min(entry, junctions[index - 1])
+            move.entry = min(entry, move.cruise)
+            exit_velocity = move.entry
+        #Forward pass from the already fixed entry speed
+        entry = self._entry
+        for move in moves:
+            move.entry = entry
+            move.exit = max(min(move.exit, sqrt(entry ** 2 + accel2 * move.steps)), self.min_velocity)
+            entry = move.exit
+        move = moves.pop(0)
+        if junctions:
+            junctions.pop(0)
+        self._entry = move.exit
+        logger.debug('Planned %s', move)
+        return move
@@ -1,31 +1,65 @@
 #!/usr/bin/env python3
 import stepper
-from math import sqrt
-import urllib.request
+import executor
+import planner
+import kinematics
+import optimizer
+import simplify
+import ingest
+import vector
+import drawing
+import simulator
+import metrics
+import cache
+import telemetry
+import checkpoint
+import asyncio
+import functools
+import itertools
+import argparse
 import json
 import logging
 import os
+import queue
 import time
 
 
 logger = logging.getLogger(__name__)
 #logger.propagate = False
 
-def load_config():
-    """Method load configuration from configuration file
+#Environment variable with path to configuration file
+CONFIG_ENV = 'DROOPY_CONFIG'
+DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.json')
+#Parsed and validated configuration files by absolute path
+_config_cache = {}
+
+def load_config(source=None):
+    """Method load configuration. Configuration files are parsed and validated only once
+
+    :param source: Dictionary with configuration or path to configuration file.
+        Defaults to file from DROOPY_CONFIG environment variable or config.json beside this module
+    :return: Dictionary with configuration
     """
-    config = None
-    try:
-        config_file_path = os.path.join(os.path.dirname(__file__),'config.json')
-        config_file = open(config_file_path)
-        config = json.load(config_file)
-        logger.debug('Parsed config file: ', config)
-    except IOError: 
-        logger.info("Parsing the JSON config file: %s", config_file.name)
-    except ValueError:
-        logger.error("Parsing of JSON config failed")
-    else:
+    if isinstance(source, dict):
+        validate_config(source)
+        return source
+    if source is None:
+        source = os.environ.get(CONFIG_ENV, DEFAULT_CONFIG_PATH)
+    config_file_path = os.path.abspath(source)
+    config = _config_cache.get(config_file_path)
+    if config is None:
+        try:
+            with open(config_file_path) as config_file:
+                config = json.load(config_file)
+        except IOError:
+            logger.error("Cannot read the JSON config file: %s", config_file_path)
+            raise
+        except ValueError:
+            logger.error("Parsing of JSON config failed")
+            raise
+        logger.debug('Parsed config file: %s', config)
         validate_config(config)
+        _config_cache[config_file_path] = config
     return config
 
 def validate_config(config):
@@ -43,27 +77,50 @@ def validate_config(config):
         logger.error("Missing %s setting in config", key)
         raise
 
-def setup_logger():
-    """Function set up logger. At first it delete root handlers from stepper modules to override it from configuration file
+def setup_logger(config):
+    """Function set up logger. At first it delete root handlers to override it from configuration file
+
+    :param config: Dictionary with configuration
     """
     logging.root.handlers = []
-    logging.basicConfig(level=CONFIG['plotter']['logging_level'])
+    logging.basicConfig(level=config['plotter']['logging_level'])
+
+def _notify(loop, callback, *args):
+    """Executor callback calling callback(done, *args) in the event loop
+
+    :param loop: Event loop running the coroutine waiting for executor
+    :param callback: Function called in the event loop with True when the executor reached
+        the callback and False when it was cancelled
+    :return: Callable to be put to executor queue"""
+    return lambda done: loop.call_soon_threadsafe(callback, done, *args)
+
+
+def _resolve(done, future):
+    """Finish future waiting for executor, unless it was cancelled meanwhile"""
+    if not future.done():
+        if done:
+            future.set_result(None)
+        else:
+            future.cancel()
+
+
+def _report(done, progress, plotted, last):
+    """Put progress reported by executor to asyncio queue"""
+    progress.put_nowait((done, plotted, last))
 
-CONFIG = load_config()
-setup_logger()
 
 class Plotter:
     """Class controlling the plotter
     """
-    stepper1_pins = CONFIG['stepper1']['pins']
-    stepper2_pins = CONFIG['stepper2']['pins'] 
+    KINEMATICS_CHUNK = 256
+    #Seconds between attempts to put move to full executor queue from event loop
+    POLL_INTERVAL = 0.005
     stepper1 = None
     stepper2 = None
-    steps_per_cm = CONFIG['plotter']['steps_per_cm']
-    #l is plotter width from edge of one servo to other in centimeters
-    l = CONFIG['plotter']['width']
+    executor = None
+    planner = None
 
-    def __init__(self, x=0.0, y=0.0, l=52.0, debug=False):
+    def __init__(self, x=0.0, y=0.0, l=None, debug=False, simulate=False, config=None, start=True):
         """Initialisation of plotter with physical parameters
 
         :param x: Initial X position of the pen in centimeters.
@@ -71,137 +128,497 @@ class Plotter:
         :param y: Initial Y position of the pen in centimeters.
             Positive number measuring distance from top of steppers to the pen tip
         :param l: Width of plotter measured from middle of one stepper to middle of second stepper.
-        :param debug: Debug mode disables physical GPIO outputs. Useful for debugging and testing"""
+            Defaults to width from configuration
+        :param debug: Debug mode disables physical GPIO outputs. Useful for debugging and testing
+        :param simulate: Simulation disables physical GPIO outputs, steps are timed by virtual clock
+            and recorded to trace for inspection of the job
+        :param config: Dictionary with configuration or path to configuration file, see load_config
+        :param start: Start thread of the executor, False when the plotter is driven by scheduler.Scheduler"""
+        self.config = load_config(config)
+        settings = self.config['plotter']
         #Initiation of physical parameters
-        self.l = l
-        if debug:
-            self.stepper1 = stepper.Stepper(debug=debug)
-            self.stepper2 = stepper.Stepper(debug=debug)
+        self.steps_per_cm = settings['steps_per_cm']
+        #l is plotter width from edge of one servo to other in centimeters
+        self.l = l if l is not None else settings['width']
+        if debug or simulate:
+            #Simulated steppers have no pins, so nothing is written to GPIO
+            self.stepper1 = stepper.Stepper(debug=True)
+            self.stepper2 = stepper.Stepper(debug=True)
         else:
-            self.stepper1 = stepper.Stepper(self.stepper1_pins)
-            self.stepper2 = stepper.Stepper(self.stepper2_pins)
-
-        a_cm = sqrt(x**2 + y**2)
-        a = int(a_cm * self.steps_per_cm)
-        b_cm = sqrt((l-x)**2 + y**2)
-        #b must be negative so the right stepper is rotating in reverse
-        b = -int(b_cm * self.steps_per_cm)
+            self.stepper1 = stepper.Stepper(self.config['stepper1']['pins'])
+            self.stepper2 = stepper.Stepper(self.config['stepper2']['pins'])
 
+        a, b = self.getAB(x, y)
         self.stepper1.step = a
         self.stepper2.step = b
+        #Last destination of the pen, start of next straight line
+        self._xy = (x, y)
+        self.segment_tolerance = settings.get('segment_tolerance', 0)
+        self.simplify_tolerance = settings.get('simplify_tolerance', 0)
+        #Simplifier of the last plotted path, it reports the reduction ratio
+        self.simplifier = None
+        self.points_planned = 0
+
+        self.planner = planner.Planner(a, b,
+                max_velocity=settings.get('max_velocity', 1000.0),
+                acceleration=settings.get('acceleration', 4000.0),
+                min_velocity=settings.get('min_velocity', 500.0),
+                lookahead=settings.get('lookahead', 16),
+                travel_velocity=settings.get('travel_velocity'),
+                draw_mode=settings.get('draw_mode', planner.HALF_STEP),
+                travel_mode=settings.get('travel_mode', planner.DUAL_STEP))
 
-        self.stepper1.connect()
-        self.stepper2.connect()
+        self.stepper1.connect(start=False)
+        self.stepper2.connect(start=False)
+        self.cache = None
+        if settings.get('cache_dir'):
+            self.cache = cache.ProgramCache(os.path.expanduser(settings['cache_dir']),
+                    settings.get('cache_size_mb', 64) * 1024 * 1024)
+        self.metrics = None
+        if settings.get('metrics', True):
+            self.metrics = metrics.Metrics()
+        self.telemetry = None
+        if settings.get('telemetry_hz', 50):
+            self.telemetry = telemetry.Telemetry(self.l, self.steps_per_cm, settings.get('telemetry_hz', 50))
+        self.checkpoint = None
+        #Dry run must not replace the checkpoint of interrupted drawing
+        if settings.get('checkpoint_file') and not simulate:
+            self.checkpoint = checkpoint.Checkpoint(os.path.expanduser(settings['checkpoint_file']),
+                    self.l, self.steps_per_cm, settings.get('checkpoint_interval_s', 5.0))
+        self.trace = None
+        timer = None
+        if simulate:
+            self.trace = simulator.Trace(a, b)
+            timer = simulator.VirtualTimer()
+        self.executor = executor.Executor(self.stepper1, self.stepper2,
+                buffer_size=settings.get('buffer_size', 0),
+                spin_us=settings.get('spin_us', 200),
+                timer=timer, trace=self.trace, metrics=self.metrics, telemetry=self.telemetry,
+                checkpoint=self.checkpoint, min_velocity=self.planner.min_velocity, debug=debug)
+        if start:
+            self.executor.start()
 
-    def gotoXY(self, x, y):
+    def gotoXY(self, x, y, travel=False):
         """Move pen to position X,Y
 
         :param x: Horizontal destination. Positive number from distance from left stepper to the pen tip.
         :param y: Vertical destination. Positive number measuring distance from top of steppers to the pen tip
+        :param travel: Move is not drawing, it is not kept straight and uses travel speed and step mode
         """
-        logger.info("New XY: {},{}".format(x, y))
-        l = self.l
+        #synchronized movement of pen to new position
+        for move in self._plan_goto(x, y, travel):
+            self.executor.in_queue.put(move)
+        self.executor.in_queue.join()
 
-        a_cm = sqrt(x ** 2 + y ** 2)
-        a = int(a_cm * self.steps_per_cm)
-        d_a = a - self.stepper1.step
+    def _plan_goto(self, x, y, travel):
+        """Plan moves of the pen to position X,Y ending with stopped steppers
 
-        b_cm = sqrt((l - x) ** 2 + y ** 2)
-        #b must be negative so the right stepper is rotating in reverse
-        b = -int(b_cm * self.steps_per_cm)
-        d_b = b - self.stepper2.step
+        :return: List of planner.Move"""
+        logger.info("New XY: %s,%s", x, y)
+        if travel:
+            points = [(x, y)]
+            self._xy = (x, y)
+        else:
+            points = list(self._segment_path([(x, y)]))
+        moves = []
+        for a, b in kinematics.xy_to_steps(points, self.l, self.steps_per_cm):
+            logger.debug("New ab: %s,%s", a, b)
+            moves += self.planner.add(int(a), int(b), travel)
+        return moves + self.planner.flush()
 
-        logger.debug("New ab: {},{}".format(a, b))
-        logger.debug("Delta ab: {},{}".format(d_a, d_b))
+    def plot_path(self, points, start=0):
+        """Move pen continuously through all points of the path.
+        Kinematics and speed profiles of upcoming points are computed while the steppers are moving,
+        the executor queue works as bounded buffer so the motors are not stopped between points.
+        Progress is written to checkpoint_file set in config, it is deleted when the path is done.
 
-        #speed reduction of shorter position change
-        if abs(d_a) > abs(d_b):
-            self.stepper1.divider = 1.0
-            try:
-                self.stepper2.divider = abs(d_a / d_b)
-            except ZeroDivisionError:
-                self.stepper2.divider = float("inf")
+        :param points: Iterable of (x, y) tuples in centimeters, it can be a generator
+        :param start: Number of points skipped, e.g. done before the checkpoint the plotting is resumed from
+        :return: Number of points of the path
+        """
+        if self.checkpoint is not None:
+            self.checkpoint.start(start, self.stepper1.step, self.stepper2.step)
+        done = []
+        for move in self.compile_path(points, start):
+            self.executor.in_queue.put(move)
+        if self.checkpoint is not None:
+            #Called with False when the path is cancelled, cancelled path keeps its checkpoint
+            self.executor.in_queue.put(done.append)
+        self.executor.in_queue.join()
+        if self.checkpoint is not None and done == [True]:
+            self.checkpoint.finish()
+        logger.info("Path of %s points plotted", self.points_planned)
+        return self.points_planned
+
+    def plot_cached(self, points, start=0):
+        """Plot drawing using compiled step program from cache.
+        Compiled program is stored to cache while the drawing is plotted for the first time,
+        so the planning is skipped when the same drawing is plotted again from the same position.
+        Moves of cached program keep the numbers of points done, so the progress is written to checkpoint
+        as in plot_path.
+
+        :param points: Sequence of (x, y) tuples in centimeters
+        :param start: Number of points skipped, e.g. done before the checkpoint the plotting is resumed from
+        :return: Number of points of the path
+        """
+        if self.cache is None:
+            return self.plot_path(points, start)
+        points = list(points)
+        if len(points) <= start:
+            return 0
+        settings = self._cache_settings()
+        settings['first'] = start
+        key = cache.drawing_key(points, settings)
+        program = self.cache.get(key)
+        if program is None:
+            moves = self.cache.put(key, self.compile_path(points, start), points[-1], self.planner.acceleration)
         else:
+            moves = program
+        if self.checkpoint is not None:
+            self.checkpoint.start(start, self.stepper1.step, self.stepper2.step)
+        done = []
+        last = None
+        for move in moves:
+            self.executor.in_queue.put(move)
+            last = move
+        if self.checkpoint is not None:
+            self.executor.in_queue.put(done.append)
+        self.executor.in_queue.join()
+        if self.checkpoint is not None and done == [True]:
+            self.checkpoint.finish()
+        if program is not None:
+            program.close()
+            if last is not None:
+                self.planner.reset(last.a, last.b)
+            self._xy = program.end
+            self.points_planned = len(points) - start
+        logger.info("Path of %s points plotted", self.points_planned)
+        return self.points_planned
+
+    def _cache_settings(self):
+        """Settings which change the compiled step program of a drawing"""
+        motion_planner = self.planner
+        return {
+            'width': self.l,
+            'steps_per_cm': self.steps_per_cm,
+            'max_velocity': motion_planner.max_velocity,
+            'min_velocity': motion_planner.min_velocity,
+            'acceleration': motion_planner.acceleration,
+            'lookahead': motion_planner.lookahead,
+            'draw_mode': motion_planner.draw_mode,
+            'segment_tolerance': self.segment_tolerance,
+            'simplify_tolerance': self.simplify_tolerance,
+            'start': (motion_planner.a, motion_planner.b, self._xy),
+        }
+
+    def compile_path(self, points, start=0):
+        """Generator of planned moves of the path, the last move stops the steppers.
+        Points are simplified, lines are split, kinematics computed in chunks and moves planned.
+        Number of points of the path planned so far is kept in points_planned.
+        Move ending at a point of the path has the number of points done in planner.Move.point.
+
+        :param points: Iterable of (x, y) tuples in centimeters, it can be a generator
+        :param start: Number of points skipped at the beginning of the path
+        :return: Generator of planner.Move
+        """
+        self.points_planned = 0
+        #Points carry their index through simplification
+        points = ((x, y, index) for index, (x, y) in itertools.islice(enumerate(points), start, None))
+        self.simplifier = None
+        if self.simplify_tolerance > 0:
+            self.simplifier = simplify.Simplifier(self.simplify_tolerance, self.steps_per_cm)
+            points = self.simplifier.simplify(points)
+        while True:
+            #Kinematics are computed for chunks of points at once
+            chunk = list(itertools.islice(points, self.KINEMATICS_CHUNK))
+            if not chunk:
+                break
+            segmented = []
+            #Number of points done at the last segment of each point
+            done = {}
+            for x, y, index in chunk:
+                segmented.extend(self._segment_path([(x, y)]))
+                done[len(segmented) - 1] = index + 1
+            for i, (a, b) in enumerate(kinematics.xy_to_steps(segmented, self.l, self.steps_per_cm)):
+                for move in self.planner.add(int(a), int(b), point=done.get(i)):
+                    yield move
+            self.points_planned += len(chunk)
+        if self.simplifier is not None:
+            self.points_planned = self.simplifier.input_count
+        for move in self.planner.flush():
+            yield move
+
+    def cancel(self):
+        """Stop the steppers after deceleration and drop all queued moves.
+        Planning continues from the position where the steppers stopped."""
+        self.executor.cancel()
+        self.executor.in_queue.join()
+        self._stopped()
+
+    def restore(self, a, b):
+        """Set positions of stopped steppers, e.g. from the checkpoint of interrupted path.
+        Planning continues from the new position.
+
+        :param a: Step position of first stepper
+        :param b: Step position of second stepper"""
+        self.stepper1.step = a
+        self.stepper2.step = b
+        if self.trace is not None and not len(self.trace):
+            self.trace.a = a
+            self.trace.b = b
+        self._stopped()
+
+    def _stopped(self):
+        """Restart planning from actual position of stopped steppers"""
+        self.planner.reset(self.stepper1.step, self.stepper2.step)
+        self._xy = self.getXY()
+
+    async def _put(self, item):
+        """Put move or callback to executor queue without blocking the event loop
+
+        :param item: planner.Move or callable"""
+        while True:
             try:
-                self.stepper1.divider = abs(d_b / d_a)
-            except:
-                self.stepper1.divider = float("inf")
-            self.stepper2.divider = 1.0
-
-        logger.debug("Dividers: {},{}".format(
-            self.stepper1.divider,
-            self.stepper2.divider))
-        #synchronized movement of pen to new position
-        self.stepper1.in_queue.put(int(a))
-        self.stepper2.in_queue.put(int(b))
-        self.stepper1.in_queue.join()
-        self.stepper2.in_queue.join()
+                self.executor.in_queue.put_nowait(item)
+                return
+            except queue.Full:
+                await asyncio.sleep(self.POLL_INTERVAL)
+
+    async def _cancel(self):
+        """Cancel motion without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        stopped = loop.create_future()
+        #Executor drains the bounded queue while cancelling, the event loop only waits for a free slot
+        await self._put(self.executor.cancel_item(_notify(loop, lambda done: stopped.set_result(None))))
+        await stopped
+        self._stopped()
+
+    async def goto(self, x, y, travel=False):
+        """Coroutine moving pen to position X,Y, it returns when the pen is there.
+        When the waiting task is cancelled, the steppers are stopped.
+
+        :param x: Horizontal destination in centimeters
+        :param y: Vertical destination in centimeters
+        :param travel: Move is not drawing, it is not kept straight and uses travel speed and step mode
+        """
+        loop = asyncio.get_running_loop()
+        reached = loop.create_future()
+        try:
+            for move in self._plan_goto(x, y, travel):
+                await self._put(move)
+            await self._put(_notify(loop, _resolve, reached))
+            await reached
+        except asyncio.CancelledError:
+            await self._cancel()
+            raise
+
+    async def plot(self, points):
+        """Asynchronous generator plotting the path, it yields progress while the steppers are moving.
+        Moves are planned in the event loop only as fast as the executor queue accepts them.
+        Leaving the loop early or cancelling the task stops the steppers.
+
+        :param points: Iterable of (x, y) tuples in centimeters, it can be a generator
+        :return: Asynchronous generator of numbers of plotted points, the last one is for whole path
+        """
+        loop = asyncio.get_running_loop()
+        progress = asyncio.Queue()
+
+        async def produce():
+            planned = 0
+            try:
+                for move in self.compile_path(points):
+                    await self._put(move)
+                    if self.points_planned != planned:
+                        planned = self.points_planned
+                        await self._put(_notify(loop, _report, progress, planned, False))
+                await self._put(_notify(loop, _report, progress, self.points_planned, True))
+            except Exception as error:
+                #Errors of the path are raised to the consumer of progress
+                progress.put_nowait(error)
+
+        producer = asyncio.ensure_future(produce())
+        finished = False
+        try:
+            while not finished:
+                report = await progress.get()
+                if isinstance(report, Exception):
+                    raise report
+                done, plotted, finished = report
+                if not done:
+                    #Cancelled from elsewhere
+                    break
+                yield plotted
+        finally:
+            if not finished:
+                producer.cancel()
+                await self._cancel()
+        logger.info("Path of %s points plotted", self.points_planned)
+
+    def plot_strokes(self, strokes, optimize=True):
+        """Plot strokes one after another as one continuous path
+
+        :param strokes: List of strokes, each stroke is list of (x, y) tuples in centimeters
+        :param optimize: Reorder and reverse strokes to minimize travel of the pen between them
+        :return: Number of points of all strokes
+        """
+        if optimize:
+            #Reduction of travel is logged by the optimizer
+            strokes = optimizer.optimize(strokes, start=self._xy)[0]
+        return self.plot_path(itertools.chain.from_iterable(strokes))
+
+    def _segment_path(self, points):
+        """Generator splitting straight lines between points, so they are not drawn as curves.
+        Lines are split to segment_tolerance set in config in steps, 0 disables splitting.
+
+        :param points: Iterable of (x, y) tuples in centimeters
+        :return: Generator of (x, y) tuples in centimeters
+        """
+        tolerance = self.segment_tolerance
+        for point in points:
+            if tolerance > 0:
+                for xy in kinematics.segment(self._xy, point, self.l, self.steps_per_cm, tolerance):
+                    yield xy
+            else:
+                yield point
+            self._xy = point
+
+    def getAB(self, x, y):
+        """ Function computes step positions of steppers for pen position X,Y
+
+        :param x: Horizontal coordinate of the pen in centimeters
+        :param y: Vertical coordinate of the pen in centimeters
+        :return: Tuple with step positions of left and right stepper
+        """
+        return kinematics.inverse(x, y, self.l, self.steps_per_cm)
 
     def getXY(self):
         """ Function takes actual step positions of steppers and return orthogonal coordinates of the pen in centimeters.
 
         :return: Tuple with XY coordinates of the pen
         """
-        return (self.getX(), self.getY())
+        return kinematics.forward(self.stepper1.step, self.stepper2.step, self.l, self.steps_per_cm)
+
+    def position(self):
+        """Position of the pen published by the executor, steps and coordinates are consistent with each other
+        even while the steppers are moving. The last snapshot is up to 1 / telemetry_hz seconds old.
+
+        :return: Tuple (a, b, x, y, timestamp) with timestamp in nanoseconds of the executor timer
+        """
+        snapshot = self.telemetry.latest() if self.telemetry is not None else None
+        if snapshot is None:
+            a = self.stepper1.step
+            b = self.stepper2.step
+            x, y = kinematics.forward(a, b, self.l, self.steps_per_cm)
+            snapshot = (a, b, x, y, self.executor.timer.deadline)
+        return snapshot
 
     def getX(self):
         """ Function takes actual step positions of steppers and returns horizontal coordinate of the pen centimeters.
 
         :return: Horizontal coordinate of the pen
         """
-        a = self.stepper1.step
-        b = self.stepper2.step
-        a_cm = a / self.steps_per_cm
-        b_cm = b / self.steps_per_cm
-        l = self.l
-        x = (a_cm ** 2 - b_cm ** 2 + l ** 2) / (2 * l)
-        return x
+        return self.getXY()[0]
 
     def getY(self):
         """ Function takes actual step positions of steppers and returns vertical coordinate of the pen in centimeters.
 
         :return: Vertical coordinate of the pen
         """
-        a = self.stepper1.step
-        b = self.stepper2.step
-        a_cm = a / self.steps_per_cm
-        b_cm = b / self.steps_per_cm
-        l = self.l
-        y = sqrt(a_cm ** 2 - (a_cm ** 2 - b_cm ** 2 + l ** 2) ** 2 / (4 * l ** 2))
-        return y
+        return self.getXY()[1]
 
     def stop(self):
-        """ Stop the stepper threads on destruction
+        """ Stop the executor thread on destruction
         """ 
-        logger.info("Clearing queues")
-        with self.stepper1.in_queue.mutex:
-            self.stepper1.in_queue.queue.clear()
-        with self.stepper2.in_queue.mutex:
-            self.stepper2.in_queue.queue.clear()
-        logger.info("Putting Stop to both stepper queues")
-        self.stepper1.in_queue.put('stop')
-        self.stepper2.in_queue.put('stop')
-        while self.stepper1.is_alive() or self.stepper2.is_alive():
-            logger.info("Waiting for stepper threads to finish")
+        logger.info("Clearing queue")
+        with self.executor.in_queue.mutex:
+            self.executor.in_queue.queue.clear()
+        logger.info("Putting Stop to executor queue")
+        self.executor.in_queue.put('stop')
+        while self.executor.is_alive():
+            logger.info("Waiting for executor thread to finish")
             time.sleep(0.1)
+        if self.checkpoint is not None:
+            #Interrupted path is resumed from the actual position of the steppers
+            self.checkpoint.write(self.stepper1.step, self.stepper2.step)
+            self.checkpoint.close()
 
 if __name__ == "__main__":
     #url = 'http://192.168.0.103:5000/json'
     url = 'http://web-droopy.rhcloud.com/json'
-    response = urllib.request.urlopen(url)
-    str_response = response.readall().decode('utf-8')
-    image = json.loads(str_response)
+    parser = argparse.ArgumentParser(description='Plot drawing with analog_data points')
+    parser.add_argument('source', nargs='?', default=url, help='URL, file or - for standard input')
+    parser.add_argument('--optimize', action='store_true',
+            help='Read all strokes first and reorder them to minimize travel of the pen')
+    parser.add_argument('--simulate', metavar='IMAGE',
+            help='Dry run with virtual clock, rendering the pen path to PGM image')
+    parser.add_argument('--config', help='Configuration file, defaults to config.json beside this module')
+    parser.add_argument('--format', choices=('json', 'svg', 'gcode', 'binary'),
+            help='Format of drawing, defaults to the extension of source or json')
+    parser.add_argument('--origin', type=float, nargs=2, default=(11.0, 30.0), metavar=('X', 'Y'),
+            help='Position of origin of SVG or G-code drawing in centimeters')
+    parser.add_argument('--start', type=float, nargs=2, default=(11.0, 30.0), metavar=('X', 'Y'),
+            help='Initial position of the pen in centimeters')
+    parser.add_argument('--resume', action='store_true',
+            help='Continue interrupted drawing from checkpoint_file set in config, the pen is where it stopped')
+    args = parser.parse_args()
+    if args.resume and args.optimize:
+        parser.error('--resume cannot be used with --optimize, order of strokes depends on the start position')
+    config = load_config(args.config)
+    setup_logger(config)
+    drawing_format = args.format
+    if drawing_format is None:
+        extension = os.path.splitext(args.source)[1].lower()
+        drawing_format = {'.svg': 'svg', '.gcode': 'gcode', '.nc': 'gcode', '.ngc': 'gcode',
+                '.drp': 'binary'}.get(extension, 'json')
+    if drawing_format == 'json':
+        iter_points, iter_strokes = ingest.iter_points, ingest.iter_strokes
+    elif drawing_format == 'binary':
+        #Binary drawing is memory mapped, so it must be a local file
+        iter_points, iter_strokes = drawing.iter_points, drawing.iter_strokes
+    else:
+        #Curves are flattened to tolerance in steps
+        options = {'origin': args.origin, 'tolerance': config['plotter'].get('curve_tolerance', 1),
+                'steps_per_cm': config['plotter']['steps_per_cm']}
+        readers = {'svg': (vector.iter_svg_points, vector.iter_svg_strokes),
+                'gcode': (vector.iter_gcode_points, vector.iter_gcode_strokes)}
+        iter_points, iter_strokes = (functools.partial(reader, **options) for reader in readers[drawing_format])
+    stream = ingest.open_source(args.source)
     try:
-        plotter = Plotter(x=11.0, y=30.0, l=54.0, debug=False)
-        for x,y in image["analog_data"]:
-            plotter.gotoXY(x, y)
+        plotter = Plotter(x=args.start[0], y=args.start[1], l=54.0, debug=False, simulate=bool(args.simulate),
+                config=config)
+        start = 0
+        if args.resume:
+            checkpoint_file = config['plotter'].get('checkpoint_file')
+            if not checkpoint_file:
+                parser.error('--resume requires checkpoint_file in config')
+            #Simulated plotter has no checkpoint, it only reads the file
+            resumed = checkpoint.Checkpoint(os.path.expanduser(checkpoint_file), plotter.l, plotter.steps_per_cm)
+            record = resumed.load()
+            if record is None:
+                logger.warning("No checkpoint in %s, drawing starts from the beginning", resumed.path)
+            else:
+                start, a, b = record
+                plotter.restore(a, b)
+                logger.info("Resuming after %s points at %s,%s", start, a, b)
+        if args.optimize:
+            plotter.plot_strokes(list(iter_strokes(stream)))
+        elif plotter.cache is not None:
+            #Whole drawing is read first, its points are the key of compiled program
+            plotter.plot_cached(list(iter_points(stream)), start)
+        else:
+            #Points are plotted while the rest of drawing is still downloading
+            plotter.plot_path(iter_points(stream), start)
         #for y in range(36)[::5]:
         #    for x in range(33):
         #        plotter.gotoXY(11 + x, 30 + y)
-        plotter.gotoXY(11, 75)
-        plotter.gotoXY(11, 30)
+        plotter.gotoXY(11, 75, travel=True)
+        plotter.gotoXY(11, 30, travel=True)
     except KeyboardInterrupt:
         logger.info("CTRL+C: Quitting")
     finally:
         plotter.stop()
+        stream.close()
+    if args.simulate:
+        logger.info("Simulated job takes %.1f s", plotter.trace.duration)
+        plotter.trace.render(args.simulate, plotter.l, plotter.steps_per_cm)
     logger.info("Done")
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+from math import cos, sin, radians, hypot
+import argparse
+import itertools
+import json
+import re
+import sys
+import logging
+
+logger = logging.getLogger(__name__)
+
+"""NumPy is required for conversion of rasters"""
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+_PGM_TOKEN = re.compile(rb'(?:\s|#[^\n]*\n)*(\S+)')
+
+#Edges of marching squares cell crossed by contour for each case.
+#Case has bits 8 top left, 4 top right, 2 bottom right and 1 bottom left corner darker than level,
+#edges are 0 top, 1 right, 2 bottom and 3 left. Saddles are split to two corners.
+_CASES = ((), ((3, 2),), ((2, 1),), ((3, 1),), ((0, 1),), ((3, 2), (0, 1)), ((0, 2),), ((3, 0),),
+        ((3, 0),), ((0, 2),), ((3, 0), (2, 1)), ((0, 1),), ((3, 1),), ((2, 1),), ((3, 2),), ())
+
+
+def _require_numpy():
+    if numpy is None:
+        raise ImportError('Conversion of rasters requires NumPy')
+
+
+def read_pgm(path):
+    """Function reads grayscale PGM image, binary P5 or plain P2
+
+    :param path: Path of the image file
+    :return: (height, width) array of brightness from 0.0 for black to 1.0 for white
+    """
+    _require_numpy()
+    with open(path, 'rb') as image_file:
+        data = image_file.read()
+    tokens = []
+    position = 0
+    while len(tokens) < 4:
+        match = _PGM_TOKEN.match(data, position)
+        if match is None:
+            raise ValueError('Invalid PGM header in {}'.format(path))
+        tokens.append(match.group(1))
+        position = match.end()
+    magic = tokens[0]
+    width, height, maxval = (int(token) for token in tokens[1:])
+    if magic == b'P5':
+        #Single whitespace separates header from pixels
+        dtype = numpy.dtype('>u2') if maxval > 255 else numpy.uint8
+        pixels = numpy.frombuffer(data, dtype, width * height, position + 1)
+    elif magic == b'P2':
+        pixels = numpy.array(data[position:].split()[:width * height], dtype=numpy.int64)
+    else:
+        raise ValueError('Unsupported image format {}'.format(magic))
+    if pixels.size != width * height:
+        raise ValueError('Truncated PGM image {}'.format(path))
+    return pixels.reshape(height, width).astype(numpy.float32) / maxval
+
+
+def downsample(image, factor):
+    """Function averages blocks of factor x factor pixels, remaining rows and columns are cropped
+
+    :param image: (height, width) array
+    :param factor: Size of block, 1 returns the image unchanged
+    :return: Smaller image
+    """
+    if factor <= 1:
+        return image
+    height = image.shape[0] // factor
+    width = image.shape[1] // factor
+    blocks = image[:height * factor, :width * factor].reshape(height, factor, width, factor)
+    return blocks.mean(axis=(1, 3))
+
+
+def _edge_points(image, ids, level):
+    """Points where the level crosses edges between pixels
+
+    :param image: (height, width) array
+    :param ids: Array of edge numbers, horizontal edges are numbered before vertical edges
+    :param level: Brightness of contour
+    :return: (N, 2) array of XY coordinates in pixels
+    """
+    height, width = image.shape
+    horizontal = ids < height * width
+    local = numpy.where(horizontal, ids, ids - height * width)
+    rows = local // width
+    cols = local % width
+    start = image[rows, cols]
+    end = numpy.where(horizontal,
+            image[rows, numpy.minimum(cols + 1, width - 1)],
+            image[numpy.minimum(rows + 1, height - 1), cols])
+    difference = end - start
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        t = numpy.where(difference != 0, (level - start) / difference, 0.5)
+    t = numpy.clip(t, 0.0, 1.0)
+    points = numpy.empty((len(ids), 2))
+    points[:, 0] = cols + numpy.where(horizontal, t, 0.0)
+    points[:, 1] = rows + numpy.where(horizontal, 0.0, t)
+    return points
+
+
+def contours(image, level=0.5, min_points=3):
+    """Generator of contours of areas darker than level traced by marching squares.
+    Cases of all cells and crossings of all edges are computed at once, only joining of segments is a loop.
+
+    :param image: (height, width) array of brightness from 0.0 to 1.0
+    :param level: Brightness of contour
+    :param min_points: Shorter contours are dropped
+    :return: Generator of (N, 2) arrays of XY coordinates in pixels
+    """
+    _require_numpy()
+    height, width = image.shape
+    dark = (image < level).astype(numpy.uint8)
+    cases = (dark[:-1, :-1] << 3) | (dark[:-1, 1:] << 2) | (dark[1:, 1:] << 1) | dark[1:, :-1]
+    rows, cols = numpy.nonzero((cases != 0) & (cases != 15))
+    cases = cases[rows, cols]
+    table = numpy.full((16, 2, 2), -1, dtype=numpy.int64)
+    for case, segments in enumerate(_CASES):
+        for index, edges in enumerate(segments):
+            table[case, index] = edges
+    top = rows * width + cols
+    vertical = height * width
+    #Number of each edge of the cells: top, right, bottom, left
+    edge_ids = numpy.stack((top, vertical + top + 1, top + width, vertical + top), axis=1)
+    starts = []
+    ends = []
+    for index in range(2):
+        edges = table[cases, index]
+        used = edges[:, 0] >= 0
+        cells = numpy.nonzero(used)[0]
+        starts.append(edge_ids[cells, edges[used, 0]])
+        ends.append(edge_ids[cells, edges[used, 1]])
+    ids = numpy.concatenate(starts + ends)
+    count = len(ids) // 2
+    if not count:
+        return
+    points = _edge_points(image, ids, level)
+    #Endpoints sharing an edge are partners, edge is shared by at most two segments
+    order = numpy.argsort(ids, kind='stable')
+    shared = numpy.nonzero(ids[order[1:]] == ids[order[:-1]])[0]
+    partners = numpy.full(len(ids), -1, dtype=numpy.int64)
+    partners[order[shared]] = order[shared + 1]
+    partners[order[shared + 1]] = order[shared]
+    partners = partners.tolist()
+    visited = bytearray(count)
+
+    def walk(endpoint):
+        chain = []
+        while True:
+            following = partners[endpoint]
+            if following < 0 or visited[following % count]:
+                return chain
+            visited[following % count] = 1
+            endpoint = following + count if following < count else following - count
+            chain.append(endpoint)
+
+    for segment in range(count):
+        if visited[segment]:
+            continue
+        visited[segment] = 1
+        forward = walk(segment + count)
+        backward = walk(segment)
+        chain = backward[::-1] + [segment, segment + count] + forward
+        if partners[chain[-1]] == chain[0]:
+            #Closed contour
+            chain.append(chain[0])
+        if len(chain) >= min_points:
+            yield points[chain]
+
+
+def hatch(image, levels=(0.75, 0.5, 0.25), angles=(0.0, 90.0, 45.0), spacing=4.0):
+    """Generator of hatching lines, darker areas are covered by more directions of lines.
+    Lines of one direction are sampled at once and runs of dark samples are found by differences.
+    Every other line is reversed, so the pen travels back and forth.
+
+    :param image: (height, width) array of brightness from 0.0 to 1.0
+    :param levels: Areas darker than each level are hatched in one direction
+    :param angles: Direction of lines for each level in degrees
+    :param spacing: Distance of lines in pixels
+    :return: Generator of (2, 2) arrays with XY coordinates of line ends in pixels
+    """
+    _require_numpy()
+    height, width = image.shape
+    center_x = (width - 1) / 2.0
+    center_y = (height - 1) / 2.0
+    radius = hypot(width, height) / 2.0
+    offsets = numpy.arange(-radius, radius, spacing)
+    samples = numpy.arange(-radius, radius, 0.5)
+    for level, angle in zip(levels, angles):
+        dx, dy = cos(radians(angle)), sin(radians(angle))
+        x = center_x - offsets[:, None] * dy + samples[None, :] * dx
+        y = center_y + offsets[:, None] * dx + samples[None, :] * dy
+        cols = numpy.rint(x).astype(numpy.int64)
+        rows = numpy.rint(y).astype(numpy.int64)
+        inside = (cols >= 0) & (cols < width) & (rows >= 0) & (rows < height)
+        dark = numpy.zeros(x.shape, dtype=numpy.int8)
+        dark[inside] = image[rows[inside], cols[inside]] < level
+        change = numpy.diff(numpy.pad(dark, ((0, 0), (1, 1))), axis=1)
+        #Runs of dark samples, starts and ends are found in the same order
+        lines, first = numpy.nonzero(change == 1)
+        last = numpy.nonzero(change == -1)[1] - 1
+        keep = last > first
+        lines, first, last = lines[keep], first[keep], last[keep]
+        odd = lines % 2 == 1
+        order = numpy.lexsort((numpy.where(odd, -first, first), lines))
+        for line, start, end, reverse in zip(lines[order], first[order], last[order], odd[order]):
+            if reverse:
+                start, end = end, start
+            yield numpy.array(((x[line, start], y[line, start]), (x[line, end], y[line, end])))
+
+
+def iter_strokes(image, l, width=None, top=30.0, resolution=10.0, contour_levels=(0.5,),
+        hatch_levels=(0.75, 0.5, 0.25), spacing=0.3):
+    """Generator of strokes of raster image, contours first and hatching after them.
+    Image is placed in the middle of the plotter and downsampled to the resolution first.
+
+    :param image: (height, width) array of brightness from 0.0 to 1.0 or path to PGM image
+    :param l: Width of plotter in centimeters
+    :param width: Width of the drawing in centimeters, defaults to half of the plotter width
+    :param top: Y coordinate of top edge of the drawing in centimeters
+    :param resolution: Pixels per centimeter the image is downsampled to
+    :param contour_levels: Brightness of traced contours
+    :param hatch_levels: Areas darker than each level are hatched in one direction
+    :param spacing: Distance of hatching lines in centimeters
+    :return: Generator of strokes, each of them is list of (x, y) tuples in centimeters
+    """
+    _require_numpy()
+    if isinstance(image, str):
+        image = read_pgm(image)
+    if width is None:
+        width = l / 2.0
+    image = downsample(image, int(image.shape[1] / (width * resolution)))
+    scale = width / image.shape[1]
+    origin = numpy.array(((l - width) / 2.0, top))
+    logger.info("Image of %sx%s pixels, %.3f cm per pixel", image.shape[1], image.shape[0], scale)
+    strokes = itertools.chain(
+            itertools.chain.from_iterable(contours(image, level) for level in contour_levels),
+            hatch(image, hatch_levels, spacing=spacing / scale))
+    for points in strokes:
+        yield [tuple(point) for point in (points * scale + origin).tolist()]
+
+
+def iter_points(image, l, **kwargs):
+    """Generator of points of raster image joined to one path, see iter_strokes
+
+    :return: Generator of (x, y) tuples in centimeters
+    """
+    return itertools.chain.from_iterable(iter_strokes(image, l, **kwargs))
+
+
+def write_json(strokes, output, key='analog_data'):
+    """Write strokes as JSON drawing one by one, so it can be piped to plotter.py
+
+    :param strokes: Iterable of strokes
+    :param output: Text file-like object
+    :param key: Name of the array with strokes"""
+    output.write('{{"{}": ['.format(key))
+    for index, stroke in enumerate(strokes):
+        if index:
+            output.write(',\n')
+        output.write(json.dumps([[round(x, 3), round(y, 3)] for x, y in stroke]))
+    output.write(']}\n')
+
+
+if __name__ == "__main__":
+    import plotter
+    parser = argparse.ArgumentParser(description='Convert grayscale PGM image to drawing')
+    parser.add_argument('image', help='PGM image')
+    parser.add_argument('--width', type=float, help='Width of the drawing in centimeters')
+    parser.add_argument('--top', type=float, default=30.0, help='Top edge of the drawing in centimeters')
+    parser.add_argument('--spacing', type=float, default=0.3, help='Distance of hatching lines in centimeters')
+    parser.add_argument('--config', help='Configuration file, defaults to config.json beside plotter module')
+    parser.add_argument('--output', help='JSON file, defaults to standard output')
+    args = parser.parse_args()
+    config = plotter.load_config(args.config)
+    strokes = iter_strokes(args.image, config['plotter']['width'], args.width, args.top, spacing=args.spacing)
+    if args.output:
+        with open(args.output, 'w') as output:
+            write_json(strokes, output)
+    else:
+        write_json(strokes, sys.stdout)
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+import asyncio
+import heapq
+import queue
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Channel:
+    """Executor of one plotter driven by the scheduler"""
+
+    __slots__ = ('plotter', 'executor', 'item', 'ticks', 'delay_ns', 'started_ns', 'busy_ns', 'stopped')
+
+    def __init__(self, plotter):
+        """Setup of idle channel
+
+        :param plotter: plotter.Plotter created with start=False"""
+        self.plotter = plotter
+        self.executor = plotter.executor
+        #Item of executor queue being executed and generator of its ticks
+        self.item = None
+        self.ticks = None
+        #Delay after the last tick, negative for move which did not start yet
+        self.delay_ns = -1
+        self.started_ns = 0
+        self.busy_ns = 0
+        self.stopped = False
+
+
+class Scheduler(threading.Thread):
+    """One thread timing steps of several plotters.
+    Deadlines of next ticks of all moving plotters are kept in a heap, the earliest one is waited for,
+    so the plotters do not compete for the processor with threads of their own executors."""
+
+    #Nanoseconds between checks of queues of idle plotters
+    POLL_NS = 1000000
+
+    def __init__(self):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.channels = []
+        self.running = False
+        self.started_ns = None
+        #Tuples (deadline, index of channel) of moving plotters
+        self._heap = []
+
+    def attach(self, plotter):
+        """Drive the plotter from this scheduler, plotter can be attached when scheduler is running
+
+        :param plotter: plotter.Plotter created with start=False
+        :return: Index of the plotter
+        """
+        if plotter.executor.is_alive():
+            raise ValueError('Executor of the plotter is already running')
+        self.channels.append(Channel(plotter))
+        logger.info("Plotter %s attached", len(self.channels) - 1)
+        return len(self.channels) - 1
+
+    def run(self):
+        """Function is started when thread is started. Ticks of all plotters are done at their deadlines"""
+        self.running = True
+        self.started_ns = time.perf_counter_ns()
+        heap = self._heap
+        channels = self.channels
+        next_poll = 0
+        while self.running:
+            now = time.perf_counter_ns()
+            if now >= next_poll or not heap:
+                self._poll()
+                next_poll = now + self.POLL_NS
+                if not heap:
+                    time.sleep(self.POLL_NS / 1e9)
+                    continue
+            deadline, index = heapq.heappop(heap)
+            channel = channels[index]
+            executor = channel.executor
+            timer = executor.timer
+            if channel.delay_ns >= 0 and not executor.debug:
+                late = timer.wait_until(deadline)
+                if late > channel.delay_ns:
+                    #Falling behind more than one step, the steps are not bursted to catch up
+                    timer.deadline = deadline + late
+            delay = next(channel.ticks, None)
+            if delay is None:
+                self._finish(channel)
+                self._next(channel, index)
+            else:
+                channel.delay_ns = 0 if executor.debug else int(delay * 1e9)
+                timer.deadline += channel.delay_ns
+                heapq.heappush(heap, (timer.deadline, index))
+        logger.info("Scheduler stopped")
+
+    def _poll(self):
+        """Start moves of idle plotters"""
+        for index, channel in enumerate(self.channels):
+            if channel.ticks is None and not channel.stopped:
+                self._next(channel, index)
+
+    def _next(self, channel, index):
+        """Take items from executor queue of the channel until a move is found and schedule its first tick
+
+        :param channel: Idle channel
+        :param index: Index of the channel"""
+        executor = channel.executor
+        while True:
+            try:
+                item = executor.in_queue.get_nowait()
+            except queue.Empty:
+                return
+            ticks = executor.begin(item)
+            if ticks is not None:
+                break
+            executor.end(item)
+            if item == 'stop':
+                channel.stopped = True
+                logger.info("Plotter %s detached", index)
+                return
+        channel.item = item
+        channel.ticks = ticks
+        channel.delay_ns = -1
+        channel.started_ns = time.perf_counter_ns()
+        heapq.heappush(self._heap, (executor.timer.deadline, index))
+
+    def _finish(self, channel):
+        """Finish move of the channel after its last tick"""
+        channel.busy_ns += time.perf_counter_ns() - channel.started_ns
+        channel.executor.end(channel.item)
+        channel.item = None
+        channel.ticks = None
+
+    def utilisation(self):
+        """Fraction of time each plotter was moving since the scheduler started
+
+        :return: List of numbers from 0 to 1, one for each plotter
+        """
+        if self.started_ns is None:
+            return [0.0] * len(self.channels)
+        elapsed = time.perf_counter_ns() - self.started_ns
+        return [min(channel.busy_ns / elapsed, 1.0) if elapsed else 0.0 for channel in self.channels]
+
+    def stop(self):
+        """Stop the scheduler thread, moves being executed are left unfinished"""
+        self.running = False
+        self.join()
+
+
+class Job:
+    """Drawing waiting for or being plotted by one of the plotters"""
+
+    def __init__(self, points, name=None):
+        """Setup of queued job
+
+        :param points: Iterable of (x, y) tuples in centimeters, it can be a generator
+        :param name: Name of the job for reports"""
+        self.points = points
+        self.name = name
+        self.state = 'queued'
+        #Index of the plotter, number of points plotted so far
+        self.plotter = None
+        self.plotted = 0
+        self.finished = asyncio.get_running_loop().create_future()
+
+
+class JobQueue:
+    """Queue of drawings assigned to idle plotters of the scheduler, used from asyncio event loop"""
+
+    def __init__(self, scheduler, max_jobs=0):
+        """Setup of the queue
+
+        :param scheduler: Scheduler driving the plotters
+        :param max_jobs: Maximal number of queued jobs, submit waits when the queue is full, 0 for unbounded queue"""
+        self.scheduler = scheduler
+        self.jobs = asyncio.Queue(max_jobs)
+        self.completed = [0] * len(scheduler.channels)
+        self.current = [None] * len(scheduler.channels)
+
+    async def submit(self, points, name=None):
+        """Add drawing to the queue
+
+        :param points: Iterable of (x, y) tuples in centimeters, it can be a generator
+        :param name: Name of the job for reports
+        :return: Job, await job.finished to wait till it is plotted
+        """
+        job = Job(points, name)
+        await self.jobs.put(job)
+        logger.info("Job %s queued", name)
+        return job
+
+    async def run(self):
+        """Coroutine plotting queued jobs on all plotters until it is cancelled"""
+        await asyncio.gather(*[self._worker(index) for index in range(len(self.scheduler.channels))])
+
+    async def _worker(self, index):
+        """Plot jobs on one plotter, next job is taken when the plotter is idle
+
+        :param index: Index of the plotter"""
+        plotter = self.scheduler.channels[index].plotter
+        while True:
+            job = await self.jobs.get()
+            job.plotter = index
+            job.state = 'plotting'
+            self.current[index] = job
+            logger.info("Job %s plotted by plotter %s", job.name, index)
+            try:
+                async for plotted in plotter.plot(job.points):
+                    job.plotted = plotted
+                job.state = 'done'
+                self.completed[index] += 1
+                job.finished.set_result(job.plotted)
+            except asyncio.CancelledError:
+                job.state = 'cancelled'
+                job.finished.cancel()
+                raise
+            except Exception as error:
+                logger.exception("Job %s failed", job.name)
+                job.state = 'failed'
+                job.finished.set_exception(error)
+            finally:
+                self.current[index] = None
+                self.jobs.task_done()
+
+    def report(self):
+        """State of all plotters
+
+        :return: List of dictionaries with current job, number of completed jobs and utilisation of each plotter
+        """
+        return [{
+            'job': job.name if job is not None else None,
+            'plotted': job.plotted if job is not None else 0,
+            'completed': completed,
+            'utilisation': utilisation,
+        } for job, completed, utilisation in zip(self.current, self.completed, self.scheduler.utilisation())]
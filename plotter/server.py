@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+import plotter
+import ingest
+import argparse
+import http.server
+import itertools
+import json
+import os
+import queue
+import re
+import socketserver
+import tempfile
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+#Moves between reports of progress of the executor
+PROGRESS_MOVES = 16
+
+
+class Spool:
+    """Temporary file written by request handler and read by plotting thread at the same time.
+    Uploaded drawing is kept on disk, so waiting jobs do not hold their points in memory."""
+
+    def __init__(self):
+        self._file = tempfile.TemporaryFile()
+        self._condition = threading.Condition()
+        self.written = 0
+        self.read_bytes = 0
+        self.closed = False
+
+    def write(self, data):
+        """Append data, readers waiting for data are woken up
+
+        :param data: Bytes of the drawing"""
+        with self._condition:
+            if self.closed:
+                return
+            self._file.seek(self.written)
+            self._file.write(data)
+            self.written += len(data)
+            self._condition.notify_all()
+
+    def close(self):
+        """Mark end of the data, reads return empty bytes after all data was read"""
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+
+    def read(self, size=-1):
+        """Read data, wait until it is written
+
+        :param size: Maximal number of bytes, -1 for all written bytes
+        :return: Bytes, empty at the end of data"""
+        with self._condition:
+            while self.read_bytes >= self.written and not self.closed:
+                self._condition.wait()
+            available = self.written - self.read_bytes
+            if size >= 0:
+                available = min(size, available)
+            self._file.flush()
+            self._file.seek(self.read_bytes)
+            data = self._file.read(available)
+            self.read_bytes += len(data)
+            return data
+
+    def discard(self):
+        """Close and delete the file"""
+        self.close()
+        self._file.close()
+
+
+class Job:
+    """Drawing submitted to the server"""
+
+    def __init__(self, job_id, size):
+        """Setup of queued job
+
+        :param job_id: Number of the job
+        :param size: Size of the uploaded drawing in bytes"""
+        self.id = job_id
+        self.size = size
+        self.spool = Spool()
+        self.state = 'queued'
+        self.cancelled = False
+        self.started = None
+        self.finished = None
+        self.points = 0
+        #Reason of failure of the job
+        self.error = None
+        #Steps of moves planned so far and steps done by the executor
+        self.steps_planned = 0
+        self.steps_done = 0
+
+    def _done(self, done, steps):
+        """Executor callback reporting steps done"""
+        if done:
+            self.steps_done = steps
+
+    @property
+    def percent(self):
+        """Percentage of steps done. Until the whole drawing is planned, the total number of steps
+        is estimated from the planned steps and the part of the drawing read so far"""
+        if self.state == 'done':
+            return 100.0
+        if not self.steps_planned:
+            return 0.0
+        total = self.steps_planned
+        if self.state == 'plotting' and self.spool.read_bytes < self.size:
+            total = self.steps_planned * self.size / max(self.spool.read_bytes, 1)
+        return min(100.0 * self.steps_done / total, 100.0)
+
+    def status(self):
+        """Dictionary describing the job, e.g. for JSON response"""
+        eta = None
+        percent = self.percent
+        if self.state == 'plotting' and percent > 0:
+            elapsed = time.time() - self.started
+            eta = elapsed * (100.0 - percent) / percent
+        return {
+            'id': self.id,
+            'state': self.state,
+            'points': self.points,
+            'percent': percent,
+            'eta_s': eta,
+            'error': self.error,
+        }
+
+
+class JobServer:
+    """Queue of jobs plotted one after another by one plotter.
+    Jobs are accepted while less than max_jobs are waiting, points of plotted job are planned as they arrive.
+    Only the last max_history finished jobs are kept for reports."""
+
+    def __init__(self, drawing_plotter, max_jobs=8, max_job_bytes=64 * 1024 * 1024, max_history=None):
+        """Setup of the server
+
+        :param drawing_plotter: plotter.Plotter plotting the jobs
+        :param max_jobs: Maximal number of waiting jobs
+        :param max_job_bytes: Maximal size of uploaded drawing
+        :param max_history: Maximal number of finished jobs kept, defaults to max_jobs"""
+        self.plotter = drawing_plotter
+        self.max_job_bytes = max_job_bytes
+        self.max_history = max_jobs if max_history is None else max_history
+        self.jobs = {}
+        self.current = None
+        self._waiting = queue.Queue(max_jobs)
+        self._ids = itertools.count(1)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, size):
+        """Create job for drawing of given size, its data are written to job.spool
+
+        :param size: Size of the drawing in bytes
+        :return: Job
+        :raise queue.Full: Too many jobs are waiting
+        :raise ValueError: Drawing is too big
+        """
+        if size > self.max_job_bytes:
+            raise ValueError('Drawing has {} bytes, maximum is {}'.format(size, self.max_job_bytes))
+        job = Job(next(self._ids), size)
+        try:
+            self._waiting.put_nowait(job)
+        except queue.Full:
+            job.spool.discard()
+            raise
+        self.jobs[job.id] = job
+        logger.info("Job %s with %s bytes queued", job.id, size)
+        return job
+
+    def cancel(self, job):
+        """Cancel waiting job or stop the steppers when the job is plotted
+
+        :param job: Job to cancel"""
+        if job.state not in ('queued', 'plotting'):
+            return
+        job.cancelled = True
+        job.spool.close()
+        if job is self.current:
+            #Steppers are stopped at once, the plotting thread drops the rest of the job
+            self.plotter.executor.cancel()
+        logger.info("Job %s cancelled", job.id)
+
+    def _run(self):
+        """Plotting thread, jobs are taken from the queue one by one"""
+        while True:
+            job = self._waiting.get()
+            if job is None:
+                break
+            if job.cancelled:
+                job.state = 'cancelled'
+            else:
+                self.current = job
+                self._plot(job)
+                self.current = None
+            job.spool.discard()
+            job.finished = time.time()
+            self._prune()
+
+    def _prune(self):
+        """Forget the oldest finished jobs beyond max_history"""
+        finished = [job_id for job_id, job in list(self.jobs.items()) if job.finished is not None]
+        for job_id in finished[:max(len(finished) - self.max_history, 0)]:
+            self.jobs.pop(job_id, None)
+
+    def _plot(self, job):
+        """Plot job while its drawing is being uploaded
+
+        :param job: Job to plot"""
+        job.state = 'plotting'
+        job.started = time.time()
+        executor = self.plotter.executor
+        try:
+            for count, move in enumerate(self.plotter.compile_path(ingest.iter_points(job.spool)), 1):
+                if job.cancelled:
+                    break
+                executor.in_queue.put(move)
+                job.steps_planned += move.steps
+                job.points = self.plotter.points_planned
+                if count % PROGRESS_MOVES == 0:
+                    executor.in_queue.put(lambda done, steps=job.steps_planned: job._done(done, steps))
+            job.points = self.plotter.points_planned
+        except Exception as error:
+            #Any error of the drawing fails only its job, the plotting thread continues with the next one
+            if not job.cancelled:
+                logger.exception("Job %s failed", job.id)
+                job.state = 'failed'
+                job.error = str(error) or type(error).__name__
+                #Points before the error are plotted and the steppers stop at the last of them
+                for move in self.plotter.planner.flush():
+                    executor.in_queue.put(move)
+                    job.steps_planned += move.steps
+        executor.in_queue.put(lambda done, steps=job.steps_planned: job._done(done, steps))
+        if not job.cancelled:
+            executor.in_queue.join()
+        if job.cancelled:
+            #Drops the rest of the job and restarts planning where the steppers stopped
+            self.plotter.cancel()
+            job.state = 'cancelled'
+        elif job.state != 'failed':
+            job.state = 'done'
+        logger.info("Job %s %s", job.id, job.state)
+
+    def close(self):
+        """Cancel all jobs and stop the plotting thread"""
+        for job in list(self.jobs.values()):
+            self.cancel(job)
+        self._waiting.put(None)
+        self._thread.join()
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    """HTTP interface of JobServer
+
+    POST /jobs with JSON drawing queues new job, GET /jobs and GET /jobs/<id> report progress,
+    DELETE /jobs/<id> cancels the job, GET /position returns the last position of the pen
+    and GET /metrics returns metrics of the executor."""
+
+    JOB_PATH = re.compile(r'^/jobs/(\d+)$')
+    CHUNK_SIZE = 65536
+
+    def address_string(self):
+        #Clients of Unix socket have no address
+        return self.client_address[0] if self.client_address else 'unix'
+
+    def _send(self, code, body, content_type='application/json'):
+        if content_type == 'application/json':
+            body = json.dumps(body)
+        data = body.encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _job(self):
+        match = self.JOB_PATH.match(self.path)
+        job = self.server.jobs.jobs.get(int(match.group(1))) if match else None
+        if job is None:
+            self._send(404, {'error': 'Job not found'})
+        return job
+
+    def do_GET(self):
+        jobs = self.server.jobs
+        if self.path == '/jobs':
+            self._send(200, [job.status() for job in list(jobs.jobs.values())])
+        elif self.path == '/position':
+            a, b, x, y, timestamp = jobs.plotter.position()
+            self._send(200, {'a': a, 'b': b, 'x': x, 'y': y, 'timestamp_ns': timestamp})
+        elif self.path == '/metrics':
+            drawing_metrics = jobs.plotter.metrics
+            self._send(200, drawing_metrics.text() if drawing_metrics is not None else '', 'text/plain')
+        else:
+            job = self._job()
+            if job is not None:
+                self._send(200, job.status())
+
+    def do_POST(self):
+        if self.path != '/jobs':
+            self._send(404, {'error': 'Unknown path'})
+            return
+        size = int(self.headers.get('Content-Length', 0))
+        try:
+            job = self.server.jobs.submit(size)
+        except queue.Full:
+            self.close_connection = True
+            self._send(503, {'error': 'Too many jobs are waiting'})
+            return
+        except ValueError as error:
+            self.close_connection = True
+            self._send(413, {'error': str(error)})
+            return
+        #The job can be plotted while the rest of the drawing is still uploading
+        remaining = size
+        while remaining > 0:
+            data = self.rfile.read(min(remaining, self.CHUNK_SIZE))
+            if not data:
+                break
+            job.spool.write(data)
+            remaining -= len(data)
+        job.spool.close()
+        self._send(202, job.status())
+
+    def do_DELETE(self):
+        job = self._job()
+        if job is not None:
+            self.server.jobs.cancel(job)
+            self._send(200, job.status())
+
+    def log_message(self, format, *args):
+        logger.info("%s %s", self.address_string(), format % args)
+
+
+class HTTPServer(http.server.ThreadingHTTPServer):
+    """HTTP server of jobs on TCP port"""
+
+    def __init__(self, address, jobs):
+        self.jobs = jobs
+        http.server.ThreadingHTTPServer.__init__(self, address, Handler)
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """HTTP server of jobs on Unix socket"""
+
+    daemon_threads = True
+
+    def __init__(self, path, jobs):
+        self.jobs = jobs
+        if os.path.exists(path):
+            os.unlink(path)
+        socketserver.UnixStreamServer.__init__(self, path, Handler)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Server plotting drawings submitted over HTTP')
+    parser.add_argument('--host', default='127.0.0.1', help='Address of HTTP server')
+    parser.add_argument('--port', type=int, default=8080, help='Port of HTTP server, 0 disables it')
+    parser.add_argument('--socket', help='Path of Unix socket with the same HTTP interface')
+    parser.add_argument('--config', help='Configuration file, defaults to config.json beside plotter module')
+    parser.add_argument('--simulate', action='store_true', help='Dry run with virtual clock')
+    parser.add_argument('--start', type=float, nargs=2, default=(11.0, 30.0), metavar=('X', 'Y'),
+            help='Initial position of the pen in centimeters')
+    args = parser.parse_args()
+    if not args.port and not args.socket:
+        parser.error('--port 0 requires --socket, the server has no other interface')
+    config = plotter.load_config(args.config)
+    plotter.setup_logger(config)
+    settings = config['plotter']
+    drawing_plotter = plotter.Plotter(x=args.start[0], y=args.start[1], simulate=args.simulate, config=config)
+    jobs = JobServer(drawing_plotter, settings.get('server_max_jobs', 8),
+            settings.get('server_max_job_mb', 64) * 1024 * 1024)
+    servers = []
+    if args.port:
+        servers.append(HTTPServer((args.host, args.port), jobs))
+    if args.socket:
+        servers.append(UnixHTTPServer(args.socket, jobs))
+    for server in servers[1:]:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        logger.info("Serving jobs")
+        servers[0].serve_forever()
+    except KeyboardInterrupt:
+        logger.info("CTRL+C: Quitting")
+    finally:
+        jobs.close()
+        drawing_plotter.stop()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+from math import hypot
+import itertools
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _distance(point, start, end):
+    """Distance of point from line segment between start and end"""
+    dx = end[0] - start[0]
+    dy = end[1] - start[1]
+    length2 = dx * dx + dy * dy
+    if length2 == 0:
+        return hypot(point[0] - start[0], point[1] - start[1])
+    t = ((point[0] - start[0]) * dx + (point[1] - start[1]) * dy) / length2
+    t = min(max(t, 0.0), 1.0)
+    return hypot(point[0] - start[0] - t * dx, point[1] - start[1] - t * dy)
+
+
+def simplify(points, tolerance):
+    """Function drops points deviating from simplified path less than tolerance.
+    Ramer-Douglas-Peucker algorithm with explicit stack, so there is no recursion limit.
+
+    :param points: List of (x, y) tuples
+    :param tolerance: Maximal deviation of dropped points in the same units as coordinates
+    :return: List of kept points, first and last point are always kept
+    """
+    count = len(points)
+    if count < 3:
+        return list(points)
+    keep = bytearray(count)
+    keep[0] = keep[-1] = 1
+    stack = [(0, count - 1)]
+    while stack:
+        first, last = stack.pop()
+        start = points[first]
+        end = points[last]
+        farthest = first
+        max_distance = tolerance
+        for index in range(first + 1, last):
+            distance = _distance(points[index], start, end)
+            if distance > max_distance:
+                farthest = index
+                max_distance = distance
+        if farthest != first:
+            keep[farthest] = 1
+            stack.append((farthest, last))
+            stack.append((first, farthest))
+    return [point for point, kept in zip(points, keep) if kept]
+
+
+class Simplifier:
+    """Streaming path simplification with tolerance in steps.
+    Path is simplified in windows of points, so memory does not grow with path length."""
+
+    def __init__(self, tolerance, steps_per_cm, window=4096):
+        """Setup of simplifier
+
+        :param tolerance: Maximal deviation of dropped points in steps
+        :param steps_per_cm: Number of steps per centimeter of string
+        :param window: Number of points simplified at once"""
+        if window < 3:
+            raise ValueError('Window must be at least 3 points')
+        self.tolerance = tolerance
+        self.steps_per_cm = steps_per_cm
+        self.window = window
+        self.input_count = 0
+        self.output_count = 0
+
+    @property
+    def ratio(self):
+        """Number of points after simplification divided by number of input points"""
+        if not self.input_count:
+            return 1.0
+        return self.output_count / self.input_count
+
+    def simplify(self, points):
+        """Generator of simplified path
+
+        :param points: Iterable of (x, y) tuples in centimeters, it can be a generator
+        :return: Generator of kept (x, y) tuples
+        """
+        tolerance = self.tolerance / self.steps_per_cm
+        points = iter(points)
+        #Last kept point of window is the first point of next window
+        window = list(itertools.islice(points, self.window))
+        self.input_count += len(window)
+        while window:
+            chunk = list(itertools.islice(points, self.window - 1))
+            self.input_count += len(chunk)
+            kept = simplify(window + chunk[:1], tolerance) if chunk else simplify(window, tolerance)
+            if chunk:
+                #The first point of chunk is end of simplified window and start of next one
+                self.output_count += len(kept) - 1
+                for point in kept[:-1]:
+                    yield point
+                window = chunk
+            else:
+                self.output_count += len(kept)
+                for point in kept:
+                    yield point
+                window = []
+        logger.info("Simplified %s points to %s, ratio %.3f",
+                self.input_count, self.output_count, self.ratio)
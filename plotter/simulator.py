@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+from array import array
+import kinematics
+import timing
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class VirtualTimer(timing.Timer):
+    """Timer advancing virtual clock instead of sleeping, steps are never late"""
+
+    def __init__(self):
+        timing.Timer.__init__(self, spin_us=0)
+        self.now_ns = 0
+        self.deadline = 0
+
+    def start(self):
+        """Set the deadline of next step to current virtual time"""
+        self.deadline = self.now_ns
+
+    def wait(self, delay):
+        """Advance virtual clock to the deadline of next step
+
+        :param delay: Delay between previous and next step in seconds"""
+        self.deadline += int(delay * 1e9)
+        self.wait_until(self.deadline)
+
+    def wait_until(self, deadline):
+        """Advance virtual clock to the deadline
+
+        :param deadline: Virtual time in nanoseconds
+        :return: Lateness, always 0"""
+        self.now_ns = max(self.now_ns, deadline)
+        self.histogram.add(0)
+        return 0
+
+
+class Trace:
+    """Compact array backed trace of step events of both steppers.
+    Each event is timestamp in nanoseconds, motor 0 or 1 and phase index the motor was set to."""
+
+    def __init__(self, a=0, b=0):
+        """Setup of empty trace
+
+        :param a: Initial step position of first stepper
+        :param b: Initial step position of second stepper"""
+        self.a = a
+        self.b = b
+        self.timestamps = array('q')
+        self.motors = array('B')
+        self.phases = array('B')
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def record(self, timestamp, motor, phase):
+        """Append step event
+
+        :param timestamp: Time of the step in nanoseconds
+        :param motor: 0 for first stepper, 1 for second stepper
+        :param phase: Index of phase the stepper was set to"""
+        self.timestamps.append(timestamp)
+        self.motors.append(motor)
+        self.phases.append(phase)
+
+    @property
+    def duration(self):
+        """Time between first and last step in seconds"""
+        if not self.timestamps:
+            return 0.0
+        return (self.timestamps[-1] - self.timestamps[0]) / 1e9
+
+    def positions(self):
+        """Generator of step positions reconstructed from phases.
+        Direction of each step is given by difference to the previous phase of the motor.
+
+        :return: Generator of (timestamp, a, b) tuples, one for each event
+        """
+        position = [self.a, self.b]
+        phase = [self.a % 8, self.b % 8]
+        for timestamp, motor, new_phase in zip(self.timestamps, self.motors, self.phases):
+            position[motor] += (new_phase - phase[motor] + 4) % 8 - 4
+            phase[motor] = new_phase
+            yield (timestamp, position[0], position[1])
+
+    def path(self, l, steps_per_cm):
+        """Reconstructed positions of the pen
+
+        :param l: Width of plotter in centimeters
+        :param steps_per_cm: Number of steps per centimeter of string
+        :return: (N, 2) array or list of XY coordinates in centimeters
+        """
+        return kinematics.steps_to_xy([(a, b) for timestamp, a, b in self.positions()], l, steps_per_cm)
+
+    def render(self, filename, l, steps_per_cm, height=None, scale=10):
+        """Render reconstructed pen path to grayscale PGM image
+
+        :param filename: Path of the image file
+        :param l: Width of plotter in centimeters
+        :param steps_per_cm: Number of steps per centimeter of string
+        :param height: Height of the image in centimeters, defaults to the lowest point of the path
+        :param scale: Number of pixels per centimeter
+        """
+        points = self.path(l, steps_per_cm)
+        if height is None:
+            height = max([y for x, y in points] or [0.0]) + 1.0
+        width_px = int(l * scale) + 1
+        height_px = int(height * scale) + 1
+        image = bytearray(b'\xff' * (width_px * height_px))
+        for x, y in points:
+            column = int(x * scale)
+            row = int(y * scale)
+            if 0 <= column < width_px and 0 <= row < height_px:
+                image[row * width_px + column] = 0
+        with open(filename, 'wb') as output:
+            output.write('P5\n{} {}\n255\n'.format(width_px, height_px).encode('ascii'))
+            output.write(image)
+        logger.info("Rendered %s steps to %s", len(self), filename)
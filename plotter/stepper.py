@@ -1,12 +1,10 @@
 #!/usr/bin/env python3
-import time
 import threading
 import queue
-import datetime
 import logging
+import timing
 
 logger = logging.getLogger(__name__)
-logging.basicConfig(level=logging.INFO)
 
 
 """Optional load of GPIO"""
@@ -21,6 +19,58 @@ except ImportError as e:
             #GPIO = False
 
 
+class MotorState:
+    """Position of stepper in integer steps with fixed point fraction of step.
+    Fraction is accumulated in units of 1/ONE step, so divided stepping needs no float arithmetic."""
+
+    __slots__ = ('position', 'fraction', 'divider_fp')
+
+    ONE = 1 << 16
+    #Larger dividers practically stop the stepper
+    MAX_DIVIDER = 1 << 32
+
+    def __init__(self, position=0):
+        self.position = position
+        self.fraction = 0
+        self.divider_fp = self.ONE
+
+    def set_divider(self, value):
+        """Set number of calls of forward or backward needed for one step"""
+        self.divider_fp = int(round(min(value, self.MAX_DIVIDER) * self.ONE))
+        #Fraction must stay smaller than one step
+        if abs(self.fraction) >= self.divider_fp:
+            self.fraction = 0
+
+    def forward(self):
+        """Move by fraction of step forward
+
+        :return: Index of phase of the stepper"""
+        fraction = self.fraction + self.ONE
+        if fraction >= self.divider_fp:
+            self.position += 1
+            fraction -= self.divider_fp
+        self.fraction = fraction
+        return self.position & 7
+
+    def backward(self):
+        """Move by fraction of step backward
+
+        :return: Index of phase of the stepper"""
+        fraction = self.fraction - self.ONE
+        if fraction <= -self.divider_fp:
+            self.position -= 1
+            fraction += self.divider_fp
+        self.fraction = fraction
+        return self.position & 7
+
+    def compare(self, destination):
+        """Compare position with destination in integer arithmetic
+
+        :param destination: Integer position in steps
+        :return: Negative, zero or positive number like position - destination"""
+        return (self.position - destination) * self.divider_fp + self.fraction
+
+
 class Stepper(threading.Thread):
     """Class for set up of GPIO pins for use of stepper motor"""
 
@@ -33,11 +83,6 @@ class Stepper(threading.Thread):
             (0, 1, 0, 0),
             (1, 1, 0, 0),
             (1, 0, 0, 0))
-    pins = []
-    _step_delay = 0.0
-    step = 0
-    connected = False
-    _step_outputs = (1, 0, 0, 0)
 
     def get_divider(self):
         return self._divider
@@ -47,17 +92,35 @@ class Stepper(threading.Thread):
             raise ValueError('Divider must be at least 1.0')
         else:
             self._divider = value
+            self.state.set_divider(value)
 
     #Divider property setter and getter
     divider = property(get_divider, set_divider)
 
-    def connect(self):
-        """Set GPIO pins as outputs"""
+    def get_step(self):
+        state = self.state
+        if state.fraction:
+            return state.position + state.fraction / state.divider_fp
+        return state.position
+
+    def set_step(self, value):
+        state = self.state
+        state.position = int(value)
+        state.fraction = int(round((value - state.position) * state.divider_fp))
+
+    #Step property setter and getter, position is kept in integer state
+    step = property(get_step, set_step)
+
+    def connect(self, start=True):
+        """Set GPIO pins as outputs
+
+        :param start: Start the stepper thread. Steppers driven by executor.Executor are connected without it"""
         if not self.debug:
             for pin in self.pins:
                 GPIO.setup(pin, GPIO.OUT)
         self.connected = True
-        self.start()
+        if start:
+            self.start()
 
     def run(self):
         """Function is tarted when thread is started. Getting position
@@ -80,15 +143,20 @@ class Stepper(threading.Thread):
         threading.Thread.__init__(self)
         self.daemon = True
         self.in_queue = queue.Queue()
+        self.state = MotorState()
+        self.connected = False
+        self._step_outputs = (1, 0, 0, 0)
         self.debug = debug
         if self.debug:
             self.pins = False
         else:
             GPIO.setmode(GPIO.BOARD)
-            self.pins = pins
+            #Pins are written at once with one multi-channel GPIO.output call
+            self.pins = tuple(pins)
         logger.debug('GPIO pins: %s', self.pins)
         self._step_delay = step_delay
         self._divider = 1.0
+        self.timer = timing.Timer()
 
     def __del__(self):
         """Clean GPIO settings on exit"""
@@ -102,42 +170,36 @@ class Stepper(threading.Thread):
             self._step_outputs = self.STEPS[step]
             #for testing purposes
             if self.pins:
-                for index, pin in enumerate(self.pins):
-                    GPIO.output(pin, self._step_outputs[index])
-            logger.debug('Pins: %s\tvalues: %s', self.pins, self._step_outputs)
+                GPIO.output(self.pins, self._step_outputs)
         else:
             logger.info("Not connected to GPIO pins")
 
     def step_forward(self):
         """Increment step and set it to GPIO"""
-        self.step += 1.0 / self.divider
-        logger.debug('Step: +%s = %s', 1.0 / self.divider, self.step)
-        self._set_step(int(self.step) % 8)
+        self._set_step(self.state.forward())
 
     def step_backward(self):
         """Decrement step and set it to GPIO"""
-        self.step -= 1.0 / self.divider
-        logger.debug('Step: -%s = %s', 1.0 / self.divider, self.step)
-        self._set_step(int(self.step) % 8)
+        self._set_step(self.state.backward())
 
     def step_to(self, destination):
         """Rotate stepper till self.step is equal to destination
 
         :param destination: Absolute value of steps when to end rotation"""
         logger.info("Stepping from %s to %s with divider %s", self.step, destination, self.divider)
-        while int(self.step) != int(destination):
-            step_start = datetime.datetime.now()
-            if self.step > destination:
+        destination = int(destination)
+        state = self.state
+        self.timer.start()
+        #Fraction is never exactly 0 with non-integer divider, stepping ends at the integer position
+        while state.position != destination:
+            if state.position > destination:
                 self.step_backward()
             else:
                 self.step_forward()
-            step_stop = datetime.datetime.now()
-            step_delta = step_stop - step_start
             if not self.debug:
-                time.sleep(self._step_delay - step_delta.microseconds // 1000000)
-        #Reset decimal error caused by division
-        self.step = int(self.step)
-
+                self.timer.wait(self._step_delay)
+        #Reset fraction of step caused by division
+        state.fraction = 0
 
 if __name__ == "__main__":
     stepper_pins1 = (15, 16, 18, 22)
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+from array import array
+import kinematics
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Telemetry:
+    """Ring buffer of position snapshots written by the executor and read by any number of threads.
+    Each slot has a sequence number, it is odd while the slot is written, so readers detect
+    snapshots changed under them and retry instead of taking a lock the executor would wait for."""
+
+    def __init__(self, l, steps_per_cm, rate=50, size=1024):
+        """Setup of empty buffer
+
+        :param l: Width of plotter in centimeters
+        :param steps_per_cm: Number of steps per centimeter of string
+        :param rate: Maximal number of snapshots per second published while moving, 0 for every step
+        :param size: Number of kept snapshots"""
+        self.l = l
+        self.steps_per_cm = steps_per_cm
+        self.interval_ns = int(1e9 / rate) if rate > 0 else 0
+        self.size = size
+        #Time of next snapshot published while moving
+        self.next_ns = 0
+        #Number of published snapshots, sequence number of the next one
+        self.count = 0
+        self._sequences = array('q', [-1] * size)
+        self._timestamps = array('q', [0] * size)
+        self._a = array('q', [0] * size)
+        self._b = array('q', [0] * size)
+        self._x = array('d', [0.0] * size)
+        self._y = array('d', [0.0] * size)
+
+    def publish(self, a, b, timestamp):
+        """Write snapshot, called only from one thread
+
+        :param a: Step position of first stepper
+        :param b: Step position of second stepper
+        :param timestamp: Time of the position in nanoseconds"""
+        x, y = kinematics.forward(a, b, self.l, self.steps_per_cm)
+        sequence = self.count
+        slot = sequence % self.size
+        self._sequences[slot] = 2 * sequence + 1
+        self._timestamps[slot] = timestamp
+        self._a[slot] = a
+        self._b[slot] = b
+        self._x[slot] = x
+        self._y[slot] = y
+        self._sequences[slot] = 2 * sequence
+        self.count = sequence + 1
+        self.next_ns = timestamp + self.interval_ns
+
+    def _read(self, sequence):
+        """Snapshot with sequence number or None when it was overwritten"""
+        slot = sequence % self.size
+        if self._sequences[slot] != 2 * sequence:
+            return None
+        snapshot = (self._a[slot], self._b[slot], self._x[slot], self._y[slot], self._timestamps[slot])
+        if self._sequences[slot] != 2 * sequence:
+            return None
+        return snapshot
+
+    def latest(self):
+        """The last published snapshot
+
+        :return: Tuple (a, b, x, y, timestamp) or None when nothing was published
+        """
+        while True:
+            sequence = self.count - 1
+            if sequence < 0:
+                return None
+            snapshot = self._read(sequence)
+            if snapshot is not None:
+                return snapshot
+
+    def since(self, sequence):
+        """Snapshots published since sequence number, snapshots already overwritten are skipped
+
+        :param sequence: Sequence number of the first requested snapshot, e.g. returned by previous call
+        :return: Tuple with list of (a, b, x, y, timestamp) tuples and sequence number of the next snapshot
+        """
+        end = self.count
+        snapshots = []
+        for current in range(max(sequence, end - self.size), end):
+            snapshot = self._read(current)
+            if snapshot is not None:
+                snapshots.append(snapshot)
+        return snapshots, end
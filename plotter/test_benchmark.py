@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+import benchmark
+import unittest
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def test_run(self):
+        results = benchmark.run(points=200, steps=500, pipeline_points=50, stroke_count=100)
+        self.assertEqual(results['kinematics']['points'], 200)
+        self.assertEqual(results['executor']['steps'], 500)
+        self.assertTrue(results['executor']['steps_per_s'] > 0)
+        self.assertTrue(results['pipeline']['peak_memory_kb'] > 0)
+        self.assertEqual(results['optimizer']['strokes'], 100)
+        ratios = benchmark.compare(results, results)
+        self.assertIn('executor.steps_per_s', ratios)
+        self.assertTrue(all(ratio == 1.0 for ratio in ratios.values()))
+
+    def test_spiral(self):
+        points = list(benchmark.spiral(100, center=(10.0, 20.0), radius=5.0))
+        self.assertEqual(len(points), 100)
+        self.assertEqual(points[0], (10.0, 20.0))
+        self.assertTrue(all(abs(x - 10.0) <= 5.0 and abs(y - 20.0) <= 5.0 for x, y in points))
+
+    def test_strokes(self):
+        clustered = benchmark.strokes(100, clusters=2)
+        self.assertEqual(len(clustered), 100)
+        self.assertEqual(clustered, benchmark.strokes(100, clusters=2))
+        self.assertNotEqual(clustered, benchmark.strokes(100))
+
+if __name__ == '__main__':
+    unittest.main()
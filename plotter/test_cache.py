@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+import cache
+import planner
+import plotter
+import os
+import shutil
+import tempfile
+import unittest
+
+
+class TestProgramCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.cache = cache.ProgramCache(self.directory, max_bytes=10000)
+        motion_planner = planner.Planner(0, 0, lookahead=4)
+        self.moves = []
+        for i in range(1, 20):
+            self.moves += motion_planner.add(i * 100, i * 30, point=i)
+        self.moves += motion_planner.flush()
+
+    def test_key(self):
+        points = [(1.0, 2.0), (3.0, 4.0)]
+        key = cache.drawing_key(points, {'width': 52})
+        self.assertEqual(key, cache.drawing_key(list(points), {'width': 52}))
+        self.assertNotEqual(key, cache.drawing_key(points, {'width': 54}))
+        self.assertNotEqual(key, cache.drawing_key(points[::-1], {'width': 52}))
+
+    def test_put_get(self):
+        self.assertIsNone(self.cache.get('key'))
+        stored = list(self.cache.put('key', iter(self.moves), (3.0, 4.0), 4000.0))
+        self.assertEqual(stored, self.moves)
+        program = self.cache.get('key')
+        self.assertEqual(len(program), len(self.moves))
+        self.assertEqual(program.end, (3.0, 4.0))
+        for move, loaded in zip(self.moves, program):
+            self.assertEqual((move.a, move.b, move.d_a, move.d_b, move.mode, move.point),
+                    (loaded.a, loaded.b, loaded.d_a, loaded.d_b, loaded.mode, loaded.point))
+            self.assertEqual(list(move.delays()), list(loaded.delays()))
+        program.close()
+
+    def test_interrupted_put(self):
+        moves = self.cache.put('key', iter(self.moves), (3.0, 4.0), 4000.0)
+        next(moves)
+        moves.close()
+        self.assertIsNone(self.cache.get('key'))
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_eviction(self):
+        #Each program has about 1.3 kB, only 7 of them fit into the cache
+        for i in range(12):
+            list(self.cache.put('key{}'.format(i), iter(self.moves), (0.0, 0.0), 4000.0))
+            os.utime(os.path.join(self.directory, 'key{}.program'.format(i)), (i, i))
+            if i == 5:
+                #Recently used program is kept
+                self.cache.get('key0').close()
+        names = sorted(os.listdir(self.directory))
+        self.assertIn('key0.program', names)
+        self.assertNotIn('key1.program', names)
+        self.assertTrue(sum(os.path.getsize(os.path.join(self.directory, name)) for name in names) <= 10000)
+
+
+class TestPlotterCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.plotter = plotter.Plotter(x=10.0, y=10.0, debug=True)
+        self.plotter.cache = cache.ProgramCache(self.directory)
+        self.addCleanup(self.plotter.stop)
+        self.drawing = [(10.0 + i % 7, 10.0 + i % 5) for i in range(50)]
+
+    def test_hit(self):
+        self.assertEqual(self.plotter.plot_cached(self.drawing), 50)
+        position = (self.plotter.stepper1.step, self.plotter.stepper2.step)
+        self.assertEqual(len(os.listdir(self.directory)), 1)
+        self.plotter.gotoXY(10.0, 10.0)
+        steps = self.plotter.metrics.steps
+        self.assertEqual(self.plotter.plot_cached(self.drawing), 50)
+        self.assertEqual((self.plotter.stepper1.step, self.plotter.stepper2.step), position)
+        self.assertEqual(self.plotter.planner.a, position[0])
+        self.assertEqual(self.plotter._xy, self.drawing[-1])
+        self.assertTrue(self.plotter.metrics.steps > steps)
+        self.assertEqual(len(os.listdir(self.directory)), 1)
+
+    def test_checkpoint(self):
+        path = os.path.join(self.directory, 'checkpoint')
+        config = plotter.load_config()
+        config = {
+            'plotter': dict(config['plotter'], cache_dir=os.path.join(self.directory, 'cache'),
+                    checkpoint_file=path, checkpoint_interval_s=0),
+            'stepper1': config['stepper1'],
+            'stepper2': config['stepper2'],
+        }
+        checkpointed = plotter.Plotter(x=10.0, y=10.0, debug=True, config=config)
+        self.addCleanup(checkpointed.stop)
+        self.assertEqual(checkpointed.plot_cached(self.drawing), 50)
+        checkpointed.gotoXY(10.0, 10.0)
+        program = checkpointed.cache.get(os.listdir(checkpointed.cache.directory)[0][:-len('.program')])
+        self.assertEqual(max(move.point for move in program if move.point is not None), 50)
+        program.close()
+        #Replayed program reports progress and finishes the checkpoint
+        self.assertEqual(checkpointed.plot_cached(self.drawing), 50)
+        self.assertFalse(os.path.exists(path))
+        #Resumed drawing has own program
+        self.assertEqual(checkpointed.plot_cached(self.drawing, 20), 30)
+        self.assertEqual(len(os.listdir(checkpointed.cache.directory)), 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+import checkpoint
+import plotter
+import os
+import shutil
+import tempfile
+import unittest
+
+
+class TestCheckpoint(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, 'checkpoint')
+        self.checkpoint = checkpoint.Checkpoint(self.path, 52.0, 450, interval=3600)
+        self.addCleanup(self.checkpoint.close)
+
+    def test_records(self):
+        self.assertIsNone(self.checkpoint.load())
+        self.checkpoint.start(0, 100, -200)
+        self.assertEqual(self.checkpoint.load(), (0, 100, -200))
+        #Updates within interval are kept in memory
+        self.checkpoint.update(10, 150, -250)
+        self.assertEqual(self.checkpoint.load(), (0, 100, -200))
+        self.checkpoint.write(160, -260)
+        self.assertEqual(self.checkpoint.load(), (10, 160, -260))
+        self.checkpoint.start(10, 160, -260)
+        self.checkpoint.interval = 0
+        self.checkpoint.update(20, 170, -270)
+        #Record is appended by the writer thread
+        self.checkpoint.close()
+        self.assertEqual(self.checkpoint.load(), (20, 170, -270))
+        self.assertEqual(os.path.getsize(self.path), checkpoint.HEADER.size + 2 * checkpoint.RECORD.size)
+        self.checkpoint.finish()
+        self.assertFalse(os.path.exists(self.path))
+        self.assertIsNone(self.checkpoint.load())
+
+    def test_torn_record(self):
+        self.checkpoint.start(0, 1, 2)
+        self.checkpoint.update(5, 3, 4)
+        self.checkpoint.write(3, 4)
+        self.checkpoint.close()
+        with open(self.path, 'ab') as checkpoint_file:
+            checkpoint_file.write(b'\x01\x02\x03')
+        self.assertEqual(self.checkpoint.load(), (5, 3, 4))
+        #Damaged last record falls back to the previous one
+        with open(self.path, 'r+b') as checkpoint_file:
+            checkpoint_file.seek(checkpoint.HEADER.size + checkpoint.RECORD.size)
+            checkpoint_file.write(b'\xff')
+        self.assertEqual(self.checkpoint.load(), (0, 1, 2))
+
+    def test_geometry(self):
+        self.checkpoint.start(0, 1, 2)
+        with self.assertRaises(ValueError):
+            checkpoint.Checkpoint(self.path, 54.0, 450).load()
+
+
+class TestResume(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, 'checkpoint')
+        config = plotter.load_config()
+        self.config = {
+            'plotter': dict(config['plotter'], checkpoint_file=self.path, checkpoint_interval_s=0),
+            'stepper1': config['stepper1'],
+            'stepper2': config['stepper2'],
+        }
+        self.path_points = [(10 + i, 10 + i % 2 * 3) for i in range(10)]
+
+    def test_resume(self):
+        interrupted = plotter.Plotter(x=11.0, y=30.0, debug=True, config=self.config)
+        interrupted.checkpoint.start(0, interrupted.stepper1.step, interrupted.stepper2.step)
+        for move in interrupted.compile_path(self.path_points):
+            interrupted.executor.in_queue.put(move)
+            if move.point == 5:
+                break
+        interrupted.executor.in_queue.join()
+        interrupted.stop()
+        index, a, b = interrupted.checkpoint.load()
+        self.assertEqual(index, 5)
+        self.assertEqual((a, b), interrupted.getAB(*self.path_points[4]))
+
+        resumed = plotter.Plotter(x=11.0, y=30.0, debug=True, config=self.config)
+        self.addCleanup(resumed.stop)
+        resumed.restore(a, b)
+        self.assertEqual((resumed.planner.a, resumed.planner.b), (a, b))
+        self.assertEqual(resumed.plot_path(iter(self.path_points), index), 5)
+        self.assertEqual((resumed.stepper1.step, resumed.stepper2.step), resumed.getAB(*self.path_points[-1]))
+        #Finished path has no checkpoint
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_simulate(self):
+        with open(self.path, 'wb') as checkpoint_file:
+            checkpoint_file.write(b'interrupted')
+        simulated = plotter.Plotter(x=11.0, y=30.0, simulate=True, config=self.config)
+        self.addCleanup(simulated.stop)
+        self.assertIsNone(simulated.checkpoint)
+        simulated.plot_path(self.path_points)
+        with open(self.path, 'rb') as checkpoint_file:
+            self.assertEqual(checkpoint_file.read(), b'interrupted')
+
+    def test_repeated_last_point(self):
+        self.config['plotter']['simplify_tolerance'] = 0
+        repeated = plotter.Plotter(x=11.0, y=30.0, debug=True, config=self.config)
+        self.addCleanup(repeated.stop)
+        moves = list(repeated.compile_path([(12, 30), (13, 31), (13, 31)]))
+        #The last point has no move of its own
+        self.assertEqual([move.point for move in moves if move.point is not None][-1], 3)
+        repeated.plot_path([(12, 30), (13, 31), (13, 31)])
+        self.assertFalse(os.path.exists(self.path))
+
+if __name__ == '__main__':
+    unittest.main()
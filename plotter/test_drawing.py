@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+import drawing
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+
+class TestDrawing(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, 'drawing.drp')
+        self.strokes = [[(10.0, 20.0), (10.5, 20.25), (-3.0, 1e3)], [(1.0, 1.0)],
+                [(i * 0.01, 30.0 - i * 0.02) for i in range(200)]]
+
+    def assertStrokes(self, strokes, expected, steps_per_cm):
+        self.assertEqual(len(strokes), len(expected))
+        for stroke, points in zip(strokes, expected):
+            self.assertEqual(len(stroke), len(points))
+            for point, expected_point in zip(stroke, points):
+                self.assertAlmostEqual(point[0], expected_point[0], delta=0.501 / steps_per_cm)
+                self.assertAlmostEqual(point[1], expected_point[1], delta=0.501 / steps_per_cm)
+
+    def test_encode(self):
+        data, count = drawing.encode_stroke(self.strokes[0], 450)
+        self.assertEqual(count, 3)
+        self.assertStrokes([drawing.decode_stroke(data + b'\xff', count, 450)], [self.strokes[0]], 450)
+        #Small deltas take one byte per coordinate
+        data, count = drawing.encode_stroke([(0.0, 0.0), (0.1, -0.1), (0.2, -0.2)], 100)
+        self.assertEqual(data, bytes((0, 0, 20, 19, 20, 19)))
+
+    def test_write_read(self):
+        with open(self.path, 'wb') as output:
+            self.assertEqual(drawing.write(iter(self.strokes + [[]]), output, 52.0, 450), (3, 204))
+        binary = drawing.Drawing(self.path)
+        self.assertEqual((len(binary), binary.points, binary.l, binary.steps_per_cm), (3, 204, 52.0, 450))
+        self.assertStrokes(list(binary), self.strokes, 450)
+        self.assertStrokes([binary.stroke(2)], [self.strokes[2]], 450)
+        with self.assertRaises(IndexError):
+            binary.stroke(3)
+        self.assertEqual(len(list(binary.iter_points())), 204)
+        binary.close()
+        self.assertStrokes(list(drawing.iter_strokes(self.path)), self.strokes, 450)
+
+    def test_convert(self):
+        data = json.dumps({'analog_data': self.strokes}).encode('utf-8')
+        self.assertEqual(drawing.convert(io.BytesIO(data), self.path, 52.0, 100), (3, 204))
+        self.assertStrokes(list(drawing.iter_strokes(self.path)), self.strokes, 100)
+        with open(self.path, 'rb') as binary_file:
+            self.assertEqual(len(list(drawing.iter_points(binary_file))), 204)
+        #Failed conversion keeps the previous drawing
+        with self.assertRaises(ValueError):
+            drawing.convert(io.BytesIO(b'{"analog_data": [[1, 2], [3'), self.path, 52.0, 100)
+        self.assertEqual(len(drawing.Drawing(self.path)), 3)
+        self.assertEqual(os.listdir(self.directory), ['drawing.drp'])
+
+    def test_invalid(self):
+        with open(self.path, 'wb') as output:
+            drawing.write(self.strokes, output, 52.0, 450)
+        with open(self.path, 'r+b') as output:
+            output.truncate(os.path.getsize(self.path) - 1)
+        with self.assertRaises(ValueError):
+            drawing.Drawing(self.path)
+        with open(self.path, 'wb') as output:
+            output.write(b'{"analog_data": []}' * 4)
+        with self.assertRaises(ValueError):
+            drawing.Drawing(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+import executor
+import planner
+import stepper
+import time
+import unittest
+import unittest.mock
+
+
+class TestSchedule(unittest.TestCase):
+
+    def test_totals(self):
+        #Both steppers must do exactly the requested number of steps
+        for d_a, d_b in ((10, 3), (3, 10), (-7, 7), (0, 5), (5, 0), (-13, -4), (0, 0)):
+            steps = list(executor.schedule(d_a, d_b))
+            self.assertEqual(sum(a for a, b in steps), d_a)
+            self.assertEqual(sum(b for a, b in steps), d_b)
+            self.assertEqual(len(steps), max(abs(d_a), abs(d_b)))
+
+    def test_even_interleave(self):
+        #Minor axis steps are spread evenly over the move
+        steps = list(executor.schedule(12, 4))
+        minor = [i for i, (a, b) in enumerate(steps) if b]
+        self.assertEqual([j - i for i, j in zip(minor, minor[1:])], [3, 3, 3])
+
+    def test_uneven_interleave(self):
+        #Gaps between minor axis steps differ at most by one tick
+        steps = list(executor.schedule(1000, -333))
+        minor = [i for i, (a, b) in enumerate(steps) if b]
+        gaps = [j - i for i, j in zip(minor, minor[1:])]
+        self.assertTrue(max(gaps) - min(gaps) <= 1)
+
+
+class TestFullSchedule(unittest.TestCase):
+
+    def test_totals(self):
+        for d_a, d_b in ((10, 3), (3, 10), (-7, 7), (0, 5), (5, 0), (-13, -4), (0, 0), (1, -1)):
+            for a, b in ((0, 0), (1, 0), (0, 1), (3, 5)):
+                for parity in (0, 1):
+                    steps = list(executor.full_schedule(d_a, d_b, a, b, parity))
+                    self.assertEqual(sum(step_a for step_a, step_b in steps), d_a)
+                    self.assertEqual(sum(step_b for step_a, step_b in steps), d_b)
+
+    def test_phase_parity(self):
+        #Only the first step realigns phase and only the last step can be a half step
+        steps = list(executor.full_schedule(20, -9, 3, 4, 0))
+        self.assertEqual(steps[0], (1, 0))
+        a, b = 4, 4
+        for step_a, step_b in steps[1:-1]:
+            a += step_a
+            b += step_b
+            self.assertTrue(step_a in (0, 2) and step_b in (0, -2))
+            self.assertEqual((a % 2, b % 2), (0, 0))
+        self.assertEqual(steps[-1], (1, -1))
+
+
+class TestExecutor(unittest.TestCase):
+
+    def setUp(self):
+        self.stepper1 = stepper.Stepper(False, debug=True)
+        self.stepper2 = stepper.Stepper(False, debug=True)
+        self.stepper1.connect(start=False)
+        self.stepper2.connect(start=False)
+        self.executor = executor.Executor(self.stepper1, self.stepper2, debug=True)
+
+    def test_move_to(self):
+        self.executor.move_to(100, -37)
+        self.assertEqual(self.stepper1.step, 100)
+        self.assertEqual(self.stepper2.step, -37)
+        self.executor.move_to(-5, 200)
+        self.assertEqual(self.stepper1.step, -5)
+        self.assertEqual(self.stepper2.step, 200)
+
+    def test_execute(self):
+        move = planner.Move(300, 100, 300, 100, 1000.0, 4000.0)
+        move.entry = move.exit = 200.0
+        self.executor.execute(move)
+        self.assertEqual((self.stepper1.step, self.stepper2.step), (300, 100))
+
+    def test_full_step_move(self):
+        move = planner.Move(301, -100, 301, -100, 2000.0, 4000.0, planner.FULL_STEP)
+        move.entry = move.exit = 500.0
+        self.executor.execute(move)
+        self.assertEqual((self.stepper1.step, self.stepper2.step), (301, -100))
+        #Full steps take half of the updates of half steps
+        ticks = list(self.executor.ticks(planner.Move(1, 0, -300, 100, 2000.0, 4000.0, planner.DUAL_STEP)))
+        self.assertEqual(len(ticks), 151)
+        self.assertEqual((self.stepper1.step, self.stepper2.step), (1, 0))
+
+    def test_thread(self):
+        self.executor.start()
+        self.executor.in_queue.put(planner.Move(50, 20, 50, 20, 500.0))
+        self.executor.in_queue.put('stop')
+        self.executor.in_queue.join()
+        self.executor.join(1)
+        self.assertFalse(self.executor.is_alive())
+        self.assertEqual((self.stepper1.step, self.stepper2.step), (50, 20))
+
+    def test_cancel(self):
+        #Steps are timed, so the move is still running when it is cancelled
+        self.executor.debug = False
+        self.executor.start()
+        move = planner.Move(2000, 0, 2000, 0, 1000.0, 4000.0)
+        move.entry = move.exit = 500.0
+        self.executor.in_queue.put(move)
+        self.executor.in_queue.put(planner.Move(0, 0, -2000, 0, 1000.0))
+        reports = []
+        self.executor.in_queue.put(reports.append)
+        time.sleep(0.2)
+        self.executor.cancel()
+        self.executor.in_queue.join()
+        self.assertTrue(0 < self.stepper1.step < 2000)
+        self.assertEqual(reports, [False])
+        self.assertFalse(self.executor.cancelling)
+        #Executor accepts new moves after cancel
+        self.executor.in_queue.put(planner.Move(0, 0, -self.stepper1.step, 0, 1000.0))
+        self.executor.in_queue.put(reports.append)
+        self.executor.in_queue.join()
+        self.assertEqual(self.stepper1.step, 0)
+        self.assertEqual(reports, [False, True])
+
+    def test_cancel_after_last_move(self):
+        #Last move ends after cancel started but before its item is queued
+        self.executor.in_queue.put(planner.Move(10, 0, 10, 0, 1000.0))
+        item = self.executor.in_queue.get()
+        for _ in self.executor.begin(item):
+            pass
+        reports = []
+        end = self.executor.cancel_item(reports.append)
+        self.executor.end(item)
+        self.assertTrue(self.executor.cancelling)
+        self.executor.in_queue.put(end)
+        item = self.executor.in_queue.get()
+        self.assertIsNone(self.executor.begin(item))
+        self.executor.end(item)
+        self.assertEqual(reports, [False])
+        self.assertFalse(self.executor.cancelling)
+
+    def test_cancel_cruising(self):
+        #Move in the middle of path, it enters and exits at full speed
+        move = planner.Move(2000, 0, 2000, 0, 1000.0, 4000.0)
+        self.executor.min_velocity = 500.0
+        delays = []
+        for delay in self.executor.ticks(move):
+            delays.append(delay)
+            if len(delays) == 500:
+                self.executor.cancelling = True
+        self.assertAlmostEqual(delays[499], 1 / 1000.0)
+        #Steppers slow down to the speed they can stop from
+        self.assertTrue(len(delays) > 550)
+        self.assertTrue(delays[-1] >= 1 / 500.0 - 1e-12)
+        self.assertEqual(self.stepper1.step, len(delays))
+
+
+class TestExecutorOutputs(unittest.TestCase):
+
+    def setUp(self):
+        self.calls = []
+        patcher = unittest.mock.patch.object(stepper.GPIO, 'output',
+                lambda pins, values: self.calls.append((pins, values)))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.stepper1 = stepper.Stepper((1, 2, 3, 4))
+        self.stepper2 = stepper.Stepper((5, 6, 7, 8))
+        self.stepper1.connect(start=False)
+        self.stepper2.connect(start=False)
+        self.executor = executor.Executor(self.stepper1, self.stepper2, debug=True)
+
+    def test_one_write_per_tick(self):
+        self.executor.move_to(10, 5)
+        self.assertEqual(len(self.calls), 10)
+        #Both steppers stepping on the same tick are written at once
+        combined = [values for pins, values in self.calls if pins == (1, 2, 3, 4, 5, 6, 7, 8)]
+        self.assertEqual(len(combined), 5)
+        self.assertEqual(self.calls[-1][1], self.stepper1.STEPS[10 % 8] + self.stepper2.STEPS[5])
+        self.assertEqual(self.stepper1._step_outputs, self.stepper1.STEPS[10 % 8])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+import ingest
+import io
+import json
+import os
+import tempfile
+import threading
+import http.server
+import unittest
+
+
+class TestIngest(unittest.TestCase):
+
+    def setUp(self):
+        self.points = [(i * 0.5, -i * 1.25e-1) for i in range(1000)]
+        self.data = json.dumps({"name": "test", "analog_data": self.points}).encode('utf-8')
+
+    def test_small_chunks(self):
+        #Numbers are split between chunks
+        for chunk_size in (1, 3, 7, 4096):
+            points = list(ingest.iter_points(io.BytesIO(self.data), chunk_size=chunk_size))
+            self.assertEqual(points, self.points)
+
+    def test_lazy(self):
+        stream = io.BytesIO(self.data)
+        points = ingest.iter_points(stream, chunk_size=64)
+        self.assertEqual(next(points), self.points[0])
+        self.assertTrue(stream.tell() < len(self.data))
+
+    def test_strokes(self):
+        strokes = [[[1, 2], [3, 4]], [[5, 6]], [[7, 8e1], [9, -10]]]
+        data = json.dumps({"analog_data": strokes, "other": [[0, 0]]}).encode('utf-8')
+        self.assertEqual(list(ingest.iter_strokes(io.BytesIO(data), chunk_size=5)),
+                [[(1, 2), (3, 4)], [(5, 6)], [(7, 80), (9, -10)]])
+        self.assertEqual(list(ingest.iter_strokes(io.BytesIO(self.data))), [self.points])
+
+    def test_errors(self):
+        with self.assertRaises(ValueError):
+            list(ingest.iter_points(io.BytesIO(b'{"points": [[1, 2]]}')))
+        with self.assertRaises(ValueError):
+            list(ingest.iter_points(io.BytesIO(b'{"analog_data": [[1, 2], [3')))
+
+    def test_file(self):
+        with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as drawing:
+            drawing.write(self.data)
+        try:
+            with ingest.open_source(drawing.name) as stream:
+                self.assertEqual(list(ingest.iter_points(stream)), self.points)
+        finally:
+            os.unlink(drawing.name)
+
+    def test_http(self):
+        data = self.data
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        server = http.server.HTTPServer(('127.0.0.1', 0), Handler)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        try:
+            url = 'http://127.0.0.1:{}/json'.format(server.server_address[1])
+            with ingest.open_source(url) as stream:
+                self.assertEqual(list(ingest.iter_points(stream, chunk_size=100)), self.points)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+import kinematics
+import unittest
+
+
+class TestKinematics(unittest.TestCase):
+
+    def setUp(self):
+        self.l = 52.0
+        self.steps_per_cm = 450
+        self.points = [(x * 1.7, y * 2.3) for x in range(1, 30) for y in range(1, 20)]
+
+    def test_inverse(self):
+        self.assertEqual(kinematics.inverse(0, 0, self.l, self.steps_per_cm), (0, -23400))
+        self.assertEqual(kinematics.inverse(self.l, 0, self.l, self.steps_per_cm), (23400, 0))
+
+    def test_forward(self):
+        self.assertEqual(kinematics.forward(23400, 0, self.l, self.steps_per_cm), (self.l, 0))
+        for x, y in self.points:
+            a, b = kinematics.inverse(x, y, self.l, self.steps_per_cm)
+            x2, y2 = kinematics.forward(a, b, self.l, self.steps_per_cm)
+            self.assertTrue(abs(x - x2) < 0.05)
+            self.assertTrue(abs(y - y2) < 0.05)
+
+    def test_segment(self):
+        start = (5.0, 10.0)
+        end = (45.0, 10.0)
+        points = kinematics.segment(start, end, self.l, self.steps_per_cm, 1.0)
+        self.assertEqual(points[-1], end)
+        self.assertTrue(len(points) > 1)
+        #Points are ordered along the line
+        self.assertEqual([x for x, y in points], sorted(x for x, y in points))
+        #Lower tolerance needs more points
+        finer = kinematics.segment(start, end, self.l, self.steps_per_cm, 0.1)
+        self.assertTrue(len(finer) > len(points))
+        #Every part deviates less than tolerance in its middle
+        for p0, p1 in zip([start] + points, points):
+            middle = ((p0[0] + p1[0]) / 2, (p0[1] + p1[1]) / 2)
+            a0, b0 = (kinematics.sqrt(p0[0] ** 2 + p0[1] ** 2), kinematics.sqrt((self.l - p0[0]) ** 2 + p0[1] ** 2))
+            a1, b1 = (kinematics.sqrt(p1[0] ** 2 + p1[1] ** 2), kinematics.sqrt((self.l - p1[0]) ** 2 + p1[1] ** 2))
+            a, b = (kinematics.sqrt(middle[0] ** 2 + middle[1] ** 2), kinematics.sqrt((self.l - middle[0]) ** 2 + middle[1] ** 2))
+            error = kinematics.sqrt((a - (a0 + a1) / 2) ** 2 + (b - (b0 + b1) / 2) ** 2) * self.steps_per_cm
+            self.assertTrue(error <= 1.0)
+
+    def test_segment_disabled(self):
+        self.assertEqual(kinematics.segment((5.0, 10.0), (45.0, 10.0), self.l, self.steps_per_cm, 0), [(45.0, 10.0)])
+
+    def test_batch_matches_scalar(self):
+        steps = kinematics.xy_to_steps(self.points, self.l, self.steps_per_cm)
+        self.assertEqual(len(steps), len(self.points))
+        for (x, y), (a, b) in zip(self.points, steps):
+            self.assertEqual((int(a), int(b)), kinematics.inverse(x, y, self.l, self.steps_per_cm))
+        points = kinematics.steps_to_xy(steps, self.l, self.steps_per_cm)
+        for (a, b), (x, y) in zip(steps, points):
+            x2, y2 = kinematics.forward(int(a), int(b), self.l, self.steps_per_cm)
+            self.assertAlmostEqual(x, x2)
+            self.assertAlmostEqual(y, y2)
+
+    @unittest.skipIf(kinematics.numpy is None, "NumPy is not installed")
+    def test_batch_array(self):
+        steps = kinematics.xy_to_steps(kinematics.numpy.array(self.points), self.l, self.steps_per_cm)
+        self.assertEqual(steps.shape, (len(self.points), 2))
+        self.assertEqual(steps.dtype, kinematics.numpy.int64)
+
+if __name__ == '__main__':
+    unittest.main()
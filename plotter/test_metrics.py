@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+import metrics
+import planner
+import timing
+import unittest
+
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.metrics = metrics.Metrics(sample_every=2, samples=3)
+        self.metrics.timer = timing.Timer()
+
+    def test_move_done(self):
+        for i in range(10):
+            self.metrics.move_done(planner.Move(i, 0, 100, 50, 500.0), 0.2, i, 0)
+        values = self.metrics.dump()
+        self.assertEqual(values['steps'], 1000)
+        self.assertEqual(values['moves'], 10)
+        self.assertAlmostEqual(values['busy_s'], 2.0)
+        #Every second move is sampled, only the last samples are kept
+        self.assertEqual([sample[1] for sample in values['samples']], [5, 7, 9])
+
+    def test_late_steps(self):
+        for late_us in (0, 10, 600, 5000):
+            self.metrics.timer.histogram.add(late_us * 1000)
+        self.assertEqual(self.metrics.late_steps(1000), 2)
+        self.assertEqual(self.metrics.dump()['lateness']['count'], 4)
+
+    def test_text(self):
+        self.metrics.move_done(planner.Move(1, 0, 10, 5, 500.0), 0.5, 1, 0)
+        lines = self.metrics.text().splitlines()
+        self.assertIn('droopy_steps 10', lines)
+        self.assertIn('droopy_moves 1', lines)
+        self.assertFalse(any(line.startswith('droopy_samples') for line in lines))
+
+    def test_reset(self):
+        self.metrics.move_done(planner.Move(1, 0, 10, 5, 500.0), 0.5, 1, 0)
+        self.metrics.timer.histogram.add(1000)
+        self.metrics.reset()
+        self.assertEqual(self.metrics.dump()['steps'], 0)
+        self.assertEqual(self.metrics.dump()['lateness']['count'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
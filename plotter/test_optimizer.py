@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+import optimizer
+import random
+import unittest
+
+
+class TestOptimizer(unittest.TestCase):
+
+    def setUp(self):
+        generator = random.Random(42)
+        self.strokes = []
+        for _ in range(300):
+            x = generator.uniform(0, 50)
+            y = generator.uniform(0, 50)
+            self.strokes.append([(x, y), (x + generator.uniform(-2, 2), y + generator.uniform(-2, 2))])
+
+    def test_travel_distance(self):
+        strokes = [[(0, 0), (1, 0)], [(4, 4), (5, 5)]]
+        self.assertEqual(optimizer.travel_distance(strokes), 5.0)
+        self.assertEqual(optimizer.travel_distance(strokes, start=(0, 1)), 6.0)
+
+    def test_index_nearest(self):
+        points = [(x, y, (x, y)) for x in range(10) for y in range(10)]
+        index = optimizer.KDIndex(points)
+        self.assertEqual(index.nearest(4.2, 6.9)[0], (4, 7))
+        index.remove(4, 7, (4, 7))
+        self.assertEqual(len(index), 99)
+        self.assertIn(index.nearest(4.2, 6.9)[0], ((4, 6), (5, 7), (3, 7), (4, 8)))
+        #Query far outside of indexed area
+        self.assertEqual(index.nearest(100.0, 100.0)[0], (9, 9))
+
+    def test_optimize(self):
+        ordered, before, after = optimizer.optimize(self.strokes)
+        self.assertTrue(after < before / 3)
+        self.assertEqual(after, optimizer.travel_distance(ordered, (0.0, 0.0)))
+        #Every stroke is drawn exactly once, possibly reversed
+        normalized = sorted(tuple(sorted(stroke)) for stroke in ordered)
+        self.assertEqual(normalized, sorted(tuple(sorted(stroke)) for stroke in self.strokes))
+
+    def test_two_opt_improves(self):
+        order = optimizer.nearest_neighbour(self.strokes)
+        ordered = [self.strokes[i][::-1] if r else self.strokes[i] for i, r in order]
+        nearest = optimizer.travel_distance(ordered, (0.0, 0.0))
+        optimizer.two_opt(self.strokes, order)
+        ordered = [self.strokes[i][::-1] if r else self.strokes[i] for i, r in order]
+        self.assertTrue(optimizer.travel_distance(ordered, (0.0, 0.0)) < nearest)
+
+    def test_without_reverse(self):
+        ordered, before, after = optimizer.optimize(self.strokes, reverse=False)
+        self.assertTrue(after < before)
+        for stroke in ordered:
+            self.assertIn(stroke, self.strokes)
+
+    def test_collinear(self):
+        #Endpoints on one line have bounding box of zero area
+        strokes = [[(12.0 + i * 3, 40.0), (14.0 + i * 3, 40.0)] for i in range(10)]
+        ordered, before, after = optimizer.optimize(strokes, start=(11.0, 30.0))
+        self.assertEqual(ordered, strokes)
+        self.assertAlmostEqual(after, optimizer.travel_distance(strokes, (11.0, 30.0)))
+        index = optimizer.KDIndex([(x, 40.0, x) for x in range(10)])
+        self.assertEqual(index.nearest(11.0, 30.0)[0], 9)
+
+    def test_clustered(self):
+        #Two distant clusters, each emptied before the pen travels to the other
+        generator = random.Random(7)
+        strokes = []
+        for center in ((5.0, 5.0), (45.0, 45.0)):
+            for _ in range(200):
+                x = generator.gauss(center[0], 0.5)
+                y = generator.gauss(center[1], 0.5)
+                strokes.append([(x, y), (x + 0.1, y)])
+        order = optimizer.nearest_neighbour(strokes)
+        self.assertEqual(sorted(i for i, reversed_ in order), list(range(400)))
+        self.assertTrue(all(i < 200 for i, reversed_ in order[:200]))
+        #Search with removed points matches checking all remaining points
+        points = dict(((i, r), point) for i, stroke in enumerate(strokes) for point, r in ((stroke[0], False),
+                (stroke[-1], True)))
+        index = optimizer.KDIndex((x, y, key) for key, (x, y) in points.items())
+        for _ in range(300):
+            x, y = generator.uniform(0, 50), generator.uniform(0, 50)
+            key, distance = index.nearest(x, y)
+            self.assertAlmostEqual(distance, min(((px - x) ** 2 + (py - y) ** 2) ** 0.5
+                    for px, py in points.values()))
+            index.remove(*points.pop(key), key)
+        self.assertEqual(len(index), 500)
+
+    def test_empty(self):
+        self.assertEqual(optimizer.optimize([]), ([], 0.0, 0.0))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+import planner
+import unittest
+
+
+class TestPlanner(unittest.TestCase):
+
+    def setUp(self):
+        self.planner = planner.Planner(0, 0, max_velocity=1000.0, acceleration=4000.0,
+                min_velocity=200.0, lookahead=4)
+
+    def test_same_position(self):
+        self.assertEqual(self.planner.add(0, 0), [])
+        self.assertEqual(self.planner.flush(), [])
+
+    def test_single_move_profile(self):
+        moves = self.planner.add(1000, 500) + self.planner.flush()
+        self.assertEqual(len(moves), 1)
+        move = moves[0]
+        self.assertEqual((move.entry, move.exit), (200.0, 200.0))
+        delays = list(move.delays())
+        self.assertEqual(len(delays), 1000)
+        #Accelerate, cruise and decelerate
+        self.assertAlmostEqual(delays[0], 1 / 200.0)
+        self.assertAlmostEqual(delays[500], 1 / 1000.0)
+        self.assertAlmostEqual(delays[-1], 1 / 200.0)
+        self.assertTrue(all(x >= y for x, y in zip(delays[:100], delays[1:100])))
+
+    def test_lookahead_release(self):
+        released = []
+        for i in range(1, 11):
+            released += self.planner.add(i * 100, 0)
+        #Only moves exceeding lookahead are released
+        self.assertEqual(len(released), 6)
+        released += self.planner.flush()
+        self.assertEqual([m.a for m in released], [i * 100 for i in range(1, 11)])
+        #Straight path keeps speed through junctions and stops at the end
+        self.assertEqual(released[0].entry, 200.0)
+        self.assertTrue(released[4].entry > 900.0)
+        self.assertEqual(released[-1].exit, 200.0)
+        for previous, move in zip(released, released[1:]):
+            self.assertEqual(previous.exit, move.entry)
+
+    def test_reversal_stops(self):
+        moves = self.planner.add(1000, 0) + self.planner.add(0, 0) + self.planner.flush()
+        self.assertEqual(moves[0].exit, 200.0)
+        self.assertEqual(moves[1].entry, 200.0)
+
+    def test_reachable_speeds(self):
+        #Exit speed is never higher than what the acceleration allows
+        for i in range(1, 30):
+            self.planner.add(i * 7, i * 3)
+        for move in self.planner.flush():
+            self.assertTrue(move.exit ** 2 <= move.entry ** 2 + 2 * 4000.0 * move.steps + 1e-6)
+
+    def test_velocity_range(self):
+        with self.assertRaises(ValueError):
+            planner.Planner(0, 0, max_velocity=100.0, min_velocity=200.0)
+        with self.assertRaises(ValueError):
+            planner.Planner(0, 0, travel_mode='quarter')
+
+    def test_travel_moves(self):
+        travel_planner = planner.Planner(0, 0, max_velocity=1000.0, acceleration=4000.0,
+                min_velocity=200.0, travel_velocity=2000.0)
+        moves = travel_planner.add(5000, 5000, travel=True) + travel_planner.add(10000, 10000)
+        moves += travel_planner.flush()
+        self.assertEqual([move.mode for move in moves], [planner.DUAL_STEP, planner.HALF_STEP])
+        self.assertEqual([move.cruise for move in moves], [2000.0, 1000.0])
+        #Steppers slow down when step mode changes
+        self.assertEqual(moves[0].exit, 200.0)
+
+if __name__ == '__main__':
+    unittest.main()
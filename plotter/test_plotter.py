@@ -1,5 +1,9 @@
 #!/usr/bin/env python3
 import plotter
+import asyncio
+import json
+import os
+import tempfile
 import unittest
 
 
@@ -42,6 +46,57 @@ class TestPlotter(unittest.TestCase):
         self.assertTrue(abs(self.plotter.getX() - x) < self.tolerance)
         self.assertTrue(abs(self.plotter.getY() - y) < self.tolerance)
 
+    def test_plot_path(self):
+        path = [(10, 10), (20, 15), (30, 30), (11, 30)]
+        self.assertEqual(self.plotter.plot_path(iter(path)), len(path))
+        self.assertEqual((self.plotter.stepper1.step, self.plotter.stepper2.step),
+                self.plotter.getAB(11, 30))
+
+    def test_metrics(self):
+        self.plotter.plot_path([(10, 10), (20, 15)])
+        values = self.plotter.metrics.dump()
+        self.assertTrue(values['moves'] >= 2)
+        self.assertTrue(values['steps'] > 0)
+
+    def test_plot_strokes(self):
+        strokes = [[(30, 30), (31, 31)], [(10, 10), (11, 11)], [(20, 22), (20, 20)]]
+        self.assertEqual(self.plotter.plot_strokes(strokes), 6)
+        #The farthest stroke is plotted last
+        self.assertTrue(abs(self.plotter.getX() - 31) < 1)
+        self.assertTrue(abs(self.plotter.getY() - 31) < 1)
+
+    def test_goto(self):
+        asyncio.run(self.plotter.goto(20, 15))
+        self.assertEqual((self.plotter.stepper1.step, self.plotter.stepper2.step),
+                self.plotter.getAB(20, 15))
+
+    def test_plot(self):
+        path = [(10, 10), (20, 15), (30, 30), (11, 30)]
+
+        async def plot():
+            return [plotted async for plotted in self.plotter.plot(iter(path))]
+
+        progress = asyncio.run(plot())
+        self.assertEqual(progress[-1], len(path))
+        self.assertEqual((self.plotter.stepper1.step, self.plotter.stepper2.step),
+                self.plotter.getAB(11, 30))
+
+    def test_goto_cancel(self):
+        #Steps are timed, so the move is still running when it is cancelled
+        self.plotter.executor.debug = False
+        start = self.plotter.getXY()
+
+        async def goto():
+            await asyncio.wait_for(self.plotter.goto(40, 40), 0.2)
+
+        with self.assertRaises(asyncio.TimeoutError):
+            asyncio.run(goto())
+        position = (self.plotter.stepper1.step, self.plotter.stepper2.step)
+        self.assertNotEqual(position, self.plotter.getAB(*start))
+        self.assertNotEqual(position, self.plotter.getAB(40, 40))
+        #Planning continues from the position where the pen stopped
+        self.assertEqual((self.plotter.planner.a, self.plotter.planner.b), position)
+
 #    def test_every_cm_in_lxl(self):
 #        l = int(self.plotter.l)
 #        for x in range(l):
@@ -50,5 +105,42 @@ class TestPlotter(unittest.TestCase):
 #                self.assertTrue(abs(self.plotter.getX() - x) < self.tolerance)
 #                self.assertTrue(abs(self.plotter.getY() - y) < self.tolerance)
 
+
+class TestConfig(unittest.TestCase):
+
+    def setUp(self):
+        self.config = {
+            'plotter': {'logging_level': 30, 'steps_per_cm': 100, 'width': 40},
+            'stepper1': {'pins': [1, 2, 3, 4]},
+            'stepper2': {'pins': [5, 6, 7, 8]},
+        }
+
+    def test_dict(self):
+        dict_plotter = plotter.Plotter(x=10, y=10, debug=True, config=self.config)
+        self.addCleanup(dict_plotter.stop)
+        self.assertEqual((dict_plotter.l, dict_plotter.steps_per_cm), (40, 100))
+        self.assertEqual(dict_plotter.getAB(40, 0), (4000, 0))
+
+    def test_file_cached(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as config_file:
+            json.dump(self.config, config_file)
+        self.addCleanup(os.unlink, config_file.name)
+        config = plotter.load_config(config_file.name)
+        self.assertEqual(config, self.config)
+        self.assertIs(plotter.load_config(config_file.name), config)
+
+    def test_environment(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as config_file:
+            json.dump(self.config, config_file)
+        self.addCleanup(os.unlink, config_file.name)
+        os.environ[plotter.CONFIG_ENV] = config_file.name
+        self.addCleanup(os.environ.pop, plotter.CONFIG_ENV)
+        self.assertEqual(plotter.load_config()['plotter']['width'], 40)
+
+    def test_validation(self):
+        del self.config['plotter']['width']
+        with self.assertRaises(KeyError):
+            plotter.load_config(self.config)
+
 if __name__ == '__main__':
     unittest.main()
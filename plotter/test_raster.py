@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+import raster
+import simulator
+import os
+import tempfile
+import unittest
+
+numpy = raster.numpy
+
+
+@unittest.skipIf(numpy is None, "NumPy is not installed")
+class TestRaster(unittest.TestCase):
+
+    def setUp(self):
+        #White image with dark disk of radius 20 pixels in the middle
+        y, x = numpy.mgrid[0:80, 0:100]
+        self.image = numpy.where((x - 50.0) ** 2 + (y - 40.0) ** 2 < 20.0 ** 2, 0.0, 1.0)
+
+    def write(self, data):
+        with tempfile.NamedTemporaryFile(suffix='.pgm', delete=False) as image_file:
+            image_file.write(data)
+        self.addCleanup(os.unlink, image_file.name)
+        return image_file.name
+
+    def test_read_pgm(self):
+        binary = raster.read_pgm(self.write(b'P5\n# comment\n3 2\n255\n\x00\x80\xff\xff\x80\x00'))
+        plain = raster.read_pgm(self.write(b'P2\n3 2\n4\n0 2 4\n4 2 0\n'))
+        self.assertEqual(binary.shape, (2, 3))
+        self.assertEqual(binary[0, 0], 0.0)
+        self.assertEqual(binary[0, 2], 1.0)
+        self.assertEqual(plain.tolist(), [[0.0, 0.5, 1.0], [1.0, 0.5, 0.0]])
+        with self.assertRaises(ValueError):
+            raster.read_pgm(self.write(b'P5\n3 2\n255\n\x00'))
+
+    def test_read_rendered_trace(self):
+        trace = simulator.Trace(20000, -20000)
+        name = self.write(b'')
+        trace.render(name, 52.0, 450, height=10.0, scale=2)
+        self.assertEqual(raster.read_pgm(name).shape, (21, 105))
+
+    def test_downsample(self):
+        image = numpy.arange(16, dtype=float).reshape(4, 4)
+        self.assertEqual(raster.downsample(image, 2).tolist(), [[2.5, 4.5], [10.5, 12.5]])
+        self.assertIs(raster.downsample(image, 1), image)
+
+    def test_contour_of_disk(self):
+        contours = list(raster.contours(self.image))
+        self.assertEqual(len(contours), 1)
+        contour = contours[0]
+        #Closed contour around the disk
+        self.assertEqual(contour[0].tolist(), contour[-1].tolist())
+        distances = numpy.hypot(contour[:, 0] - 50.0, contour[:, 1] - 40.0)
+        self.assertTrue(numpy.all(abs(distances - 20.0) < 1.5))
+
+    def test_hatch(self):
+        lines = list(raster.hatch(self.image, levels=(0.5,), angles=(0.0,), spacing=4.0))
+        self.assertTrue(8 <= len(lines) <= 12)
+        for line in lines:
+            for x, y in line:
+                self.assertTrue((x - 50.0) ** 2 + (y - 40.0) ** 2 < 21.0 ** 2)
+        #Every other line goes back
+        self.assertTrue(lines[0][0, 0] < lines[0][1, 0])
+        self.assertTrue(lines[1][0, 0] > lines[1][1, 0])
+
+    def test_strokes_in_centimeters(self):
+        strokes = list(raster.iter_strokes(self.image, 52.0, width=20.0, top=30.0, resolution=2.0))
+        points = [point for stroke in strokes for point in stroke]
+        self.assertTrue(all(16.0 <= x <= 36.0 and 30.0 <= y <= 46.0 for x, y in points))
+        self.assertEqual(len(list(raster.iter_points(self.image, 52.0, width=20.0, resolution=2.0))), len(points))
+
+
+class TestWithoutNumpy(unittest.TestCase):
+
+    @unittest.skipIf(numpy is not None, "NumPy is installed")
+    def test_requires_numpy(self):
+        with self.assertRaises(ImportError):
+            raster.read_pgm('image.pgm')
+
+
+if __name__ == '__main__':
+    unittest.main()
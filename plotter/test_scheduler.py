@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+import plotter
+import scheduler
+import asyncio
+import unittest
+
+
+class TestScheduler(unittest.TestCase):
+
+    def setUp(self):
+        #Debug must be true so plotters will not send steps over GPIO
+        self.plotters = [plotter.Plotter(x=10.0, y=10.0, debug=True, start=False) for _ in range(2)]
+        self.scheduler = scheduler.Scheduler()
+        for drawing_plotter in self.plotters:
+            self.scheduler.attach(drawing_plotter)
+        self.scheduler.start()
+
+    def tearDown(self):
+        self.scheduler.stop()
+
+    def position(self, index):
+        drawing_plotter = self.plotters[index]
+        return (drawing_plotter.stepper1.step, drawing_plotter.stepper2.step)
+
+    def test_goto(self):
+        self.plotters[0].gotoXY(20, 15)
+        self.plotters[1].gotoXY(15, 20)
+        self.assertEqual(self.position(0), self.plotters[0].getAB(20, 15))
+        self.assertEqual(self.position(1), self.plotters[1].getAB(15, 20))
+
+    def test_concurrent_timed_moves(self):
+        #Steps are timed, both plotters move at the same time
+        for drawing_plotter in self.plotters:
+            drawing_plotter.executor.debug = False
+
+        async def goto():
+            await asyncio.gather(self.plotters[0].goto(10.5, 10), self.plotters[1].goto(10, 10.5))
+
+        asyncio.run(goto())
+        self.assertEqual(self.position(0), self.plotters[0].getAB(10.5, 10))
+        self.assertEqual(self.position(1), self.plotters[1].getAB(10, 10.5))
+        self.assertTrue(all(0 < utilisation <= 1 for utilisation in self.scheduler.utilisation()))
+        histogram = self.plotters[0].executor.timer.histogram
+        self.assertTrue(histogram.count > 0)
+
+    def test_attach_running(self):
+        running = plotter.Plotter(debug=True)
+        try:
+            with self.assertRaises(ValueError):
+                self.scheduler.attach(running)
+        finally:
+            running.stop()
+
+    def test_stop_plotter(self):
+        self.plotters[0].stop()
+        self.plotters[1].gotoXY(20, 20)
+        self.assertEqual(self.position(1), self.plotters[1].getAB(20, 20))
+        self.assertTrue(self.scheduler.channels[0].stopped)
+
+    def test_jobs(self):
+        drawings = [[(10, 10), (20, 15)], [(15, 15), (11, 30)], [(30, 30), (31, 31), (20, 20)]]
+
+        async def plot():
+            jobs = scheduler.JobQueue(self.scheduler, max_jobs=2)
+            runner = asyncio.ensure_future(jobs.run())
+            submitted = [await jobs.submit(iter(points), name=str(index)) for index, points in enumerate(drawings)]
+            plotted = await asyncio.gather(*[job.finished for job in submitted])
+            runner.cancel()
+            return submitted, plotted, jobs.report()
+
+        submitted, plotted, report = asyncio.run(plot())
+        self.assertEqual(plotted, [len(points) for points in drawings])
+        self.assertEqual([job.state for job in submitted], ['done'] * 3)
+        self.assertEqual(sum(state['completed'] for state in report), 3)
+        self.assertEqual(len(report), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
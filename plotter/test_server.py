@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+import plotter
+import server
+import http.client
+import json
+import threading
+import time
+import unittest
+from unittest import mock
+
+
+class TestSpool(unittest.TestCase):
+
+    def test_read_while_written(self):
+        spool = server.Spool()
+        chunks = [str(i).encode('ascii') * 1000 for i in range(10)]
+
+        def write():
+            for chunk in chunks:
+                spool.write(chunk)
+                time.sleep(0.001)
+            spool.close()
+
+        writer = threading.Thread(target=write)
+        writer.start()
+        data = b''
+        while True:
+            chunk = spool.read(4096)
+            if not chunk:
+                break
+            data += chunk
+        writer.join()
+        spool.discard()
+        self.assertEqual(data, b''.join(chunks))
+
+
+class TestJobServer(unittest.TestCase):
+
+    def setUp(self):
+        #Debug must be true so plotter will not send steps over GPIO
+        self.plotter = plotter.Plotter(x=10.0, y=10.0, debug=True)
+        self.jobs = server.JobServer(self.plotter, max_jobs=1, max_history=2)
+        self.server = server.HTTPServer(('127.0.0.1', 0), self.jobs)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.jobs.close()
+        self.plotter.stop()
+
+    def request(self, method, path, body=None):
+        connection = http.client.HTTPConnection('127.0.0.1', self.server.server_address[1])
+        connection.request(method, path, body)
+        response = connection.getresponse()
+        data = response.read()
+        connection.close()
+        if response.getheader('Content-Type') == 'application/json':
+            data = json.loads(data.decode('utf-8'))
+        return response.status, data
+
+    def wait(self, job_id, states=('done', 'failed', 'cancelled')):
+        for _ in range(500):
+            status, job = self.request('GET', '/jobs/{}'.format(job_id))
+            if job['state'] in states:
+                return job
+            time.sleep(0.01)
+        self.fail('Job {} is {}'.format(job_id, job['state']))
+
+    def test_plot(self):
+        drawing = json.dumps({'analog_data': [[10, 10], [20, 15], [11, 30]]}).encode('utf-8')
+        status, job = self.request('POST', '/jobs', drawing)
+        self.assertEqual(status, 202)
+        job = self.wait(job['id'])
+        self.assertEqual(job['state'], 'done')
+        self.assertEqual(job['percent'], 100.0)
+        self.assertEqual(job['points'], 3)
+        self.assertEqual((self.plotter.stepper1.step, self.plotter.stepper2.step), self.plotter.getAB(11, 30))
+        status, text = self.request('GET', '/metrics')
+        self.assertIn('droopy_moves', text.decode('utf-8'))
+        status, position = self.request('GET', '/position')
+        self.assertEqual((position['a'], position['b']), self.plotter.getAB(11, 30))
+
+    def test_invalid_drawing(self):
+        status, job = self.request('POST', '/jobs', b'{"analog_data": [[20, 20], [21')
+        self.assertEqual(self.wait(job['id'])['state'], 'failed')
+
+    def test_error(self):
+        drawing = json.dumps({'analog_data': [[10, 10], [20, 15], [11, 30]]}).encode('utf-8')
+        with mock.patch.object(self.plotter, '_segment_path', side_effect=RuntimeError('Segment failed')):
+            status, job = self.request('POST', '/jobs', drawing)
+            job = self.wait(job['id'])
+        self.assertEqual((job['state'], job['error']), ('failed', 'Segment failed'))
+        #Plotting thread is still alive
+        status, job = self.request('POST', '/jobs', drawing)
+        self.assertEqual(self.wait(job['id'])['state'], 'done')
+
+    def test_cancel_and_backpressure(self):
+        #Steps are timed, so the first job is still plotted when the others are submitted
+        self.plotter.executor.debug = False
+        drawing = json.dumps({'analog_data': [[40, 40], [10, 10]]}).encode('utf-8')
+        status, first = self.request('POST', '/jobs', drawing)
+        self.wait(first['id'], ('plotting',))
+        status, second = self.request('POST', '/jobs', drawing)
+        self.assertEqual(status, 202)
+        #Only one job can wait
+        status, error = self.request('POST', '/jobs', drawing)
+        self.assertEqual(status, 503)
+        for job in (second, first):
+            status, job = self.request('DELETE', '/jobs/{}'.format(job['id']))
+            self.assertEqual(status, 200)
+        self.assertEqual(self.wait(first['id'])['state'], 'cancelled')
+        self.assertEqual(self.wait(second['id'])['state'], 'cancelled')
+        self.assertNotEqual((self.plotter.stepper1.step, self.plotter.stepper2.step), self.plotter.getAB(40, 40))
+
+    def test_history(self):
+        drawing = json.dumps({'analog_data': [[10, 10], [11, 11]]}).encode('utf-8')
+        for _ in range(3):
+            status, job = self.request('POST', '/jobs', drawing)
+            self.wait(job['id'])
+        #Only max_history finished jobs are kept
+        status, jobs = self.request('GET', '/jobs')
+        self.assertEqual([status['id'] for status in jobs], [job['id'] - 1, job['id']])
+        status, error = self.request('GET', '/jobs/{}'.format(job['id'] - 2))
+        self.assertEqual(status, 404)
+
+    def test_unknown_job(self):
+        status, error = self.request('GET', '/jobs/42')
+        self.assertEqual(status, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+import simplify
+import math
+import unittest
+
+
+class TestSimplify(unittest.TestCase):
+
+    def test_straight_line(self):
+        points = [(x * 0.1, x * 0.2) for x in range(100)]
+        self.assertEqual(simplify.simplify(points, 0.01), [points[0], points[-1]])
+
+    def test_corner_kept(self):
+        points = [(x, 0.0) for x in range(10)] + [(9.0, y) for y in range(1, 10)]
+        self.assertEqual(simplify.simplify(points, 0.1), [(0, 0.0), (9, 0.0), (9.0, 9)])
+
+    def test_short_paths(self):
+        self.assertEqual(simplify.simplify([], 1.0), [])
+        self.assertEqual(simplify.simplify([(1, 1), (2, 2)], 1.0), [(1, 1), (2, 2)])
+
+    def test_long_path_without_recursion_limit(self):
+        #Zig zag deeper than recursion limit keeps all points
+        points = [(x, (x % 2) * 10.0) for x in range(1500)]
+        self.assertEqual(len(simplify.simplify(points, 0.5)), 1500)
+
+    def test_simplifier_tolerance_in_steps(self):
+        points = [(i * 0.01, 10 + math.sin(i * 0.01)) for i in range(2000)]
+        coarse = simplify.Simplifier(10, 450, window=100)
+        fine = simplify.Simplifier(0.5, 450, window=100)
+        coarse_points = list(coarse.simplify(iter(points)))
+        fine_points = list(fine.simplify(iter(points)))
+        self.assertEqual(coarse.input_count, 2000)
+        self.assertEqual(coarse.output_count, len(coarse_points))
+        self.assertTrue(coarse.ratio < fine.ratio < 1.0)
+        self.assertEqual((coarse_points[0], coarse_points[-1]), (points[0], points[-1]))
+        #Kept points are in original order
+        self.assertEqual(fine_points, [p for p in points if p in set(fine_points)])
+
+    def test_simplifier_empty(self):
+        simplifier = simplify.Simplifier(1, 450)
+        self.assertEqual(list(simplifier.simplify([])), [])
+        self.assertEqual(simplifier.ratio, 1.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+import simulator
+import plotter
+import stepper
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+
+class TestSimulator(unittest.TestCase):
+
+    def test_virtual_timer(self):
+        timer = simulator.VirtualTimer()
+        timer.start()
+        for _ in range(1000):
+            timer.wait(0.5)
+        self.assertEqual(timer.now_ns, 500 * 10 ** 9)
+        self.assertEqual(timer.histogram.max_ns, 0)
+
+    def test_positions(self):
+        trace = simulator.Trace(6, -3)
+        for timestamp, phase in enumerate((7, 0, 1, 0)):
+            trace.record(timestamp, 0, phase)
+        trace.record(10, 1, 4)
+        self.assertEqual(len(trace), 5)
+        self.assertEqual([(a, b) for t, a, b in trace.positions()],
+                [(7, -3), (8, -3), (9, -3), (8, -3), (8, -4)])
+        self.assertEqual(trace.duration, 10e-9)
+
+
+class TestSimulatedPlotter(unittest.TestCase):
+
+    def setUp(self):
+        self.plotter = plotter.Plotter(x=10.0, y=10.0, simulate=True)
+
+    def tearDown(self):
+        self.plotter.stop()
+
+    def test_trace(self):
+        self.plotter.plot_path([(20.0, 10.0), (20.0, 20.0), (10.0, 20.0), (10.0, 10.0)])
+        trace = self.plotter.trace
+        timestamp, a, b = list(trace.positions())[-1]
+        self.assertEqual((a, b), (self.plotter.stepper1.step, self.plotter.stepper2.step))
+        #Virtual time is given by speed profile, not by simulation speed
+        self.assertTrue(trace.duration > 10 * self.plotter.steps_per_cm / self.plotter.planner.max_velocity)
+        x, y = trace.path(self.plotter.l, self.plotter.steps_per_cm)[len(trace) // 8]
+        self.assertTrue(abs(y - 10.0) < 0.1)
+
+    def test_no_gpio(self):
+        with mock.patch.object(stepper, 'GPIO') as gpio:
+            simulated = plotter.Plotter(x=10.0, y=10.0, simulate=True)
+            simulated.plot_path([(20.0, 10.0), (20.0, 20.0)])
+            simulated.stop()
+        self.assertIsNone(simulated.executor._pins)
+        self.assertEqual((gpio.setmode.call_count, gpio.setup.call_count, gpio.output.call_count), (0, 0, 0))
+
+    def test_travel(self):
+        self.plotter.gotoXY(30.0, 30.0)
+        drawing = self.plotter.trace.duration
+        self.plotter.gotoXY(10.0, 10.0, travel=True)
+        self.assertEqual((self.plotter.stepper1.step, self.plotter.stepper2.step), self.plotter.getAB(10.0, 10.0))
+        #Travel moves by two positions per step at higher speed
+        self.assertTrue(self.plotter.trace.duration - drawing < drawing * 0.75)
+
+    def test_render(self):
+        self.plotter.gotoXY(20.0, 20.0)
+        with tempfile.NamedTemporaryFile(suffix='.pgm', delete=False) as image:
+            pass
+        try:
+            self.plotter.trace.render(image.name, self.plotter.l, self.plotter.steps_per_cm, scale=2)
+            with open(image.name, 'rb') as image_file:
+                data = image_file.read()
+            header = b'P5\n105 42\n255\n'
+            self.assertTrue(data.startswith(header))
+            self.assertEqual(len(data), len(header) + 105 * 42)
+            self.assertIn(b'\x00', data)
+        finally:
+            os.unlink(image.name)
+
+if __name__ == '__main__':
+    unittest.main()
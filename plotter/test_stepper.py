@@ -95,5 +95,53 @@ class TestStepper(unittest.TestCase):
         self.stepper.step_to(-1.0)
         self.assertEqual(self.stepper.step, -1.0)
 
+    def test_step_to_fractional_divider(self):
+        #Fraction of step left by non-integer divider does not stop stepping at the destination
+        self.stepper.divider = 2.5
+        self.stepper.step_to(1)
+        self.assertEqual(self.stepper.step, 1)
+        self.stepper.step_to(-3)
+        self.assertEqual(self.stepper.step, -3)
+        self.stepper.step_to(0)
+        self.assertEqual(self.stepper.step, 0)
+
+    def test_divided_steps_are_exact(self):
+        #Fixed point fraction does not accumulate rounding error
+        self.stepper.divider = 3
+        for _ in range(3000):
+            self.stepper.step_forward()
+        self.assertEqual(self.stepper.step, 1000)
+        self.assertEqual(self.stepper.state.fraction, 0)
+
+    def test_phase_changes_on_whole_step(self):
+        self.stepper.divider = 2.0
+        self.stepper.step_forward()
+        self.assertEqual(self.stepper._step_outputs, self.stepper.STEPS[0])
+        self.stepper.step_forward()
+        self.assertEqual(self.stepper._step_outputs, self.stepper.STEPS[1])
+
+    def test_step_setter(self):
+        self.stepper.step = -23400
+        self.assertEqual(self.stepper.state.position, -23400)
+        self.assertEqual(self.stepper.step, -23400)
+
+
+class TestMotorState(unittest.TestCase):
+
+    def test_slots(self):
+        state = stepper.MotorState(5)
+        with self.assertRaises(AttributeError):
+            state.speed = 1
+
+    def test_compare(self):
+        state = stepper.MotorState(5)
+        state.set_divider(2.0)
+        self.assertEqual(state.compare(5), 0)
+        state.backward()
+        self.assertTrue(state.compare(5) < 0)
+        self.assertTrue(state.compare(4) > 0)
+        self.assertEqual(state.backward(), 4)
+        self.assertEqual(state.compare(4), 0)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+import kinematics
+import plotter
+import telemetry
+import threading
+import unittest
+
+
+class TestTelemetry(unittest.TestCase):
+
+    def setUp(self):
+        self.telemetry = telemetry.Telemetry(52.0, 450, rate=100, size=8)
+
+    def test_latest(self):
+        self.assertIsNone(self.telemetry.latest())
+        self.telemetry.publish(10000, -20000, 5)
+        a, b, x, y, timestamp = self.telemetry.latest()
+        self.assertEqual((a, b, timestamp), (10000, -20000, 5))
+        self.assertEqual((x, y), kinematics.forward(10000, -20000, 52.0, 450))
+        self.assertEqual(self.telemetry.next_ns, 5 + 10000000)
+
+    def test_since(self):
+        for i in range(5):
+            self.telemetry.publish(i, -i, i)
+        snapshots, sequence = self.telemetry.since(3)
+        self.assertEqual([snapshot[0] for snapshot in snapshots], [3, 4])
+        self.assertEqual(sequence, 5)
+        #Overwritten snapshots are skipped
+        for i in range(5, 20):
+            self.telemetry.publish(i, -i, i)
+        snapshots, sequence = self.telemetry.since(sequence)
+        self.assertEqual([snapshot[0] for snapshot in snapshots], list(range(12, 20)))
+
+    def test_concurrent_reader(self):
+        #Reader never sees snapshot mixed from two writes
+        done = threading.Event()
+
+        def write():
+            for i in range(20000):
+                self.telemetry.publish(1000 + i, -1000 - i, i)
+            done.set()
+
+        writer = threading.Thread(target=write)
+        writer.start()
+        reads = 0
+        while not done.is_set():
+            snapshot = self.telemetry.latest()
+            if snapshot is not None:
+                a, b, x, y, timestamp = snapshot
+                self.assertEqual((a, b), (1000 + timestamp, -1000 - timestamp))
+                reads += 1
+        writer.join()
+        self.assertTrue(reads > 0)
+
+
+class TestPlotterTelemetry(unittest.TestCase):
+
+    def test_position(self):
+        #Debug must be true so plotter will not send steps over GPIO
+        drawing_plotter = plotter.Plotter(x=10.0, y=10.0, debug=True)
+        try:
+            drawing_plotter.gotoXY(20, 15)
+            a, b, x, y, timestamp = drawing_plotter.position()
+            self.assertEqual((a, b), drawing_plotter.getAB(20, 15))
+            self.assertTrue(abs(x - 20) < 0.01 and abs(y - 15) < 0.01)
+        finally:
+            drawing_plotter.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
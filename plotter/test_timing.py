@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+import timing
+import unittest
+
+
+class TestHistogram(unittest.TestCase):
+
+    def setUp(self):
+        self.histogram = timing.Histogram()
+
+    def test_buckets(self):
+        for late_ns in (0, 500, 1500, 3000, 1000000):
+            self.histogram.add(late_ns)
+        self.assertEqual(self.histogram.count, 5)
+        self.assertEqual(self.histogram.counts[0], 2)
+        self.assertEqual(self.histogram.counts[1], 1)
+        self.assertEqual(self.histogram.counts[2], 1)
+        self.assertEqual(self.histogram.max_ns, 1000000)
+        self.assertEqual(self.histogram.percentile(40), 1)
+        self.assertEqual(self.histogram.percentile(100), 1024)
+        self.assertEqual(self.histogram.as_dict()['buckets_us'], {1: 2, 2: 1, 4: 1, 1024: 1})
+
+    def test_reset(self):
+        self.histogram.add(5000)
+        self.histogram.reset()
+        self.assertEqual(self.histogram.count, 0)
+        self.assertEqual(self.histogram.as_dict()['mean_us'], 0.0)
+
+
+class Clock:
+    """Fake clock advancing by one microsecond on each read, sleep advances it at once"""
+
+    def __init__(self):
+        self.now_ns = 0
+        self.slept = []
+
+    def __call__(self):
+        self.now_ns += 1000
+        return self.now_ns
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now_ns += int(seconds * 1e9)
+
+    def work(self, seconds):
+        self.now_ns += int(seconds * 1e9)
+
+
+class TestTimer(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = Clock()
+
+    def test_rate_independent_of_work(self):
+        #Work between steps shorter than the delay does not slow down the rate
+        timer = timing.Timer(spin_us=500, clock=self.clock, sleep=self.clock.sleep)
+        timer.start()
+        start = self.clock.now_ns
+        for _ in range(20):
+            self.clock.work(0.001)
+            timer.wait(0.002)
+        self.assertTrue(40000000 <= self.clock.now_ns - start < 40000000 + 20 * 1000 * 3)
+        self.assertEqual(timer.histogram.count, 20)
+        #Sleep ends before the deadline, the rest is spent in busy loop
+        self.assertEqual(len(self.clock.slept), 20)
+        self.assertTrue(all(seconds < 0.001 for seconds in self.clock.slept))
+
+    def test_no_burst_after_delay(self):
+        timer = timing.Timer(spin_us=0, clock=self.clock, sleep=self.clock.sleep)
+        timer.start()
+        self.clock.work(0.02)
+        timer.wait(0.001)
+        self.assertTrue(timer.histogram.max_ns >= 19000000)
+        #Deadline is moved to now, next step waits the full delay
+        start = self.clock.now_ns
+        timer.wait(0.005)
+        self.assertTrue(self.clock.now_ns - start >= 4000000)
+
+    def test_wait_until(self):
+        timer = timing.Timer(spin_us=100, clock=self.clock, sleep=self.clock.sleep)
+        deadline = self.clock.now_ns + 3000000
+        late = timer.wait_until(deadline)
+        self.assertTrue(self.clock.now_ns >= deadline)
+        self.assertTrue(0 <= late <= 1000)
+        self.assertEqual(timer.histogram.count, 1)
+
+    def test_real_clock(self):
+        #Only structure of the histogram is checked, lateness depends on the machine
+        timer = timing.Timer(spin_us=100)
+        timer.start()
+        for _ in range(5):
+            timer.wait(0.0005)
+        summary = timer.histogram.as_dict()
+        self.assertEqual(summary['count'], 5)
+        self.assertEqual(sum(summary['buckets_us'].values()), 5)
+        self.assertEqual(len(timer.histogram.counts), timing.Histogram.BUCKETS)
+
+if __name__ == '__main__':
+    unittest.main()
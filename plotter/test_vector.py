@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+from math import hypot
+import vector
+import io
+import unittest
+
+
+class TestVector(unittest.TestCase):
+
+    def assertPoint(self, point, expected):
+        self.assertAlmostEqual(point[0], expected[0])
+        self.assertAlmostEqual(point[1], expected[1])
+
+    def test_flatten_cubic(self):
+        #Quarter of circle approximated by Bezier curve
+        k = 0.5522847498
+        for tolerance in (1.0, 0.1, 0.001):
+            points = vector.flatten_cubic((10.0, 0.0), (10.0, 10 * k), (10 * k, 10.0), (0.0, 10.0), tolerance)
+            self.assertEqual(points[-1], (0.0, 10.0))
+            for x, y in points:
+                self.assertAlmostEqual(hypot(x, y), 10.0, delta=0.01)
+            previous = (10.0, 0.0)
+            for point in points:
+                #Chords do not cut the circle deeper than the tolerance
+                middle = ((previous[0] + point[0]) / 2, (previous[1] + point[1]) / 2)
+                self.assertLess(10.0 - hypot(*middle), tolerance + 0.01)
+                previous = point
+        self.assertLess(len(vector.flatten_cubic((10.0, 0.0), (10.0, 10 * k), (10 * k, 10.0), (0.0, 10.0), 1.0)),
+                len(vector.flatten_cubic((10.0, 0.0), (10.0, 10 * k), (10 * k, 10.0), (0.0, 10.0), 0.001)))
+        #Straight curve is one line
+        self.assertEqual(vector.flatten_cubic((0.0, 0.0), (1.0, 1.0), (2.0, 2.0), (3.0, 3.0), 0.1), [(3.0, 3.0)])
+        #Collinear control points beyond the end points make the curve go past its end and back
+        points = vector.flatten_cubic((0.0, 0.0), (10.0, 0.0), (-10.0, 0.0), (1.0, 0.0), 0.01)
+        self.assertEqual(points[-1], (1.0, 0.0))
+        self.assertAlmostEqual(max(x for x, y in points), 2.9, delta=0.05)
+
+    def test_flatten_arc(self):
+        points = vector.flatten_arc((0.0, 0.0), 100.0, 100.0, 0.0, 0.0, 3.141592653589793, 0.5)
+        self.assertPoint(points[-1], (-100.0, 0.0))
+        self.assertTrue(all(y >= 0 for x, y in points))
+        self.assertEqual(len(points), 16)
+
+    def test_svg(self):
+        svg = b'''<?xml version="1.0"?>
+            <svg xmlns="http://www.w3.org/2000/svg" width="100" height="100">
+              <g>
+                <path d="M10,10 L20,10 h5v5 Z m5 5 c0 10 10 10 10 0 s10 -10 10 0 q5 5 10 0 t10 0 a5 5 0 1020 0"/>
+                <line x1="0" y1="1" x2="2" y2="3"/>
+                <polygon points="0,0 1,0 1,1"/>
+                <rect x="1" y="2" width="3" height="4"/>
+                <circle cx="50" cy="50" r="10"/>
+              </g>
+            </svg>'''
+        strokes = list(vector.iter_svg_strokes(io.BytesIO(svg), scale=1.0, tolerance=0.01, steps_per_cm=1))
+        self.assertEqual(len(strokes), 6)
+        self.assertEqual(strokes[0], [(10.0, 10.0), (20.0, 10.0), (25.0, 10.0), (25.0, 15.0), (10.0, 10.0)])
+        #Relative move starts at the beginning of closed subpath
+        self.assertEqual(strokes[1][0], (15.0, 15.0))
+        self.assertPoint(strokes[1][-1], (75.0, 15.0))
+        self.assertTrue(len(strokes[1]) > 20)
+        self.assertEqual(strokes[2], [(0.0, 1.0), (2.0, 3.0)])
+        self.assertEqual(strokes[3], [(0.0, 0.0), (1.0, 0.0), (1.0, 1.0), (0.0, 0.0)])
+        self.assertEqual(strokes[4], [(1.0, 2.0), (4.0, 2.0), (4.0, 6.0), (1.0, 6.0), (1.0, 2.0)])
+        self.assertPoint(strokes[5][-1], strokes[5][0])
+        for x, y in strokes[5]:
+            self.assertAlmostEqual(hypot(x - 50, y - 50), 10.0)
+
+    def test_svg_units(self):
+        svg = b'<svg><line x1="0" y1="0" x2="96" y2="48"/></svg>'
+        points = list(vector.iter_svg_points(io.BytesIO(svg), origin=(10.0, 20.0)))
+        self.assertPoint(points[0], (10.0, 20.0))
+        self.assertPoint(points[1], (12.54, 21.27))
+
+    def test_svg_viewbox(self):
+        svg = b'''<svg xmlns="http://www.w3.org/2000/svg" width="100mm" height="50mm" viewBox="10 0 100 50">
+              <defs><path id="arrow" d="M0,0 L5,5"/></defs>
+              <clipPath><rect x="0" y="0" width="10" height="10"/></clipPath>
+              <line x1="10" y1="0" x2="110" y2="0"/>
+            </svg>'''
+        strokes = list(vector.iter_svg_strokes(io.BytesIO(svg), origin=(10.0, 20.0)))
+        #Only the line is drawn, user unit is one millimeter
+        self.assertEqual(len(strokes), 1)
+        self.assertPoint(strokes[0][0], (10.0, 20.0))
+        self.assertPoint(strokes[0][1], (20.0, 20.0))
+
+    def test_gcode(self):
+        gcode = b'''G21 G90 (millimeters, absolute)
+            G0 X10 Y0
+            G1 X20 Y0 F1000 ; line
+            G3 X10 Y10 I-10 J0
+            G2 X0 Y0 I-10
+            G0 X5 Y5
+            G91 G1 X1
+            Y1
+            G90 G20 G1 X1'''
+        strokes = list(vector.iter_gcode_strokes(io.BytesIO(gcode), origin=(0.0, 30.0), tolerance=0.1,
+                steps_per_cm=100, chunk_size=7))
+        self.assertEqual(len(strokes), 2)
+        self.assertEqual(strokes[0][:2], [(1.0, 30.0), (2.0, 30.0)])
+        #Counterclockwise arc around (1, 30) with Y flipped
+        self.assertIn((1.0, 29.0), strokes[0])
+        self.assertEqual(strokes[0][-1], (0.0, 30.0))
+        for x, y in strokes[0][2:-1]:
+            if y < 29.0 or x > 1.0:
+                self.assertAlmostEqual(hypot(x - 1.0, y - 30.0), 1.0)
+        self.assertEqual(len(strokes[1]), 4)
+        for point, expected in zip(strokes[1], [(0.5, 29.5), (0.6, 29.5), (0.6, 29.4), (2.54, 29.4)]):
+            self.assertPoint(point, expected)
+
+    def test_lazy(self):
+        gcode = b'G0 X0 Y0\n' + b'G1 X1 Y1\n' * 100000
+        stream = io.BytesIO(gcode)
+        points = vector.iter_gcode_points(stream)
+        next(points)
+        self.assertTrue(stream.tell() < len(gcode))
+
+
+if __name__ == '__main__':
+    unittest.main()
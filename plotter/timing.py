@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Histogram:
+    """Histogram of step lateness with power of two buckets in microseconds.
+    Bucket 0 counts steps late less than 1 us, bucket n steps late less than 2 ** n us."""
+
+    BUCKETS = 20
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Clear all recorded values"""
+        self.counts = [0] * self.BUCKETS
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def add(self, late_ns):
+        """Record lateness of one step
+
+        :param late_ns: Lateness in nanoseconds"""
+        bucket = min((late_ns // 1000).bit_length(), self.BUCKETS - 1)
+        self.counts[bucket] += 1
+        self.count += 1
+        self.total_ns += late_ns
+        if late_ns > self.max_ns:
+            self.max_ns = late_ns
+
+    def percentile(self, percent):
+        """Upper bound of lateness of given percentage of steps
+
+        :param percent: Percentage of steps from 0 to 100
+        :return: Lateness in microseconds"""
+        limit = self.count * percent / 100.0
+        total = 0
+        for bucket, count in enumerate(self.counts):
+            total += count
+            if total >= limit:
+                return 1 << bucket
+        return 1 << (self.BUCKETS - 1)
+
+    def as_dict(self):
+        """Summary of the histogram, e.g. for logging or JSON export"""
+        return {
+            'count': self.count,
+            'mean_us': self.total_ns / self.count / 1000 if self.count else 0.0,
+            'max_us': self.max_ns / 1000,
+            'p50_us': self.percentile(50),
+            'p99_us': self.percentile(99),
+            'buckets_us': dict((1 << bucket, count) for bucket, count in enumerate(self.counts) if count),
+        }
+
+
+class Timer:
+    """Timing of steps against absolute deadlines on monotonic clock.
+    Time spent by computation between steps is compensated, so the rate does not depend on it."""
+
+    def __init__(self, spin_us=200, clock=time.perf_counter_ns, sleep=time.sleep):
+        """Setup of timer
+
+        :param spin_us: Last microseconds before deadline are spent in busy loop instead of sleep, 0 to only sleep
+        :param clock: Function returning monotonic time in nanoseconds
+        :param sleep: Function sleeping given number of seconds"""
+        self.spin_ns = spin_us * 1000
+        self.clock = clock
+        self.sleep = sleep
+        self.deadline = clock()
+        self.histogram = Histogram()
+
+    def start(self):
+        """Set the deadline of next step to now"""
+        self.deadline = self.clock()
+
+    def wait(self, delay):
+        """Wait till the deadline of next step and record how late it was reached
+
+        :param delay: Delay between previous and next step in seconds"""
+        delay_ns = int(delay * 1e9)
+        self.deadline += delay_ns
+        late = self.wait_until(self.deadline)
+        if late > delay_ns:
+            #Falling behind more than one step, the steps are not bursted to catch up
+            self.deadline += late
+
+    def wait_until(self, deadline):
+        """Wait till absolute deadline and record how late it was reached
+
+        :param deadline: Time on the clock of the timer
+        :return: Lateness in nanoseconds"""
+        clock = self.clock
+        now = clock()
+        remaining = deadline - now - self.spin_ns
+        if remaining > 0:
+            self.sleep(remaining / 1e9)
+        now = clock()
+        while now < deadline:
+            now = clock()
+        late = now - deadline
+        self.histogram.add(late)
+        return late
@@ -0,0 +1,480 @@
+#!/usr/bin/env python3
+from math import acos, atan2, ceil, cos, hypot, pi, radians, sin, sqrt
+import codecs
+import itertools
+import re
+import xml.etree.ElementTree as ElementTree
+import logging
+
+logger = logging.getLogger(__name__)
+
+#Centimeters per SVG user unit, CSS pixel is 1/96 inch
+SVG_UNIT = 2.54 / 96
+#Centimeters per unit of SVG lengths, plain numbers are CSS pixels
+SVG_LENGTHS = {'': SVG_UNIT, 'px': SVG_UNIT, 'mm': 0.1, 'cm': 1.0, 'in': 2.54, 'pt': 2.54 / 72, 'pc': 2.54 / 6}
+#Elements whose content is not rendered directly
+SVG_HIDDEN = frozenset(('defs', 'clipPath', 'marker', 'symbol', 'mask', 'pattern'))
+#Maximal depth of subdivision of Bezier curves
+MAX_DEPTH = 16
+
+_PATH_TOKEN = re.compile(r'([MmLlHhVvCcSsQqTtAaZz])|([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)')
+_SVG_LENGTH = re.compile(r'^\s*([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)\s*([a-z]*)\s*$')
+_GCODE_WORD = re.compile(r'([A-Za-z])\s*([-+]?(?:\d+\.?\d*|\.\d+))')
+_GCODE_COMMENT = re.compile(r'\([^)]*\)|;.*')
+
+
+def _deviation(point, start, end):
+    """Distance of point from line segment from start to end"""
+    dx = end[0] - start[0]
+    dy = end[1] - start[1]
+    length_squared = dx * dx + dy * dy
+    if length_squared == 0:
+        return hypot(point[0] - start[0], point[1] - start[1])
+    #Control points beyond the end points are measured to the nearest end point
+    t = min(max(((point[0] - start[0]) * dx + (point[1] - start[1]) * dy) / length_squared, 0.0), 1.0)
+    return hypot(point[0] - start[0] - t * dx, point[1] - start[1] - t * dy)
+
+
+def flatten_cubic(p0, p1, p2, p3, tolerance):
+    """Function approximates cubic Bezier curve by lines.
+    Curve is halved until its control points deviate from the chord segment less than tolerance,
+    so flat parts get few points and sharp bends many.
+
+    :param p0: Start point
+    :param p1: First control point
+    :param p2: Second control point
+    :param p3: End point
+    :param tolerance: Maximal deviation in units of the points
+    :return: List of points without start and with end
+    """
+    points = []
+    #Stack of parts to check, the last part is processed first so points are in order
+    stack = [(p0, p1, p2, p3, 0)]
+    while stack:
+        q0, q1, q2, q3, depth = stack.pop()
+        if depth >= MAX_DEPTH or max(_deviation(q1, q0, q3), _deviation(q2, q0, q3)) <= tolerance:
+            points.append(q3)
+            continue
+        #Halving by de Casteljau's algorithm
+        q01 = ((q0[0] + q1[0]) / 2, (q0[1] + q1[1]) / 2)
+        q12 = ((q1[0] + q2[0]) / 2, (q1[1] + q2[1]) / 2)
+        q23 = ((q2[0] + q3[0]) / 2, (q2[1] + q3[1]) / 2)
+        q012 = ((q01[0] + q12[0]) / 2, (q01[1] + q12[1]) / 2)
+        q123 = ((q12[0] + q23[0]) / 2, (q12[1] + q23[1]) / 2)
+        middle = ((q012[0] + q123[0]) / 2, (q012[1] + q123[1]) / 2)
+        stack.append((middle, q123, q23, q3, depth + 1))
+        stack.append((q0, q01, q012, middle, depth + 1))
+    return points
+
+
+def flatten_quadratic(p0, p1, p2, tolerance):
+    """Function approximates quadratic Bezier curve by lines, see flatten_cubic
+
+    :return: List of points without start and with end"""
+    c1 = (p0[0] + 2.0 / 3 * (p1[0] - p0[0]), p0[1] + 2.0 / 3 * (p1[1] - p0[1]))
+    c2 = (p2[0] + 2.0 / 3 * (p1[0] - p2[0]), p2[1] + 2.0 / 3 * (p1[1] - p2[1]))
+    return flatten_cubic(p0, c1, c2, p2, tolerance)
+
+
+def flatten_arc(center, rx, ry, rotation, start, sweep, tolerance):
+    """Function approximates elliptic arc by lines of equal angle.
+    Number of lines is given by the largest radius so the middle of each line is at most tolerance from the arc.
+
+    :param center: Center of the ellipse
+    :param rx: Radius of the ellipse along its rotated X axis
+    :param ry: Radius of the ellipse along its rotated Y axis
+    :param rotation: Rotation of the ellipse in radians
+    :param start: Angle of the start point in radians
+    :param sweep: Angle of the arc in radians, negative for arc in direction of decreasing angle
+    :param tolerance: Maximal deviation in units of the points
+    :return: List of points without start and with end
+    """
+    radius = max(rx, ry)
+    if radius <= tolerance:
+        count = 1
+    else:
+        count = max(int(ceil(abs(sweep) / (2 * acos(1 - tolerance / radius)))), 1)
+    cos_rotation = cos(rotation)
+    sin_rotation = sin(rotation)
+    points = []
+    for i in range(1, count + 1):
+        angle = start + sweep * i / count
+        x = rx * cos(angle)
+        y = ry * sin(angle)
+        points.append((center[0] + x * cos_rotation - y * sin_rotation,
+                center[1] + x * sin_rotation + y * cos_rotation))
+    return points
+
+
+def _svg_arc(p0, rx, ry, rotation, large, sweep, p1, tolerance):
+    """Points of SVG arc given by its end points, conversion to center follows SVG specification
+
+    :return: List of points without start and with end"""
+    rx = abs(rx)
+    ry = abs(ry)
+    if rx == 0 or ry == 0 or p0 == p1:
+        return [p1]
+    phi = radians(rotation)
+    cos_phi = cos(phi)
+    sin_phi = sin(phi)
+    dx = (p0[0] - p1[0]) / 2
+    dy = (p0[1] - p1[1]) / 2
+    x1 = cos_phi * dx + sin_phi * dy
+    y1 = -sin_phi * dx + cos_phi * dy
+    #Radii too small for the end points are scaled up
+    scale = (x1 / rx) ** 2 + (y1 / ry) ** 2
+    if scale > 1:
+        rx *= sqrt(scale)
+        ry *= sqrt(scale)
+    numerator = (rx * ry) ** 2 - (rx * y1) ** 2 - (ry * x1) ** 2
+    coefficient = sqrt(max(numerator, 0.0) / ((rx * y1) ** 2 + (ry * x1) ** 2))
+    if large == sweep:
+        coefficient = -coefficient
+    cx1 = coefficient * rx * y1 / ry
+    cy1 = -coefficient * ry * x1 / rx
+    center = (cos_phi * cx1 - sin_phi * cy1 + (p0[0] + p1[0]) / 2,
+            sin_phi * cx1 + cos_phi * cy1 + (p0[1] + p1[1]) / 2)
+    start = atan2((y1 - cy1) / ry, (x1 - cx1) / rx)
+    angle = atan2((-y1 - cy1) / ry, (-x1 - cx1) / rx) - start
+    if sweep and angle < 0:
+        angle += 2 * pi
+    elif not sweep and angle > 0:
+        angle -= 2 * pi
+    points = flatten_arc(center, rx, ry, phi, start, angle, tolerance)
+    points[-1] = p1
+    return points
+
+
+def _path(data, tolerance):
+    """Generator interpreting SVG path data
+
+    :param data: Value of d attribute
+    :param tolerance: Maximal deviation of curves in user units
+    :return: Generator of (new_subpath, (x, y)) tuples in user units
+    """
+    tokens = [command or number for command, number in _PATH_TOKEN.findall(data)]
+    tokens.reverse()
+    command = None
+    current = (0.0, 0.0)
+    start = current
+    #Control point of previous curve for smooth curves
+    control = None
+
+    def numbers(count, flags=()):
+        values = []
+        for index in range(count):
+            token = tokens.pop()
+            if index in flags and len(token) > 1:
+                #Flags of arcs can be written without separators
+                tokens.append(token[1:])
+                token = token[0]
+            values.append(float(token))
+        return values
+
+    while tokens:
+        if tokens[-1].isalpha():
+            command = tokens.pop()
+        elif command is None:
+            raise ValueError('Path data must start with command')
+        relative = command.islower()
+        origin = current if relative else (0.0, 0.0)
+        upper = command.upper()
+        previous_control = control
+        control = None
+        if upper == 'Z':
+            if current != start:
+                yield (False, start)
+            current = start
+            #Repeated Z has no parameters
+            command = None
+            continue
+        if upper == 'M':
+            x, y = numbers(2)
+            current = start = (origin[0] + x, origin[1] + y)
+            yield (True, current)
+            #Following pairs are lines
+            command = 'l' if relative else 'L'
+            continue
+        if upper == 'L':
+            x, y = numbers(2)
+            points = [(origin[0] + x, origin[1] + y)]
+        elif upper == 'H':
+            x, = numbers(1)
+            points = [(origin[0] + x, current[1])]
+        elif upper == 'V':
+            y, = numbers(1)
+            points = [(current[0], origin[1] + y)]
+        elif upper in 'CS':
+            if upper == 'C':
+                x1, y1, x2, y2, x, y = numbers(6)
+                c1 = (origin[0] + x1, origin[1] + y1)
+            else:
+                x2, y2, x, y = numbers(4)
+                c1 = current
+                if previous_control is not None and previous_control[0] == 'C':
+                    c1 = (2 * current[0] - previous_control[1][0], 2 * current[1] - previous_control[1][1])
+            c2 = (origin[0] + x2, origin[1] + y2)
+            points = flatten_cubic(current, c1, c2, (origin[0] + x, origin[1] + y), tolerance)
+            control = ('C', c2)
+        elif upper in 'QT':
+            if upper == 'Q':
+                x1, y1, x, y = numbers(4)
+                c1 = (origin[0] + x1, origin[1] + y1)
+            else:
+                x, y = numbers(2)
+                c1 = current
+                if previous_control is not None and previous_control[0] == 'Q':
+                    c1 = (2 * current[0] - previous_control[1][0], 2 * current[1] - previous_control[1][1])
+            points = flatten_quadratic(current, c1, (origin[0] + x, origin[1] + y), tolerance)
+            control = ('Q', c1)
+        elif upper == 'A':
+            rx, ry, rotation, large, sweep, x, y = numbers(7, flags=(3, 4))
+            points = _svg_arc(current, rx, ry, rotation, large, sweep, (origin[0] + x, origin[1] + y), tolerance)
+        else:
+            raise ValueError('Unknown path command {}'.format(command))
+        for point in points:
+            yield (False, point)
+        current = points[-1]
+
+
+def _number(element, name):
+    return float(element.get(name, 0) or 0)
+
+
+def _shape(element, tolerance):
+    """Generator of points of SVG shape element
+
+    :return: Generator of (new_subpath, (x, y)) tuples in user units
+    """
+    tag = element.tag.rsplit('}', 1)[-1]
+    if tag == 'path':
+        for item in _path(element.get('d', ''), tolerance):
+            yield item
+    elif tag == 'line':
+        yield (True, (_number(element, 'x1'), _number(element, 'y1')))
+        yield (False, (_number(element, 'x2'), _number(element, 'y2')))
+    elif tag in ('polyline', 'polygon'):
+        values = [float(value) for value in re.split(r'[\s,]+', element.get('points', '').strip()) if value]
+        points = list(zip(values[0::2], values[1::2]))
+        if tag == 'polygon' and points:
+            points.append(points[0])
+        for index, point in enumerate(points):
+            yield (index == 0, point)
+    elif tag == 'rect':
+        x, y = _number(element, 'x'), _number(element, 'y')
+        width, height = _number(element, 'width'), _number(element, 'height')
+        for index, point in enumerate(((x, y), (x + width, y), (x + width, y + height), (x, y + height), (x, y))):
+            yield (index == 0, point)
+    elif tag in ('circle', 'ellipse'):
+        center = (_number(element, 'cx'), _number(element, 'cy'))
+        if tag == 'circle':
+            rx = ry = _number(element, 'r')
+        else:
+            rx, ry = _number(element, 'rx'), _number(element, 'ry')
+        yield (True, (center[0] + rx, center[1]))
+        for point in flatten_arc(center, rx, ry, 0.0, 0.0, 2 * pi, tolerance):
+            yield (False, point)
+
+
+def _length(value):
+    """SVG length in centimeters, None for missing, relative or unknown units"""
+    match = _SVG_LENGTH.match(value or '')
+    if match is None or match.group(2) not in SVG_LENGTHS:
+        return None
+    return float(match.group(1)) * SVG_LENGTHS[match.group(2)]
+
+
+def _viewport(element, scale):
+    """Scale and offset of user units of the root element.
+    Size of the root element is mapped to its viewBox, aspect ratio is kept as by the default preserveAspectRatio.
+
+    :param element: Root svg element
+    :param scale: Centimeters per user unit or None to derive it from size and viewBox
+    :return: Tuple of scale and (x, y) of the viewBox corner in user units
+    """
+    box = [float(value) for value in re.split(r'[\s,]+', element.get('viewBox', '').strip()) if value]
+    if len(box) != 4 or box[2] <= 0 or box[3] <= 0:
+        return (SVG_UNIT if scale is None else scale), (0.0, 0.0)
+    if scale is None:
+        scales = []
+        for name, size in (('width', box[2]), ('height', box[3])):
+            length = _length(element.get(name))
+            if length:
+                scales.append(length / size)
+        scale = min(scales) if scales else SVG_UNIT
+    return scale, (box[0], box[1])
+
+
+def _svg(stream, scale, origin, tolerance):
+    """Generator parsing SVG incrementally, elements are dropped after they are converted.
+    Shapes within definitions, clip paths, markers, symbols, masks and patterns are skipped.
+
+    :return: Generator of (stroke number, (x, y)) tuples in centimeters
+    """
+    stroke = -1
+    offset = (0.0, 0.0)
+    #Depth of elements which are not rendered
+    hidden = 0
+    root = True
+    for event, element in ElementTree.iterparse(stream, events=('start', 'end')):
+        tag = element.tag.rsplit('}', 1)[-1]
+        if event == 'start':
+            if root:
+                root = False
+                scale, offset = _viewport(element, scale)
+                #Tolerance in user units
+                unit_tolerance = tolerance / scale
+            if tag in SVG_HIDDEN:
+                hidden += 1
+            continue
+        if tag in SVG_HIDDEN:
+            hidden -= 1
+        elif not hidden:
+            if element.get('transform'):
+                logger.warning("Transform of %s is not supported, it is ignored", element.tag)
+            for new_subpath, (x, y) in _shape(element, unit_tolerance):
+                if new_subpath:
+                    stroke += 1
+                yield (stroke, (origin[0] + (x - offset[0]) * scale, origin[1] + (y - offset[1]) * scale))
+        element.clear()
+
+
+def _lines(stream, chunk_size):
+    """Generator of text lines read in chunks, stream needs only read method"""
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    buffer = ''
+    while True:
+        data = stream.read(chunk_size)
+        if isinstance(data, bytes):
+            data = decoder.decode(data, final=not data)
+        buffer += data
+        lines = buffer.split('\n')
+        buffer = lines.pop()
+        for line in lines:
+            yield line
+        if not data:
+            break
+    if buffer:
+        yield buffer
+
+
+def _gcode(stream, origin, tolerance, chunk_size):
+    """Generator interpreting G0, G1, G2 and G3 moves line by line.
+    Rapid moves G0 start new stroke, Y axis of G-code points up so it is flipped.
+
+    :return: Generator of (stroke number, (x, y)) tuples in centimeters
+    """
+    stroke = -1
+    #Centimeters per unit, G21 millimeters are default
+    unit = 0.1
+    absolute = True
+    motion = None
+    current = (0.0, 0.0)
+    drawing = False
+    for line in _lines(stream, chunk_size):
+        words = _GCODE_WORD.findall(_GCODE_COMMENT.sub('', line))
+        values = {}
+        for letter, value in words:
+            letter = letter.upper()
+            if letter == 'G':
+                code = float(value)
+                if code in (0, 1, 2, 3):
+                    motion = int(code)
+                elif code in (20, 21):
+                    #Position is kept in the current units
+                    previous, unit = unit, 2.54 if code == 20 else 0.1
+                    current = (current[0] * previous / unit, current[1] * previous / unit)
+                elif code == 90:
+                    absolute = True
+                elif code == 91:
+                    absolute = False
+            else:
+                values[letter] = float(value)
+        if motion is None or not any(letter in values for letter in 'XYIJ'):
+            continue
+        if absolute:
+            target = (values.get('X', current[0]), values.get('Y', current[1]))
+        else:
+            target = (current[0] + values.get('X', 0.0), current[1] + values.get('Y', 0.0))
+        if motion == 0:
+            drawing = False
+            current = target
+            continue
+        if not drawing:
+            stroke += 1
+            drawing = True
+            yield (stroke, (origin[0] + current[0] * unit, origin[1] - current[1] * unit))
+        if motion == 1:
+            points = [target]
+        else:
+            #Center of the arc is relative to the current position
+            center = (current[0] + values.get('I', 0.0), current[1] + values.get('J', 0.0))
+            radius = hypot(current[0] - center[0], current[1] - center[1])
+            start = atan2(current[1] - center[1], current[0] - center[0])
+            sweep = atan2(target[1] - center[1], target[0] - center[0]) - start
+            if motion == 3 and sweep <= 0:
+                sweep += 2 * pi
+            elif motion == 2 and sweep >= 0:
+                sweep -= 2 * pi
+            points = flatten_arc(center, radius, radius, 0.0, start, sweep, tolerance / unit)
+            points[-1] = target
+        for x, y in points:
+            yield (stroke, (origin[0] + x * unit, origin[1] - y * unit))
+        current = target
+
+
+def _tolerance(tolerance, steps_per_cm):
+    """Tolerance in centimeters, string length changes at most as much as the pen moves"""
+    return tolerance / steps_per_cm
+
+
+def iter_svg_points(stream, scale=None, origin=(0.0, 0.0), tolerance=1.0, steps_per_cm=450):
+    """Generator of points parsed incrementally from SVG drawing, all shapes are joined to one path.
+    Curves and arcs are flattened so they deviate at most tolerance steps from the lines.
+
+    :param stream: Binary file-like object, e.g. from ingest.open_source
+    :param scale: Centimeters per SVG user unit, defaults to width and height of the drawing divided by its viewBox,
+        or CSS pixel when the drawing has no absolute size
+    :param origin: XY coordinates of the origin of SVG in centimeters
+    :param tolerance: Maximal deviation of flattened curves in steps
+    :param steps_per_cm: Number of steps per centimeter of string
+    :return: Generator of (x, y) tuples in centimeters
+    """
+    for stroke, point in _svg(stream, scale, origin, _tolerance(tolerance, steps_per_cm)):
+        yield point
+
+
+def iter_svg_strokes(stream, scale=None, origin=(0.0, 0.0), tolerance=1.0, steps_per_cm=450):
+    """Generator of strokes parsed incrementally from SVG drawing, each subpath is one stroke.
+    See iter_svg_points.
+
+    :return: Generator of lists of (x, y) tuples in centimeters
+    """
+    items = _svg(stream, scale, origin, _tolerance(tolerance, steps_per_cm))
+    for stroke, points in itertools.groupby(items, lambda item: item[0]):
+        yield [point for stroke, point in points]
+
+
+def iter_gcode_points(stream, origin=(0.0, 0.0), tolerance=1.0, steps_per_cm=450, chunk_size=4096):
+    """Generator of points of G-code moves joined to one path.
+    Arcs G2 and G3 are flattened so they deviate at most tolerance steps from the lines.
+
+    :param stream: Binary file-like object, e.g. from ingest.open_source
+    :param origin: XY coordinates of the G-code origin in centimeters, Y of G-code grows upwards
+    :param tolerance: Maximal deviation of flattened arcs in steps
+    :param steps_per_cm: Number of steps per centimeter of string
+    :param chunk_size: Number of bytes read at once
+    :return: Generator of (x, y) tuples in centimeters
+    """
+    for stroke, point in _gcode(stream, origin, _tolerance(tolerance, steps_per_cm), chunk_size):
+        yield point
+
+
+def iter_gcode_strokes(stream, origin=(0.0, 0.0), tolerance=1.0, steps_per_cm=450, chunk_size=4096):
+    """Generator of strokes of G-code, each rapid move G0 starts new stroke. See iter_gcode_points.
+
+    :return: Generator of lists of (x, y) tuples in centimeters
+    """
+    items = _gcode(stream, origin, _tolerance(tolerance, steps_per_cm), chunk_size)
+    for stroke, points in itertools.groupby(items, lambda item: item[0]):
+        yield [point for stroke, point in points]